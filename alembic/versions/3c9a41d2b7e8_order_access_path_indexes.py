@@ -0,0 +1,45 @@
+"""order access path indexes
+
+Revision ID: 3c9a41d2b7e8
+Revises: e66207801120
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c9a41d2b7e8'
+down_revision: Union[str, Sequence[str], None] = 'e66207801120'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    # Pagination keyset des listes admin : ORDER BY created_at DESC, id DESC
+    ('ix_order_created_at_id', 'order', ['created_at', 'id']),
+    # Filtre par statut + même tri (un B-tree se parcourt aussi bien à l'envers)
+    ('ix_order_status_created_at_id', 'order', ['status', 'created_at', 'id']),
+    # Chargement des lignes d'une ou plusieurs commandes
+    ('ix_orderitem_order_id', 'orderitem', ['order_id']),
+    # Vérification de clé étrangère lors de la suppression d'un item du menu
+    ('ix_orderitem_menu_item_id', 'orderitem', ['menu_item_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY sous Postgres pour ne pas bloquer les prises de commande
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,40 @@
+"""idempotency keys
+
+Revision ID: 8f2d6c1a9b47
+Revises: 3c9a41d2b7e8
+Create Date: 2026-10-17 14:02:19.318407
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2d6c1a9b47'
+down_revision: Union[str, Sequence[str], None] = '3c9a41d2b7e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'idempotencykey',
+        sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+        sa.Column('request_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('response_status', sa.Integer(), nullable=True),
+        sa.Column('response_body', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+        if_not_exists=True
+    )
+    op.create_index(op.f('ix_idempotencykey_created_at'), 'idempotencykey', ['created_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_idempotencykey_created_at'), table_name='idempotencykey', if_exists=True)
+    op.drop_table('idempotencykey', if_exists=True)
@@ -0,0 +1,126 @@
+"""customer phone e164
+
+Revision ID: a7c4e2f19b30
+Revises: d3a8c61e4f25
+Create Date: 2026-10-17 18:40:12.604117
+
+"""
+import os
+import re
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c4e2f19b30'
+down_revision: Union[str, Sequence[str], None] = 'd3a8c61e4f25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('order', 'orderarchive')
+BACKFILL_BATCH_SIZE = 5000
+
+# Copie figée de app.core.phone.normalize_phone telle qu'à cette révision : une évolution
+# ultérieure du normaliseur ne doit pas changer ce que fait ce backfill
+PHONE_DEFAULT_COUNTRY_CODE = os.environ.get("PHONE_DEFAULT_COUNTRY_CODE", "33").lstrip("+")
+_SEPARATORS = re.compile(r"[\s.\-/()]+")
+_E164 = re.compile(r"^\+[1-9][0-9]{7,14}$")
+
+
+def normalize_phone(phone: Optional[str], country_code: str = PHONE_DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    if not phone:
+        return None
+    digits = _SEPARATORS.sub("", phone)
+    if digits.startswith("00"):
+        digits = "+" + digits[2:]
+    elif digits.startswith("0"):
+        digits = f"+{country_code}{digits[1:]}"
+    elif not digits.startswith("+"):
+        digits = f"+{country_code}{digits}" if len(digits) <= 9 else "+" + digits
+    return digits if _E164.match(digits) else None
+
+
+def _backfill(bind, table_name: str):
+    """Normalise les numéros existants par lots de BACKFILL_BATCH_SIZE, un commit par lot"""
+    orders = sa.table(
+        table_name,
+        sa.column('id', sa.Integer),
+        sa.column('created_at', sa.DateTime),
+        sa.column('customer_phone', sa.String),
+        sa.column('customer_phone_e164', sa.String),
+    )
+    update = (
+        sa.update(orders)
+        # created_at : élagage des partitions de l'archive
+        .where(orders.c.id == sa.bindparam('b_id'), orders.c.created_at == sa.bindparam('b_created_at'))
+        .values(customer_phone_e164=sa.bindparam('b_phone'))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(orders.c.id, orders.c.created_at, orders.c.customer_phone)
+            .where(orders.c.id > last_id, orders.c.customer_phone.isnot(None))
+            .order_by(orders.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        params = [
+            {'b_id': row.id, 'b_created_at': row.created_at, 'b_phone': phone}
+            for row in rows
+            if (phone := normalize_phone(row.customer_phone)) is not None
+        ]
+        if params:
+            bind.execute(update, params)
+
+
+def _has_column(table_name: str) -> bool:
+    # Base créée par create_all (SCHEMA_CHECK=create) : colonne déjà là. SQLite n'a pas
+    # de ADD COLUMN IF NOT EXISTS, d'où l'inspection
+    if op.get_context().as_sql:
+        return False
+    columns = sa.inspect(op.get_bind()).get_columns(table_name)
+    return any(column['name'] == 'customer_phone_e164' for column in columns)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in TABLES:
+        if not _has_column(table_name):
+            op.add_column(
+                table_name, sa.Column('customer_phone_e164', sqlmodel.sql.sqltypes.AutoString(), nullable=True)
+            )
+
+    # Backfill avant les index : pas de maintenance d'index pendant les mises à jour.
+    # Impossible en mode --sql : relancer la migration en ligne pour normaliser l'existant
+    with op.get_context().autocommit_block():
+        if not op.get_context().as_sql:
+            for table_name in TABLES:
+                _backfill(op.get_bind(), table_name)
+
+        # CONCURRENTLY pour ne pas bloquer les prises de commande ; l'archive est
+        # partitionnée et Postgres ne l'accepte pas sur la table mère
+        op.create_index(
+            'ix_order_customer_phone_e164_created_at', 'order', ['customer_phone_e164', 'created_at'],
+            if_not_exists=True, postgresql_concurrently=True
+        )
+    op.create_index(
+        'ix_orderarchive_customer_phone_e164_created_at', 'orderarchive', ['customer_phone_e164', 'created_at'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orderarchive_customer_phone_e164_created_at', table_name='orderarchive', if_exists=True)
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_order_customer_phone_e164_created_at', table_name='order', if_exists=True, postgresql_concurrently=True
+        )
+    for table_name in reversed(TABLES):
+        op.drop_column(table_name, 'customer_phone_e164')
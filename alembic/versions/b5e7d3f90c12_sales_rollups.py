@@ -0,0 +1,111 @@
+"""sales rollups
+
+Revision ID: b5e7d3f90c12
+Revises: 8f2d6c1a9b47
+Create Date: 2026-10-17 15:26:03.744120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e7d3f90c12'
+down_revision: Union[str, Sequence[str], None] = '8f2d6c1a9b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _sales_columns():
+    return [
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+    ]
+
+
+# Remplissage initial depuis l'historique (mêmes règles que app.service.rollup :
+# dates UTC, commandes annulées exclues des ventes). Ailleurs que sous Postgres :
+# python -m app.cli rebuild-rollups
+BACKFILL = [
+    """
+    INSERT INTO dailysales (day, orders, quantity, revenue)
+    SELECT o.created_at::date, count(*), coalesce(sum(q.quantity), 0), sum(o.total_amount)
+    FROM "order" o
+    LEFT JOIN (SELECT order_id, sum(quantity) AS quantity FROM orderitem GROUP BY order_id) q ON q.order_id = o.id
+    WHERE o.status <> 'cancelled'
+    GROUP BY 1
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO hourlysales (hour, orders, quantity, revenue)
+    SELECT date_trunc('hour', o.created_at), count(*), coalesce(sum(q.quantity), 0), sum(o.total_amount)
+    FROM "order" o
+    LEFT JOIN (SELECT order_id, sum(quantity) AS quantity FROM orderitem GROUP BY order_id) q ON q.order_id = o.id
+    WHERE o.status <> 'cancelled'
+    GROUP BY 1
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO itemdailysales (day, menu_item_id, orders, quantity, revenue)
+    SELECT o.created_at::date, i.menu_item_id, count(DISTINCT o.id), sum(i.quantity), sum(i.quantity * i.unit_price)
+    FROM orderitem i
+    JOIN "order" o ON o.id = i.order_id
+    WHERE o.status <> 'cancelled'
+    GROUP BY 1, 2
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO orderstatuscount (status, orders)
+    SELECT status, count(*) FROM "order" GROUP BY status
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'dailysales',
+        sa.Column('day', sa.Date(), nullable=False),
+        *_sales_columns(),
+        sa.PrimaryKeyConstraint('day'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'hourlysales',
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        *_sales_columns(),
+        sa.PrimaryKeyConstraint('hour'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'itemdailysales',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('menu_item_id', sa.Integer(), nullable=False),
+        *_sales_columns(),
+        sa.PrimaryKeyConstraint('day', 'menu_item_id'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'orderstatuscount',
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('orders', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('status'),
+        if_not_exists=True
+    )
+
+    bind = op.get_bind()
+    offline = op.get_context().as_sql
+    if bind.dialect.name == 'postgresql' and (offline or sa.inspect(bind).has_table('order')):
+        for statement in BACKFILL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('orderstatuscount', 'itemdailysales', 'hourlysales', 'dailysales'):
+        op.drop_table(table, if_exists=True)
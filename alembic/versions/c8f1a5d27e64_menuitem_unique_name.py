@@ -0,0 +1,61 @@
+"""menuitem unique name
+
+Revision ID: c8f1a5d27e64
+Revises: a7c4e2f19b30
+Create Date: 2026-10-17 21:12:47.318206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f1a5d27e64'
+down_revision: Union[str, Sequence[str], None] = 'a7c4e2f19b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rename_duplicates(bind):
+    """Le plus ancien garde le nom, les autres prennent leur id en suffixe (« Pizza Reine (12) »),
+    puis un compteur si ce nom existe déjà. Rien n'est supprimé, les commandes y font référence"""
+    menu = sa.table('menuitem', sa.column('id', sa.Integer), sa.column('name', sa.String))
+    rows = bind.execute(sa.select(menu.c.id, menu.c.name).order_by(menu.c.id)).all()
+    taken = {row.name for row in rows}
+    kept = set()
+    for row in rows:
+        if row.name not in kept:
+            kept.add(row.name)
+            continue
+        candidate, attempt = f"{row.name} ({row.id})", 1
+        while candidate in taken:
+            attempt += 1
+            candidate = f"{row.name} ({row.id}-{attempt})"
+        taken.add(candidate)
+        bind.execute(sa.update(menu).where(menu.c.id == row.id).values(name=candidate))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().as_sql:
+        # Sans connexion, pas de contrôle des collisions : la création de l'index unique
+        # échoue (sans rien modifier d'autre) si un nom suffixé existe déjà
+        op.execute(
+            """
+            UPDATE menuitem SET name = name || ' (' || CAST(id AS VARCHAR) || ')'
+            WHERE id NOT IN (SELECT MIN(id) FROM menuitem GROUP BY name)
+            """
+        )
+    else:
+        _rename_duplicates(op.get_bind())
+    # Clé de conflit de l'import du menu (INSERT ... ON CONFLICT (name))
+    op.drop_index('ix_menuitem_name', table_name='menuitem', if_exists=True)
+    op.create_index('ix_menuitem_name', 'menuitem', ['name'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_menuitem_name', table_name='menuitem')
+    op.create_index('ix_menuitem_name', 'menuitem', ['name'], unique=False)
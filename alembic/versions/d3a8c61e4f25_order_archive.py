@@ -0,0 +1,66 @@
+"""order archive
+
+Revision ID: d3a8c61e4f25
+Revises: b5e7d3f90c12
+Create Date: 2026-10-17 17:02:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8c61e4f25'
+down_revision: Union[str, Sequence[str], None] = 'b5e7d3f90c12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Sous Postgres, tables partitionnées par mois sur la date de commande. Les partitions
+# mensuelles sont créées à la demande par app.service.order_archive.ensure_partitions :
+# pas de partition par défaut, qui empêcherait d'en ajouter pour un mois déjà archivé.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'orderarchive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('customer_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('customer_phone', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('customer_email', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)',
+        if_not_exists=True
+    )
+    op.create_index(op.f('ix_orderarchive_id'), 'orderarchive', ['id'], unique=False, if_not_exists=True)
+    op.create_table(
+        'orderitemarchive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_created_at', sa.DateTime(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('menu_item_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id', 'order_created_at'),
+        postgresql_partition_by='RANGE (order_created_at)',
+        if_not_exists=True
+    )
+    op.create_index(
+        op.f('ix_orderitemarchive_order_id'), 'orderitemarchive', ['order_id'], unique=False, if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_orderitemarchive_order_id'), table_name='orderitemarchive', if_exists=True)
+    op.drop_table('orderitemarchive', if_exists=True)
+    op.drop_index(op.f('ix_orderarchive_id'), table_name='orderarchive', if_exists=True)
+    op.drop_table('orderarchive', if_exists=True)
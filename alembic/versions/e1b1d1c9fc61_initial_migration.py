@@ -22,20 +22,62 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
+    # IF NOT EXISTS : les bases créées avant par create_all au démarrage de l'app
+    # peuvent passer par la chaîne de migrations complète
     op.create_table('user',
     sa.Column('id', sa.Integer(), nullable=False),
     sa.Column('username', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
     sa.Column('hashed_password', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
     sa.Column('is_owner', sa.Boolean(), nullable=False),
-    sa.PrimaryKeyConstraint('id')
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=True, if_not_exists=True)
+    # Tables du menu et des commandes, jusque-là créées uniquement par create_all
+    op.create_table('menuitem',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('category', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('available', sa.Boolean(), nullable=False),
+    sa.Column('image_url', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_menuitem_name'), 'menuitem', ['name'], unique=False, if_not_exists=True)
+    op.create_table('order',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('customer_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('customer_phone', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('customer_email', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('orderitem',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['menu_item_id'], ['menuitem.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['order.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
     )
-    op.create_index(op.f('ix_user_username'), 'user', ['username'], unique=True)
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_index(op.f('ix_user_username'), table_name='user')
-    op.drop_table('user')
+    op.drop_table('orderitem', if_exists=True)
+    op.drop_table('order', if_exists=True)
+    op.drop_index(op.f('ix_menuitem_name'), table_name='menuitem', if_exists=True)
+    op.drop_table('menuitem', if_exists=True)
+    op.drop_index(op.f('ix_user_username'), table_name='user', if_exists=True)
+    op.drop_table('user', if_exists=True)
     # ### end Alembic commands ###
@@ -32,6 +32,11 @@ def upgrade() -> None:
         column('image_url', String),
     )
 
+    # Menu déjà saisi (base créée avant que les migrations ne soient jouées) : on n'y touche pas
+    if not op.get_context().as_sql:
+        if op.get_bind().execute(sa.select(sa.func.count()).select_from(menu_table)).scalar():
+            return
+
     # Insérer plusieurs items par défaut
     op.bulk_insert(
         menu_table,
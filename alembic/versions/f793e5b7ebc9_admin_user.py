@@ -30,13 +30,17 @@ def upgrade() -> None:
                        column('hashed_password', String),
                        column('is_owner', Boolean),
                        )
-    op.bulk_insert(user_table, [
-        {
-            'username': 'massimo',
-            'hashed_password': "$2b$12$JDeKJiV1PFcl1vlxU71zJ.N0LmyFMFjpGErIiJPDYaYCDwyROLJTO",
-            'is_owner': True,
-        }
-    ])
+    # Pas de doublon sur une base déjà peuplée avant que les migrations ne soient jouées
+    op.execute(
+        user_table.insert().from_select(
+            ['username', 'hashed_password', 'is_owner'],
+            sa.select(
+                sa.literal('massimo'),
+                sa.literal("$2b$12$JDeKJiV1PFcl1vlxU71zJ.N0LmyFMFjpGErIiJPDYaYCDwyROLJTO"),
+                sa.true()
+            ).where(~sa.exists().where(user_table.c.username == 'massimo'))
+        )
+    )
     # ### end Alembic commands ###
 
 
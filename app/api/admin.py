@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends
+from app.model.user import User
+from app.core.security import get_current_admin, password_pool, user_cache
+from app.core.query_budget import query_budget
+from app.core.events import order_events
+from app.core.idempotency import idempotency_store
+from app.core.rate_limit import rate_limiters
+from app.core.menu_search import menu_search
+from app.service.active_orders import active_orders
+from app.service.caller import caller_cache
+from app.service.order_intake import order_intake
+from app.db.session import engine, pool_stats, read_engine, replica_router
+
+router = APIRouter()
+
+
+@router.get("/stats/cache")
+@query_budget(1)
+async def get_cache_stats(current_admin: User = Depends(get_current_admin)):
+    """Statistiques des caches en mémoire de ce worker - Admin seulement"""
+    return {
+        "users": user_cache.stats(),
+        "idempotency": idempotency_store.stats(),
+        "menu_search": menu_search.stats(),
+        "callers": caller_cache.stats(),
+    }
+
+
+@router.get("/stats/password-hashing")
+@query_budget(1)
+async def get_password_hashing_stats(current_admin: User = Depends(get_current_admin)):
+    """Occupation du pool de hachage bcrypt de ce worker - Admin seulement"""
+    return password_pool.stats()
+
+
+@router.get("/stats/events")
+@query_budget(1)
+async def get_event_stats(current_admin: User = Depends(get_current_admin)):
+    """Diffusion des événements de commande : abonnés, événements perdus - Admin seulement"""
+    return order_events.stats()
+
+
+@router.get("/stats/order-intake")
+@query_budget(1)
+async def get_order_intake_stats(current_admin: User = Depends(get_current_admin)):
+    """File de commit groupé des commandes : profondeur, taille moyenne des lots - Admin seulement"""
+    return order_intake.stats()
+
+
+@router.get("/stats/active-orders")
+@query_budget(1)
+async def get_active_order_stats(current_admin: User = Depends(get_current_admin)):
+    """Index cuisine des commandes non terminées : taille, réconciliations, écarts corrigés - Admin seulement"""
+    return active_orders.stats()
+
+
+@router.get("/stats/rate-limit")
+@query_budget(1)
+async def get_rate_limit_stats(current_admin: User = Depends(get_current_admin)):
+    """Limites par client et plafonds de concurrence de ce worker - Admin seulement"""
+    return rate_limiters[-1].stats() if rate_limiters else {"mode": "off"}
+
+
+@router.get("/db/pool")
+@query_budget(1)
+async def get_pool_stats(current_admin: User = Depends(get_current_admin)):
+    """État du pool de connexions de ce worker (à multiplier par le nombre de workers) - Admin seulement"""
+    return pool_stats(engine)
+
+
+@router.get("/db/replica")
+@query_budget(2)
+async def get_replica_stats(current_admin: User = Depends(get_current_admin)):
+    """Routage des lectures vers le réplica : retard, replis sur le primaire - Admin seulement"""
+    stats = replica_router.stats()
+    if read_engine is not None:
+        stats["pool"] = pool_stats(read_engine)
+    return stats
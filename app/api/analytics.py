@@ -0,0 +1,144 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from sqlmodel import select
+from app.model.menu import MenuItem
+from app.model.order import ORDER_STATUSES
+from app.model.rollup import DailySales, HourlySales, ItemDailySales, OrderStatusCount
+from app.model.user import User
+from app.schema.analytics import DailySalesRead, HourlySalesRead, ItemSalesReport, SalesSummary, SalesTotals
+from app.db.session import read_session
+from app.core.security import get_current_admin
+from app.core.query_budget import query_budget
+
+router = APIRouter()
+
+# Les réponses lisent les tables d'agrégats : coût borné par la période, pas par l'historique
+MAX_RANGE_DAYS = 366
+
+
+def _date_range(start: Optional[date], end: Optional[date], default_days: int = 30):
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
+
+async def _status_counts(session) -> Dict[str, int]:
+    result = await session.execute(select(OrderStatusCount.status, OrderStatusCount.orders))
+    counts = {status: 0 for status in ORDER_STATUSES}
+    counts.update({status: orders for status, orders in result})
+    return counts
+
+
+@router.get("/summary", response_model=SalesSummary)
+@query_budget(3)
+async def get_summary(current_admin: User = Depends(get_current_admin)):
+    """Ventes du jour (UTC) et nombre de commandes dans chaque statut - Admin seulement"""
+    today = datetime.utcnow().date()
+    async with read_session() as session:
+        result = await session.execute(select(DailySales).where(DailySales.day == today))
+        daily = result.scalar_one_or_none()
+        status_counts = await _status_counts(session)
+
+    totals = SalesTotals(orders=0, quantity=0, revenue=0)
+    if daily is not None:
+        totals = SalesTotals(orders=daily.orders, quantity=daily.quantity, revenue=daily.revenue)
+    return SalesSummary(day=today, today=totals, status_counts=status_counts)
+
+
+@router.get("/status-counts", response_model=Dict[str, int])
+@query_budget(2)
+async def get_status_counts(current_admin: User = Depends(get_current_admin)):
+    """Nombre de commandes dans chaque statut, en direct - Admin seulement"""
+    async with read_session() as session:
+        return await _status_counts(session)
+
+
+@router.get("/daily", response_model=List[DailySalesRead])
+@query_budget(2)
+async def get_daily_sales(
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        current_admin: User = Depends(get_current_admin)
+):
+    """Commandes, articles vendus et chiffre d'affaires par jour (30 derniers jours par défaut) - Admin seulement"""
+    start, end = _date_range(start, end)
+    async with read_session() as session:
+        result = await session.execute(
+            select(DailySales).where(DailySales.day >= start, DailySales.day <= end)
+        )
+        by_day = {row.day: row for row in result.scalars()}
+
+    days = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        row = by_day.get(day)
+        days.append(DailySalesRead(
+            day=day,
+            orders=row.orders if row else 0,
+            quantity=row.quantity if row else 0,
+            revenue=row.revenue if row else 0
+        ))
+    return days
+
+
+@router.get("/hourly", response_model=List[HourlySalesRead])
+@query_budget(2)
+async def get_hourly_sales(day: Optional[date] = None, current_admin: User = Depends(get_current_admin)):
+    """Ventes heure par heure d'une journée (UTC, aujourd'hui par défaut) - Admin seulement"""
+    day = day or datetime.utcnow().date()
+    first_hour = datetime(day.year, day.month, day.day)
+    async with read_session() as session:
+        result = await session.execute(
+            select(HourlySales).where(
+                HourlySales.hour >= first_hour, HourlySales.hour < first_hour + timedelta(days=1)
+            )
+        )
+        by_hour = {row.hour: row for row in result.scalars()}
+
+    hours = []
+    for offset in range(24):
+        hour = first_hour + timedelta(hours=offset)
+        row = by_hour.get(hour)
+        hours.append(HourlySalesRead(
+            hour=hour,
+            orders=row.orders if row else 0,
+            quantity=row.quantity if row else 0,
+            revenue=row.revenue if row else 0
+        ))
+    return hours
+
+
+@router.get("/items", response_model=ItemSalesReport)
+@query_budget(2)
+async def get_item_sales(
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        current_admin: User = Depends(get_current_admin)
+):
+    """Ventes par item du menu sur une période, meilleur chiffre d'affaires d'abord - Admin seulement"""
+    start, end = _date_range(start, end)
+    revenue = func.sum(ItemDailySales.revenue).label("revenue")
+    async with read_session() as session:
+        result = await session.execute(
+            select(
+                ItemDailySales.menu_item_id,
+                MenuItem.name,
+                func.sum(ItemDailySales.orders).label("orders"),
+                func.sum(ItemDailySales.quantity).label("quantity"),
+                revenue
+            )
+            .outerjoin(MenuItem, MenuItem.id == ItemDailySales.menu_item_id)
+            .where(ItemDailySales.day >= start, ItemDailySales.day <= end)
+            .group_by(ItemDailySales.menu_item_id, MenuItem.name)
+            .having(func.sum(ItemDailySales.orders) > 0)
+            .order_by(revenue.desc())
+        )
+        items = [dict(row._mapping) for row in result]
+
+    return {"start": start, "end": end, "items": items}
@@ -2,33 +2,37 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from app.schema.user import UserCreate, Token, UserRead
 from app.model.user import User
 from app.db.session import async_session
-from app.core.security import hash_password, verify_password, create_access_token, get_current_user
+from app.core.security import verify_password_async, create_access_token, get_current_user
+from app.core.query_budget import query_budget
 from sqlmodel import select
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
+@query_budget(1)
 async def login(user_credentials: UserCreate):
     async with async_session() as session:
         query = select(User).where(User.username == user_credentials.username)
         result = await session.execute(query)
         user = result.scalar_one_or_none()
 
-        if not user or not verify_password(user_credentials.password, user.hashed_password):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect username or password",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-
-        access_token = create_access_token(
-            data={"sub": user.username, "is_owner": user.is_owner}
+    # Connexion rendue au pool avant le hachage bcrypt
+    if not user or not await verify_password_async(user_credentials.password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        return Token(access_token=access_token, token_type="bearer")
+
+    access_token = create_access_token(
+        data={"sub": user.username, "is_owner": user.is_owner}
+    )
+    return Token(access_token=access_token, token_type="bearer")
 
 
 @router.get("/me", response_model=UserRead)
+@query_budget(1)
 async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
@@ -47,7 +51,7 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
 #             )
 #
 #         # Créer le nouvel utilisateur
-#         hashed_password = hash_password(user_in.password)
+#         hashed_password = await hash_password_async(user_in.password)
 #         db_user = User(
 #             username=user_in.username,
 #             hashed_password=hashed_password,
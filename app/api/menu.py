@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import select
 from app.model.menu import MenuItem
 from app.model.user import User
-from app.schema.menu import MenuItemCreate, MenuItemRead, MenuItemUpdate
+from app.schema.menu import MenuItemCreate, MenuItemRead, MenuItemUpdate, MenuSearchResult
 from app.db.session import async_session
 from app.core.security import get_current_admin
+from app.core.query_budget import query_budget
+from app.core.menu_cache import MENU_ITEM_COLUMNS, menu_cache
+from app.core.menu_search import menu_search
+from app.core.serialization import FastJSONResponse
+from app.service.menu_bulk import import_menu, parse_menu
 
 router = APIRouter()
 
@@ -13,48 +19,70 @@ router = APIRouter()
 # === ROUTES PUBLIQUES ===
 
 @router.get("/", response_model=List[MenuItemRead])
-async def get_menu():
+@query_budget(1)
+async def get_menu(request: Request):
     """Voir le menu - accessible à tous"""
-    async with async_session() as session:
-        query = select(MenuItem).where(MenuItem.available == True)
-        result = await session.execute(query)
-        return result.scalars().all()
+    snapshot = await menu_cache.get()
+    return menu_cache.respond(request, snapshot.menu)
 
 
 @router.get("/categories")
-async def get_categories():
+@query_budget(1)
+async def get_categories(request: Request):
     """Obtenir les catégories disponibles"""
-    async with async_session() as session:
-        query = select(MenuItem.category).distinct()
-        result = await session.execute(query)
-        categories = result.scalars().all()
-        return {"categories": categories}
+    snapshot = await menu_cache.get()
+    return menu_cache.respond(request, snapshot.categories)
 
 
 @router.get("/category/{category}", response_model=List[MenuItemRead])
-async def get_menu_by_category(category: str):
+@query_budget(1)
+async def get_menu_by_category(category: str, request: Request):
     """Voir le menu par catégorie"""
-    async with async_session() as session:
-        query = select(MenuItem).where(
-            MenuItem.category == category,
-            MenuItem.available == True
-        )
-        result = await session.execute(query)
-        return result.scalars().all()
+    snapshot = await menu_cache.get()
+    payload = snapshot.by_category.get(category, snapshot.empty_category)
+    return menu_cache.respond(request, payload)
+
+
+@router.get("/search", response_model=List[MenuSearchResult])
+@query_budget(1)
+async def search_menu(
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: int = Query(5, ge=1, le=50),
+        category: Optional[str] = None,
+        include_unavailable: bool = False
+):
+    """Rechercher des items par nom approximatif (« margarita », « un coca »), meilleurs scores d'abord"""
+    await menu_search.ensure_loaded()
+    return FastJSONResponse(menu_search.search(q, limit, category, include_unavailable))
+
+
+def _item_dict(item: MenuItem) -> dict:
+    return {column.key: getattr(item, column.key) for column in MENU_ITEM_COLUMNS}
+
+
+async def _commit_unique_name(session):
+    # Les noms sont uniques (clé de l'import en masse) : un doublon est un conflit, pas une 500
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="A menu item with this name already exists")
 
 
 # === ROUTES ADMIN ===
 
 @router.get("/admin/all", response_model=List[MenuItemRead])
+@query_budget(2)
 async def get_all_menu_items(current_admin: User = Depends(get_current_admin)):
     """Voir tous les items du menu (y compris non disponibles) - Admin seulement"""
     async with async_session() as session:
-        query = select(MenuItem)
+        query = select(*MENU_ITEM_COLUMNS)
         result = await session.execute(query)
-        return result.scalars().all()
+        return FastJSONResponse([dict(row._mapping) for row in result])
 
 
 @router.post("/admin/", response_model=MenuItemRead, status_code=status.HTTP_201_CREATED)
+@query_budget(3)
 async def create_menu_item(
         item: MenuItemCreate,
         current_admin: User = Depends(get_current_admin)
@@ -63,12 +91,34 @@ async def create_menu_item(
     async with async_session() as session:
         db_item = MenuItem(**item.dict())
         session.add(db_item)
-        await session.commit()
+        await _commit_unique_name(session)
         await session.refresh(db_item)
+        menu_cache.invalidate()
+        menu_search.upsert(_item_dict(db_item))
         return db_item
 
 
+@router.put("/admin/bulk")
+# admin + menu actuel + upsert + désactivation des absents
+@query_budget(4)
+async def bulk_import_menu(
+        request: Request,
+        dry_run: bool = False,
+        disable_missing: bool = False,
+        current_admin: User = Depends(get_current_admin)
+):
+    """Importer un menu complet (JSON ou CSV selon Content-Type) - Admin seulement
+
+    Les items sont rapprochés par nom : créés s'ils sont nouveaux, modifiés sinon. Avec
+    `disable_missing`, ceux absents du fichier deviennent indisponibles (pas supprimés :
+    des commandes y font référence). `dry_run` renvoie le rapport sans rien écrire.
+    """
+    items = parse_menu(await request.body(), request.headers.get("content-type", ""))
+    return FastJSONResponse(await import_menu(items, dry_run, disable_missing))
+
+
 @router.get("/admin/{item_id}", response_model=MenuItemRead)
+@query_budget(2)
 async def get_menu_item(
         item_id: int,
         current_admin: User = Depends(get_current_admin)
@@ -85,6 +135,7 @@ async def get_menu_item(
 
 
 @router.put("/admin/{item_id}", response_model=MenuItemRead)
+@query_budget(4)
 async def update_menu_item(
         item_id: int,
         item_update: MenuItemUpdate,
@@ -105,12 +156,15 @@ async def update_menu_item(
             setattr(db_item, field, value)
 
         session.add(db_item)
-        await session.commit()
+        await _commit_unique_name(session)
         await session.refresh(db_item)
+        menu_cache.invalidate()
+        menu_search.upsert(_item_dict(db_item))
         return db_item
 
 
 @router.delete("/admin/{item_id}")
+@query_budget(3)
 async def delete_menu_item(
         item_id: int,
         current_admin: User = Depends(get_current_admin)
@@ -126,10 +180,13 @@ async def delete_menu_item(
 
         await session.delete(item)
         await session.commit()
+        menu_cache.invalidate()
+        menu_search.remove(item_id)
         return {"message": "Item deleted successfully"}
 
 
 @router.patch("/admin/{item_id}/toggle-availability")
+@query_budget(4)
 async def toggle_item_availability(
         item_id: int,
         current_admin: User = Depends(get_current_admin)
@@ -147,6 +204,8 @@ async def toggle_item_availability(
         session.add(item)
         await session.commit()
         await session.refresh(item)
+        menu_cache.invalidate()
+        menu_search.upsert(_item_dict(item))
 
         status_text = "disponible" if item.available else "indisponible"
         return {"message": f"Item maintenant {status_text}", "available": item.available}
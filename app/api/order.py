@@ -1,250 +1,287 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from sqlmodel import select
-from app.model.order import Order, OrderItem
-from app.model.menu import MenuItem
+from app.model.order import ORDER_STATUSES, ORDER_TRANSITIONS, Order
 from app.model.user import User
-from app.schema.order import OrderCreate, OrderRead, OrderItemRead
-from app.db.session import async_session
+from app.schema.order import OrderCreate, OrderRead, OrderStatusBulkUpdate
+from app.db.session import async_session, is_replica, read_session
 from app.core.security import get_current_admin
+from app.core.query_budget import query_budget
+from app.core.serialization import FastJSONResponse, dumps
+from app.core.idempotency import idempotency_store, request_fingerprint
+from app.core.phone import normalize_phone
+from app.service import order as order_service
+from app.service import order_status
+from app.service.active_orders import ACTIVE_STATUSES, active_orders
+from app.service.caller import caller_orders, forget_caller
+from app.service.order_archive import fetch_archived_order
+from app.service.order_bulk import ingest_ndjson, spool_request_body
+from app.service.order_intake import order_intake
+from app.core.events import order_created_event, order_events, sse_stream
 
 router = APIRouter()
 
 
 # === ROUTES PUBLIQUES ===
 
+async def _submit_order(session, order_data: OrderCreate) -> OrderRead:
+    order = await order_service.create_order(session, order_data)
+    await order_events.publish(session, order_created_event(order))
+    return order
+
+
 @router.post("/", response_model=OrderRead, status_code=status.HTTP_201_CREATED)
-async def create_order(order_data: OrderCreate):
-    async with async_session() as session:
-        # Vérifier que tous les items existent et sont disponibles
-        total_amount = 0
-        order_items_data = []
+# 8 requêtes sans clé (dont 4 upserts d'agrégats) ; jusqu'à 13 avec une Idempotency-Key expirée
+@query_budget(13)
+async def create_order(
+        order_data: OrderCreate,
+        idempotency_key: Optional[str] = Header(None, description="Rejoue la première réponse pour les retries")
+):
+    if idempotency_key is None:
+        if order_intake.running:
+            # ORDER_INTAKE_MODE=batch : commit groupé avec les autres commandes en attente
+            order = await order_intake.submit(order_data)
+        else:
+            async with async_session() as session:
+                order = await _submit_order(session, order_data)
+                await session.commit()
+        return FastJSONResponse(order.model_dump(), status_code=status.HTTP_201_CREATED)
 
-        for item_data in order_data.items:
-            query = select(MenuItem).where(MenuItem.id == item_data.menu_item_id)
-            result = await session.execute(query)
-            menu_item = result.scalar_one_or_none()
+    async def handler(session):
+        order = await _submit_order(session, order_data)
+        return status.HTTP_201_CREATED, dumps(order.model_dump())
 
-            if not menu_item:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Menu item {item_data.menu_item_id} not found"
-                )
+    request_hash = request_fingerprint(order_data.model_dump_json().encode())
+    return await idempotency_store.execute(idempotency_key, request_hash, handler)
 
-            if not menu_item.available:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Menu item '{menu_item.name}' is not available"
-                )
 
-            item_total = menu_item.price * item_data.quantity
-            total_amount += item_total
+@router.get("/{order_id}", response_model=OrderRead)
+@query_budget(6)
+async def get_order(order_id: int):
+    """Récupérer une commande par son ID"""
+    async with read_session() as session:
+        order = await order_service.fetch_order(session, order_id)
+        from_replica = is_replica(session)
 
-            order_items_data.append({
-                "menu_item_id": item_data.menu_item_id,
-                "quantity": item_data.quantity,
-                "unit_price": menu_item.price
-            })
+    if not order and from_replica:
+        # Commande peut-être trop récente pour le réplica : relire le primaire
+        async with async_session() as session:
+            order = await order_service.fetch_order(session, order_id)
 
-        db_order = Order(
-            customer_name=order_data.customer_name,
-            customer_phone=order_data.customer_phone,
-            customer_email=order_data.customer_email,
-            total_amount=total_amount
-        )
-        session.add(db_order)
-        await session.flush()
-
-        created_items = []
-        for item_data in order_items_data:
-            order_item = OrderItem(
-                order_id=db_order.id,
-                **item_data
-            )
-            session.add(order_item)
-            created_items.append(order_item)
+    if not order:
+        # Commande terminée et archivée : elle reste consultable
+        async with read_session() as session:
+            order = await fetch_archived_order(session, order_id)
 
-        await session.commit()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return FastJSONResponse(order)
 
-        return OrderRead(
-            id=db_order.id,
-            customer_name=db_order.customer_name,
-            customer_phone=db_order.customer_phone,
-            customer_email=db_order.customer_email,
-            total_amount=db_order.total_amount,
-            status=db_order.status,
-            created_at=db_order.created_at,
-            items=[
-                OrderItemRead(
-                    id=item.id,
-                    menu_item_id=item.menu_item_id,
-                    quantity=item.quantity,
-                    unit_price=item.unit_price
-                ) for item in created_items
-            ]
-        )
 
+# === ROUTES ADMIN ===
 
-@router.get("/{order_id}", response_model=OrderRead)
-async def get_order(order_id: int):
-    """Récupérer une commande par son ID"""
-    async with async_session() as session:
-        # Récupérer la commande
-        order_query = select(Order).where(Order.id == order_id)
-        order_result = await session.execute(order_query)
-        order = order_result.scalar_one_or_none()
-
-        if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
-
-        # Récupérer les items
-        items_query = select(OrderItem).where(OrderItem.order_id == order_id)
-        items_result = await session.execute(items_query)
-        items = items_result.scalars().all()
-
-        # Construire la réponse
-        return OrderRead(
-            id=order.id,
-            customer_name=order.customer_name,
-            customer_phone=order.customer_phone,
-            customer_email=order.customer_email,
-            total_amount=order.total_amount,
-            status=order.status,
-            created_at=order.created_at,
-            items=[
-                OrderItemRead(
-                    id=item.id,
-                    menu_item_id=item.menu_item_id,
-                    quantity=item.quantity,
-                    unit_price=item.unit_price
-                ) for item in items
-            ]
-        )
+@router.get("/admin/events")
+@query_budget(1)
+async def admin_order_events_stream(current_admin: User = Depends(get_current_admin)):
+    """Flux SSE de toutes les créations et changements de statut (écran cuisine) - Admin seulement"""
+    subscription = order_events.subscribe()
+    return StreamingResponse(sse_stream(subscription), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
-# === ROUTES ADMIN ===
+# Déclarée après /admin/events pour que « admin » ne soit pas pris pour un order_id
+@router.get("/{order_id}/events")
+@query_budget(0)
+async def order_events_stream(order_id: int):
+    """Suivre en direct (SSE) les changements de statut d'une commande"""
+    subscription = order_events.subscribe(lambda event: event.get("order_id") == order_id)
+    return StreamingResponse(sse_stream(subscription), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _page_response(orders: List[dict], next_cursor: Optional[str]) -> FastJSONResponse:
+    # Les dicts ont déjà la forme d'OrderRead : pas de revalidation par response_model
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(orders, headers=headers)
+
+
+def _stream_position(cursor: Optional[str]):
+    # Décodé avant StreamingResponse : un curseur invalide doit donner un 400, pas un flux coupé
+    return order_service.decode_cursor(cursor) if cursor else None
+
 
 @router.get("/admin/all", response_model=List[OrderRead])
-async def get_all_orders(current_admin: User = Depends(get_current_admin)):
-    """Voir toutes les commandes - Admin seulement"""
-    async with async_session() as session:
-        orders_query = select(Order).order_by(Order.created_at.desc())
-        orders_result = await session.execute(orders_query)
-        orders = orders_result.scalars().all()
-
-        if not orders:
-            return []
-
-        order_ids = [order.id for order in orders]
-        items_query = select(OrderItem).where(OrderItem.order_id.in_(order_ids))
-        items_result = await session.execute(items_query)
-        all_items = items_result.scalars().all()
-
-        items_by_order = {}
-        for item in all_items:
-            if item.order_id not in items_by_order:
-                items_by_order[item.order_id] = []
-            items_by_order[item.order_id].append(item)
-
-        orders_read = []
-        for order in orders:
-            order_items = items_by_order.get(order.id, [])
-            orders_read.append(OrderRead(
-                id=order.id,
-                customer_name=order.customer_name,
-                customer_phone=order.customer_phone,
-                customer_email=order.customer_email,
-                total_amount=order.total_amount,
-                status=order.status,
-                created_at=order.created_at,
-                items=[
-                    OrderItemRead(
-                        id=item.id,
-                        menu_item_id=item.menu_item_id,
-                        quantity=item.quantity,
-                        unit_price=item.unit_price
-                    ) for item in order_items
-                ]
-            ))
-
-        return orders_read
+@query_budget(3)
+async def get_all_orders(
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        stream: bool = False,
+        current_admin: User = Depends(get_current_admin)
+):
+    """Voir toutes les commandes, paginées (en-tête X-Next-Cursor) - Admin seulement
+
+    Avec `stream=true`, renvoie toutes les commandes en NDJSON sans pagination.
+    """
+    if stream:
+        return StreamingResponse(
+            order_service.stream_orders(position=_stream_position(cursor)), media_type="application/x-ndjson"
+        )
+
+    async with read_session() as session:
+        orders, next_cursor = await order_service.fetch_order_page(session, limit, cursor)
+    return _page_response(orders, next_cursor)
 
 
 @router.get("/admin/status/{status}", response_model=List[OrderRead])
+@query_budget(3)
 async def get_orders_by_status(
         status: str,
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        stream: bool = False,
         current_admin: User = Depends(get_current_admin)
 ):
-    """Filtrer les commandes par statut - Admin seulement"""
-    async with async_session() as session:
-        # Récupérer les commandes par statut
-        orders_query = select(Order).where(Order.status == status).order_by(Order.created_at.desc())
-        orders_result = await session.execute(orders_query)
-        orders = orders_result.scalars().all()
-
-        if not orders:
-            return []
-
-        order_ids = [order.id for order in orders]
-        items_query = select(OrderItem).where(OrderItem.order_id.in_(order_ids))
-        items_result = await session.execute(items_query)
-        all_items = items_result.scalars().all()
-
-        items_by_order = {}
-        for item in all_items:
-            if item.order_id not in items_by_order:
-                items_by_order[item.order_id] = []
-            items_by_order[item.order_id].append(item)
-
-        orders_read = []
-        for order in orders:
-            order_items = items_by_order.get(order.id, [])
-            orders_read.append(OrderRead(
-                id=order.id,
-                customer_name=order.customer_name,
-                customer_phone=order.customer_phone,
-                customer_email=order.customer_email,
-                total_amount=order.total_amount,
-                status=order.status,
-                created_at=order.created_at,
-                items=[
-                    OrderItemRead(
-                        id=item.id,
-                        menu_item_id=item.menu_item_id,
-                        quantity=item.quantity,
-                        unit_price=item.unit_price
-                    ) for item in order_items
-                ]
-            ))
-
-        return orders_read
+    """Filtrer les commandes par statut, paginées (en-tête X-Next-Cursor) - Admin seulement"""
+    if stream:
+        return StreamingResponse(
+            order_service.stream_orders(position=_stream_position(cursor), status=status),
+            media_type="application/x-ndjson"
+        )
 
+    async with read_session() as session:
+        orders, next_cursor = await order_service.fetch_order_page(session, limit, cursor, status)
+    return _page_response(orders, next_cursor)
 
-@router.patch("/admin/{order_id}/status")
-async def update_order_status(
-        order_id: int,
-        new_status: str,
+
+@router.get("/admin/kitchen")
+# Aucune requête une fois l'index chargé au démarrage (2 sinon, au premier appel)
+@query_budget(3)
+async def get_kitchen_queue(
+        status: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=1000),
+        current_admin: User = Depends(get_current_admin)
+):
+    """File cuisine : commandes non terminées par ordre d'arrivée, avec heure de fin estimée - Admin seulement
+
+    Servie par l'index en mémoire du worker (app.service.active_orders), sans SQL.
+    """
+    if status is not None and status not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Active statuses: {list(ACTIVE_STATUSES)}")
+    await active_orders.ensure_started()
+    return FastJSONResponse({"counts": active_orders.counts(), "orders": active_orders.queue(status, limit)})
+
+
+@router.get("/admin/kitchen/counts")
+@query_budget(3)
+async def get_kitchen_counts(current_admin: User = Depends(get_current_admin)):
+    """Nombre de commandes par statut actif, depuis l'index en mémoire - Admin seulement"""
+    await active_orders.ensure_started()
+    return active_orders.counts()
+
+
+@router.get("/by-phone/{phone}", response_model=List[OrderRead])
+# 1 requête (tables vives + archive, items compris) ; 0 si l'appelant est en cache
+@query_budget(2)
+async def get_orders_by_phone(
+        phone: str,
+        limit: int = Query(5, ge=1, le=20),
         current_admin: User = Depends(get_current_admin)
 ):
-    """Modifier le statut d'une commande - Admin seulement"""
-    valid_statuses = ["pending", "confirmed", "preparing", "ready", "delivered", "cancelled"]
+    """Dernières commandes d'un numéro, pour proposer « comme la dernière fois ? » - Admin seulement
 
-    if new_status not in valid_statuses:
+    Le numéro est normalisé (E.164) : « 06 12 34 56 78 » et « +33612345678 » sont équivalents.
+    """
+    phone_e164 = normalize_phone(phone)
+    if phone_e164 is None:
+        raise HTTPException(status_code=400, detail="Invalid phone number")
+    return FastJSONResponse(await caller_orders(phone_e164, limit))
+
+
+@router.post("/bulk")
+@query_budget(1)
+async def bulk_create_orders(
+        request: Request,
+        batch_size: int = Query(1000, ge=1, le=10000),
+        current_admin: User = Depends(get_current_admin)
+):
+    """Importer des commandes en masse (NDJSON, une OrderCreate par ligne) - Admin seulement
+
+    Les résultats sont renvoyés en NDJSON, une ligne par commande, au fil des lots écrits.
+    """
+    spool = await spool_request_body(request)
+    return StreamingResponse(ingest_ndjson(spool, batch_size), media_type="application/x-ndjson")
+
+
+def _check_status(new_status: str):
+    if new_status not in ORDER_STATUSES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid status. Valid statuses: {valid_statuses}"
+            detail=f"Invalid status. Valid statuses: {ORDER_STATUSES}"
         )
 
+
+@router.patch("/admin/status")
+# UPDATE conditionnel + compteurs + NOTIFY pour tout le lot ; jusqu'à 8 pour une annulation
+@query_budget(9)
+async def bulk_update_order_status(
+        status_update: OrderStatusBulkUpdate,
+        current_admin: User = Depends(get_current_admin)
+):
+    """Changer le statut de plusieurs commandes en une instruction (tournée de livraison) - Admin seulement
+
+    Les commandes dont le statut actuel n'autorise pas la transition sont ignorées et
+    listées dans `skipped` avec leur statut actuel.
+    """
+    _check_status(status_update.status)
+    order_ids = list(dict.fromkeys(status_update.order_ids))
+
     async with async_session() as session:
-        query = select(Order).where(Order.id == order_id)
-        result = await session.execute(query)
-        order = result.scalar_one_or_none()
+        changes = await order_status.transition_orders(session, order_ids, status_update.status)
+        skipped = []
+        if len(changes) < len(order_ids):
+            changed_ids = {change.id for change in changes}
+            missing = [order_id for order_id in order_ids if order_id not in changed_ids]
+            result = await session.execute(select(Order.id, Order.status).where(Order.id.in_(missing)))
+            current = dict(result.all())
+            skipped = [{"id": order_id, "status": current.get(order_id)} for order_id in missing]
+        await session.commit()
+
+    for change in changes:
+        forget_caller(change.customer_phone_e164)
+    return FastJSONResponse({
+        "status": status_update.status,
+        "updated": [change.id for change in changes],
+        "skipped": skipped,
+    })
 
-        if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
 
-        order.status = new_status
-        session.add(order)
+@router.patch("/admin/{order_id}/status")
+# Un UPDATE conditionnel, les compteurs de statut et le NOTIFY ; jusqu'à 9 pour une annulation
+# (lignes relues pour retirer la commande des ventes) ou une transition refusée
+@query_budget(9)
+async def update_order_status(
+        order_id: int,
+        new_status: str,
+        current_admin: User = Depends(get_current_admin)
+):
+    """Modifier le statut d'une commande, selon ORDER_TRANSITIONS - Admin seulement"""
+    _check_status(new_status)
+
+    async with async_session() as session:
+        changes = await order_status.transition_orders(session, [order_id], new_status)
+        if not changes:
+            current_status = await session.scalar(select(Order.status).where(Order.id == order_id))
+            if current_status is None:
+                raise HTTPException(status_code=404, detail="Order not found")
+            if current_status != new_status:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Cannot change order status from {current_status} to {new_status}. "
+                           f"Allowed: {list(ORDER_TRANSITIONS[current_status])}"
+                )
         await session.commit()
 
-        return {"message": f"Order status updated to {new_status}", "status": new_status}
+    for change in changes:
+        forget_caller(change.customer_phone_e164)
+    return {"message": f"Order status updated to {new_status}", "status": new_status}
@@ -0,0 +1,87 @@
+"""Commandes d'exploitation.
+
+    python -m app.cli rebuild-rollups
+    python -m app.cli archive-orders --older-than-days 90
+    python -m app.cli detach-archive-partitions --before 2024-01
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from app.db.session import async_session, engine
+
+
+async def rebuild_rollups(args):
+    from app.service.rollup import rebuild_rollups
+
+    async with async_session() as session:
+        stats = await rebuild_rollups(session, batch_size=args.batch_size)
+        await session.commit()
+    return stats
+
+
+async def archive_orders(args):
+    from app.service.order_archive import archive_orders
+
+    return await archive_orders(timedelta(days=args.older_than_days), batch_size=args.batch_size)
+
+
+async def detach_archive_partitions(args):
+    from app.service.order_archive import detach_partitions
+
+    async with async_session() as session:
+        detached = await detach_partitions(session, args.before)
+        await session.commit()
+    return {"detached": detached}
+
+
+def _month(value: str):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+COMMANDS = {
+    "rebuild-rollups": rebuild_rollups,
+    "archive-orders": archive_orders,
+    "detach-archive-partitions": detach_archive_partitions,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Commandes d'exploitation Pizzapi")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-rollups", help="recalcule les agrégats de ventes et les compteurs de statut depuis les commandes"
+    )
+    rebuild.add_argument("--batch-size", type=int, default=1000, help="lignes lues par aller-retour")
+
+    archive = subparsers.add_parser(
+        "archive-orders", help="déplace les commandes livrées ou annulées anciennes vers les tables d'archive"
+    )
+    archive.add_argument("--older-than-days", type=int, default=90, help="âge minimal des commandes archivées")
+    archive.add_argument("--batch-size", type=int, default=5000, help="commandes déplacées par transaction")
+
+    detach = subparsers.add_parser(
+        "detach-archive-partitions", help="détache (PostgreSQL) les partitions d'archive antérieures à un mois"
+    )
+    detach.add_argument("--before", type=_month, required=True, help="premier mois conservé, au format YYYY-MM")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    async def _main():
+        try:
+            return await COMMANDS[args.command](args)
+        finally:
+            await engine.dispose()
+
+    result = asyncio.run(_main())
+    if result is not None:
+        print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+ORDER_EVENTS_CHANNEL = os.environ.get("ORDER_EVENTS_CHANNEL", "order_events")
+EVENTS_SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("EVENTS_SUBSCRIBER_QUEUE_SIZE", 100))
+# Postgres refuse les charges NOTIFY de plus de 8000 octets
+NOTIFY_MAX_PAYLOAD = 7900
+
+
+class Subscription:
+    """File d'événements d'un abonné. Si l'abonné ne suit pas, les plus anciens sont
+    jetés et un événement `stream.lagged` l'invite à se resynchroniser."""
+
+    def __init__(self, maxsize: int, predicate: Optional[Callable[[dict], bool]] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.predicate = predicate
+        self.dropped = 0
+        self._dropped_unreported = 0
+
+    def offer(self, data: dict):
+        if self.predicate is not None and not self.predicate(data):
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self._dropped_unreported += 1
+        self.queue.put_nowait(data)
+
+    async def get(self) -> dict:
+        if self._dropped_unreported:
+            dropped, self._dropped_unreported = self._dropped_unreported, 0
+            return {"type": "stream.lagged", "dropped": dropped}
+        return await self.queue.get()
+
+
+class EventBroker:
+    """Diffusion des événements de commande à tous les abonnés du process.
+
+    Sous Postgres, les événements passent par NOTIFY dans la transaction de l'écriture
+    et reviennent à chaque worker via LISTEN ; ailleurs ils sont diffusés localement
+    après le commit. Dans les deux cas, rien n'est émis pour une transaction annulée.
+    """
+
+    def __init__(self, channel: str = ORDER_EVENTS_CHANNEL, queue_size: int = EVENTS_SUBSCRIBER_QUEUE_SIZE):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.use_notify = engine.dialect.name == "postgresql"
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: List[Callable[[dict], None]] = []
+        self._listener_task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, predicate: Optional[Callable[[dict], bool]] = None) -> Subscription:
+        subscription = Subscription(self.queue_size, predicate)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """Rappel synchrone pour chaque événement, sans file ni perte : pour les index en
+        mémoire du worker, qui doivent rester rapides et ne jamais attendre"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def dispatch(self, data: dict):
+        self.delivered += 1
+        for listener in self._listeners:
+            try:
+                listener(data)
+            except Exception:
+                logger.exception("Order event listener failed on %s", data.get("type"))
+        for subscription in list(self._subscribers):
+            subscription.offer(data)
+
+    @staticmethod
+    def _notify_payload(data: dict) -> str:
+        payload = json.dumps(data, default=str)
+        if len(payload.encode()) > NOTIFY_MAX_PAYLOAD:
+            # Trop gros pour NOTIFY : les abonnés relisent la commande si besoin
+            payload = json.dumps({key: data[key] for key in ("type", "order_id", "status") if key in data})
+        return payload
+
+    async def publish(self, session, data: dict):
+        """Programme un événement, émis seulement si la transaction de `session` est validée"""
+        self.published += 1
+        if self.use_notify:
+            await session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": self.channel, "payload": self._notify_payload(data)}
+            )
+        else:
+            session.sync_session.info.setdefault("pending_events", []).append(data)
+
+    async def publish_many(self, session, events: List[dict]):
+        """Comme `publish`, pour un lot d'événements : un seul aller-retour sous Postgres"""
+        if not events:
+            return
+        if not self.use_notify:
+            for data in events:
+                await self.publish(session, data)
+            return
+
+        self.published += len(events)
+        await session.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": self.channel, "payloads": [self._notify_payload(data) for data in events]}
+        )
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            self.dispatch(json.loads(payload))
+        except ValueError:
+            logger.warning("Ignoring malformed %s payload: %r", channel, payload)
+
+    async def _listen(self):
+        import asyncpg
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        reconnecting = False
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(self.channel, self._on_notify)
+                logger.info("Listening for %s notifications", self.channel)
+                if reconnecting:
+                    # Des NOTIFY ont pu être perdus pendant la coupure : aux abonnés de se resynchroniser
+                    self.dispatch({"type": "stream.reconnected"})
+                reconnecting = True
+                while not connection.is_closed():
+                    await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("LISTEN connection lost, reconnecting", exc_info=True)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(1)
+
+    async def start(self):
+        if self.use_notify and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    def stats(self) -> dict:
+        return {
+            "transport": "postgres_notify" if self.use_notify else "in_process",
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(subscription.dropped for subscription in self._subscribers),
+        }
+
+
+order_events = EventBroker()
+
+
+@registry.register_collector
+def _event_metrics():
+    stats = order_events.stats()
+    yield "order_events_subscribers", "gauge", "Open order event streams", {}, stats["subscribers"]
+    yield "order_events_delivered_total", "counter", "Order events fanned out", {}, stats["delivered"]
+    yield "order_events_dropped_total", "counter", "Events dropped for slow subscribers", {}, stats["dropped"]
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending_events(session):
+    for data in session.info.pop("pending_events", []):
+        order_events.dispatch(data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session):
+    session.info.pop("pending_events", None)
+
+
+def order_created_event(order) -> dict:
+    return {
+        "type": "order.created",
+        "order_id": order.id,
+        "status": order.status,
+        "order": order.model_dump(mode="json"),
+    }
+
+
+def order_status_changed_event(order_id: int, status: str, previous_status: Optional[str]) -> dict:
+    return {
+        "type": "order.status_changed",
+        "order_id": order_id,
+        "status": status,
+        "previous_status": previous_status,
+    }
+
+
+async def sse_stream(subscription: Subscription, keepalive: float = 15.0):
+    """Flux Server-Sent Events d'un abonnement, avec commentaire keep-alive périodique"""
+    try:
+        while True:
+            try:
+                data = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {data['type']}\ndata: {json.dumps(data, default=str)}\n\n"
+    finally:
+        order_events.unsubscribe(subscription)
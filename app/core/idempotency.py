@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from app.core.cache import TTLCache
+from app.core.metrics import registry
+from app.db.session import async_session
+from app.model.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Durée pendant laquelle une clé rejoue sa première réponse (table)
+IDEMPOTENCY_KEY_TTL = float(os.environ.get("IDEMPOTENCY_KEY_TTL", 24 * 3600))
+# Cache mémoire devant la table : les retries arrivent en général dans les secondes qui suivent
+IDEMPOTENCY_CACHE_TTL = float(os.environ.get("IDEMPOTENCY_CACHE_TTL", 300))
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", 4096))
+# Attente maximale d'un doublon concurrent sur la première requête
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.environ.get("IDEMPOTENCY_WAIT_TIMEOUT", 10))
+# Intervalle entre deux purges des clés expirées, en plus de celle du démarrage
+IDEMPOTENCY_PURGE_INTERVAL = float(os.environ.get("IDEMPOTENCY_PURGE_INTERVAL", 3600))
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    body: bytes
+
+    def to_response(self, replayed: bool = False) -> Response:
+        headers = {"Idempotent-Replayed": "true"} if replayed else None
+        return Response(self.body, status_code=self.status_code, media_type="application/json", headers=headers)
+
+
+def request_fingerprint(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="A request with this Idempotency-Key is still in progress",
+        headers={"Retry-After": "1"}
+    )
+
+
+class IdempotencyStore:
+    """Exécute au plus une fois une requête par Idempotency-Key et rejoue sa réponse.
+
+    - doublon déjà traité : réponse relue dans le cache mémoire, sinon dans la table ;
+    - doublon concurrent dans ce worker : attend le résultat de la première requête ;
+    - doublon concurrent dans un autre worker : la clé est insérée en tête de la transaction
+      de la requête, l'INSERT du doublon attend donc le commit (ou l'annulation) de la première.
+
+    Une clé réutilisée avec un autre contenu est refusée (422). Une requête en échec
+    (4xx, exception) n'est pas mémorisée : la transaction annulée emporte la clé.
+    """
+
+    def __init__(
+            self,
+            ttl: float = IDEMPOTENCY_KEY_TTL,
+            cache_ttl: float = IDEMPOTENCY_CACHE_TTL,
+            cache_size: int = IDEMPOTENCY_CACHE_SIZE,
+            wait_timeout: float = IDEMPOTENCY_WAIT_TIMEOUT,
+            purge_interval: float = IDEMPOTENCY_PURGE_INTERVAL
+    ):
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.purge_interval = purge_interval
+        self.cache = TTLCache(maxsize=cache_size, ttl=min(cache_ttl, ttl))
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self._purge_task: Optional[asyncio.Task] = None
+
+    def _replay(self, stored: StoredResponse, request_hash: str) -> Response:
+        if stored.request_hash != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request payload"
+            )
+        self.replayed += 1
+        return stored.to_response(replayed=True)
+
+    async def execute(
+            self,
+            key: str,
+            request_hash: str,
+            handler: Callable[..., Awaitable[Tuple[int, bytes]]]
+    ) -> Response:
+        """`handler(session)` fait le travail sans valider la transaction et renvoie (statut, corps JSON)"""
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+
+        stored = self.cache.get(key)
+        if stored is not None:
+            return self._replay(stored, request_hash)
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.waited += 1
+            try:
+                stored = await asyncio.wait_for(asyncio.shield(pending), self.wait_timeout)
+            except asyncio.TimeoutError:
+                raise _in_progress()
+            return self._replay(stored, request_hash)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            stored, replayed = await self._execute_once(key, request_hash, handler)
+        except BaseException as exc:
+            # Les doublons en attente reçoivent la même erreur HTTP, ou une invitation à réessayer
+            future.set_exception(exc if isinstance(exc, HTTPException) else _in_progress())
+            future.exception()
+            raise
+        else:
+            future.set_result(stored)
+        finally:
+            del self._in_flight[key]
+
+        self.cache.set(key, stored)
+        if replayed:
+            return self._replay(stored, request_hash)
+        return stored.to_response()
+
+    async def _execute_once(self, key, request_hash, handler) -> Tuple[StoredResponse, bool]:
+        async with async_session() as session:
+            try:
+                await session.execute(
+                    insert(IdempotencyKey).values(key=key, request_hash=request_hash, created_at=datetime.utcnow())
+                )
+            except IntegrityError:
+                await session.rollback()
+                result = await session.execute(select(IdempotencyKey).where(IdempotencyKey.key == key))
+                existing = result.scalar_one_or_none()
+                if existing is not None and existing.created_at >= self._cutoff():
+                    if existing.response_status is None:
+                        raise _in_progress()
+                    stored = StoredResponse(
+                        existing.request_hash, existing.response_status, existing.response_body.encode("utf-8")
+                    )
+                    return stored, True
+
+                # Clé expirée (ou supprimée entre-temps) : on la reprend pour cette requête
+                await session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+                await session.execute(
+                    insert(IdempotencyKey).values(key=key, request_hash=request_hash, created_at=datetime.utcnow())
+                )
+
+            status_code, body = await handler(session)
+            await session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(response_status=status_code, response_body=body.decode("utf-8"))
+            )
+            await session.commit()
+
+        self.executed += 1
+        return StoredResponse(request_hash, status_code, body), False
+
+    def _cutoff(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.ttl)
+
+    async def purge_expired(self) -> int:
+        async with async_session() as session:
+            result = await session.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < self._cutoff()))
+            await session.commit()
+        if result.rowcount:
+            logger.info("Purged %d expired idempotency keys", result.rowcount)
+        return result.rowcount
+
+    async def _purge_periodically(self):
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                await self.purge_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Idempotency key purge failed", exc_info=True)
+
+    async def start(self):
+        """Purge les clés expirées maintenant, puis toutes les `purge_interval` secondes"""
+        if self._purge_task is None:
+            await self.purge_expired()
+            self._purge_task = asyncio.create_task(self._purge_periodically())
+
+    async def stop(self):
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            try:
+                await self._purge_task
+            except asyncio.CancelledError:
+                pass
+            self._purge_task = None
+
+    def stats(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "in_flight": len(self._in_flight),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited,
+        }
+
+
+idempotency_store = IdempotencyStore()
+
+
+@registry.register_collector
+def _idempotency_metrics():
+    yield "idempotency_replayed_total", "counter", "Responses replayed for a duplicate Idempotency-Key", {}, idempotency_store.replayed
+    yield "idempotency_waited_total", "counter", "Duplicates that waited on an in-flight request", {}, idempotency_store.waited
+    yield "idempotency_in_flight", "gauge", "Idempotent requests being executed", {}, len(idempotency_store._in_flight)
@@ -0,0 +1,168 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlmodel import select
+
+from app.db.session import async_session, read_session
+from app.core.serialization import dumps
+from app.model.menu import MenuItem
+from app.schema.menu import MenuItemRead
+
+# Colonnes lues telles quelles, dans l'ordre des champs de MenuItemRead
+MENU_ITEM_COLUMNS = tuple(getattr(MenuItem, name) for name in MenuItemRead.model_fields)
+
+# Filet de sécurité : chaque worker reconstruit son snapshot au plus tard après ce délai,
+# même s'il n'a pas vu passer l'écriture admin (autre process uvicorn).
+MENU_CACHE_TTL = float(os.environ.get("MENU_CACHE_TTL", 60))
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+    @property
+    def gzip_etag(self) -> str:
+        # Représentation distincte, validateur distinct : un cache partagé ne doit pas
+        # confondre le corps gzip et le corps brut
+        return self.etag[:-1] + '-gz"'
+
+
+@dataclass
+class MenuSnapshot:
+    version: int
+    built_at: float
+    menu: CachedPayload
+    categories: CachedPayload
+    by_category: Dict[str, CachedPayload] = field(default_factory=dict)
+    empty_category: Optional[CachedPayload] = None
+
+
+def _encode(data) -> CachedPayload:
+    body = dumps(data)
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    return CachedPayload(body=body, gzipped=gzip.compress(body, compresslevel=6), etag=etag)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """gzip (ou `*`) présent dans Accept-Encoding avec une qualité non nulle"""
+    qualities = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+class MenuCache:
+    """Snapshot versionné des réponses publiques du menu (JSON + gzip déjà calculés).
+
+    Les routes admin appellent `invalidate()` après chaque écriture : la version est
+    incrémentée et le prochain lecteur reconstruit le snapshot en une seule requête.
+    """
+
+    def __init__(self, ttl: float = MENU_CACHE_TTL):
+        self.ttl = ttl
+        self.version = 0
+        self._snapshot: Optional[MenuSnapshot] = None
+        self._lock = asyncio.Lock()
+        # Après une écriture locale, relire le primaire : le réplica peut être en retard
+        self._read_from_primary = False
+
+    def invalidate(self) -> int:
+        self.version += 1
+        self._snapshot = None
+        self._read_from_primary = True
+        return self.version
+
+    def _is_fresh(self, snapshot: Optional[MenuSnapshot]) -> bool:
+        if snapshot is None or snapshot.version != self.version:
+            return False
+        return self.ttl <= 0 or time.monotonic() - snapshot.built_at < self.ttl
+
+    async def get(self) -> MenuSnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot
+
+            version = self.version
+            snapshot = await self._build(version)
+            # Une écriture admin pendant la construction rend ce snapshot obsolète
+            if version == self.version:
+                self._snapshot = snapshot
+                self._read_from_primary = False
+            return snapshot
+
+    async def _build(self, version: int) -> MenuSnapshot:
+        session_factory = async_session if self._read_from_primary else read_session
+        async with session_factory() as session:
+            result = await session.execute(select(*MENU_ITEM_COLUMNS).order_by(MenuItem.id))
+            items = result.all()
+
+        categories: List[str] = []
+        available: Dict[str, list] = {}
+        menu = []
+        for item in items:
+            if item.category not in categories:
+                categories.append(item.category)
+            if not item.available:
+                continue
+            data = dict(item._mapping)
+            menu.append(data)
+            available.setdefault(item.category, []).append(data)
+
+        return MenuSnapshot(
+            version=version,
+            built_at=time.monotonic(),
+            menu=_encode(menu),
+            categories=_encode({"categories": categories}),
+            by_category={category: _encode(data) for category, data in available.items()},
+            empty_category=_encode([]),
+        )
+
+    @staticmethod
+    def respond(request: Request, payload: CachedPayload) -> Response:
+        use_gzip = _accepts_gzip(request.headers.get("accept-encoding"))
+        etag = payload.gzip_etag if use_gzip else payload.etag
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return Response(payload.gzipped, media_type="application/json", headers=headers)
+        return Response(payload.body, media_type="application/json", headers=headers)
+
+
+menu_cache = MenuCache()
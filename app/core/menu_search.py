@@ -0,0 +1,234 @@
+import asyncio
+import heapq
+import os
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlmodel import select
+
+from app.db.session import read_session
+from app.core.menu_cache import MENU_CACHE_TTL, MENU_ITEM_COLUMNS
+
+# Poids des champs : un mot du nom compte plus qu'un mot de la description
+FIELD_WEIGHTS = (("name", 1.0), ("category", 0.6), ("description", 0.3))
+# Similarité (Dice sur trigrammes) minimale entre un mot de la requête et un mot indexé
+MENU_SEARCH_MIN_SIMILARITY = float(os.environ.get("MENU_SEARCH_MIN_SIMILARITY", 0.4))
+MENU_SEARCH_MIN_SCORE = float(os.environ.get("MENU_SEARCH_MIN_SCORE", 0.3))
+
+# Mots vides des phrases dictées à l'agent vocal (« je voudrais un coca s'il vous plaît »)
+STOPWORDS = frozenset("""
+a au aux avec c ce d de des du en et j je l la le les m me mes moi n ne par pour
+qu que s se sil svp t te un une vous voudrais veux prendre prends plait merci avoir
+aussi encore bien alors euh ou
+""".split())
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents ni ponctuation : « Pizza Quatre-Fromages » -> « pizza quatre fromages »"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    ascii_text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", ascii_text.replace("œ", "oe").replace("æ", "ae")).strip()
+
+
+def tokens(text: str) -> List[str]:
+    return [token for token in fold(text).split() if token not in STOPWORDS]
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MenuSearchIndex:
+    """Index trigrammes en mémoire sur le nom, la catégorie et la description des items.
+
+    Chaque mot indexé est découpé en trigrammes ; un mot de la requête est comparé aux mots
+    qui partagent au moins un trigramme avec lui (coefficient de Dice), ce qui tolère les
+    fautes de transcription (« margarita », « quatre fromage »). Le score d'un item est la
+    moyenne, sur les mots de la requête, de la meilleure similarité pondérée par le champ.
+
+    Les routes admin mettent l'index à jour item par item (`upsert` / `remove`) ; il est
+    rechargé entièrement au plus tard après MENU_CACHE_TTL, pour voir les écritures
+    faites par les autres workers.
+    """
+
+    def __init__(self, ttl: float = MENU_CACHE_TTL):
+        self.ttl = ttl
+        self.items: Dict[int, dict] = {}
+        # mot -> {item_id: poids du meilleur champ où il apparaît}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        # trigramme -> mots indexés qui le contiennent
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._item_tokens: Dict[int, Dict[str, float]] = {}
+        self._folded_names: Dict[int, str] = {}
+        self._folded_categories: Dict[int, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.searches = 0
+        self.rebuilds = 0
+        self.updates = 0
+
+    def _is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self.ttl <= 0 or time.monotonic() - self._loaded_at < self.ttl
+
+    async def ensure_loaded(self):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            async with read_session() as session:
+                result = await session.execute(select(*MENU_ITEM_COLUMNS))
+                self.rebuild(dict(row._mapping) for row in result)
+
+    def rebuild(self, items: Iterable[dict]):
+        self.items.clear()
+        self._postings.clear()
+        self._trigrams.clear()
+        self._item_tokens.clear()
+        self._folded_names.clear()
+        self._folded_categories.clear()
+        for item in items:
+            self._add(item)
+        self._loaded_at = time.monotonic()
+        self.rebuilds += 1
+
+    def upsert(self, item: dict):
+        """Indexe (ou réindexe) un item après une écriture admin"""
+        self._remove(item["id"])
+        self._add(item)
+        self.updates += 1
+
+    def remove(self, item_id: int):
+        self._remove(item_id)
+        self.updates += 1
+
+    def _add(self, item: dict):
+        item_id = item["id"]
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokens(item.get(field) or ""):
+                weights[token] = max(weights.get(token, 0.0), weight)
+
+        self.items[item_id] = item
+        self._item_tokens[item_id] = weights
+        self._folded_names[item_id] = fold(item["name"])
+        self._folded_categories[item_id] = fold(item["category"])
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                for trigram in trigrams(token):
+                    self._trigrams[trigram].add(token)
+            postings[item_id] = weight
+
+    def _remove(self, item_id: int):
+        if self.items.pop(item_id, None) is None:
+            return
+        self._folded_names.pop(item_id, None)
+        self._folded_categories.pop(item_id, None)
+        for token in self._item_tokens.pop(item_id):
+            postings = self._postings[token]
+            postings.pop(item_id, None)
+            if postings:
+                continue
+            del self._postings[token]
+            for trigram in trigrams(token):
+                vocabulary = self._trigrams[trigram]
+                vocabulary.discard(token)
+                if not vocabulary:
+                    del self._trigrams[trigram]
+
+    def _similar_tokens(self, token: str) -> List[Tuple[str, float]]:
+        shared: Dict[str, int] = defaultdict(int)
+        for trigram in trigrams(token):
+            for candidate in self._trigrams.get(trigram, ()):
+                shared[candidate] += 1
+
+        matches = []
+        for candidate, count in shared.items():
+            # Un mot de n lettres a n + 1 trigrammes (avec le bourrage)
+            similarity = 2 * count / (len(token) + len(candidate) + 2)
+            if similarity >= MENU_SEARCH_MIN_SIMILARITY:
+                matches.append((candidate, similarity))
+        return matches
+
+    def search(
+            self,
+            query: str,
+            limit: int = 5,
+            category: Optional[str] = None,
+            include_unavailable: bool = False
+    ) -> List[dict]:
+        self.searches += 1
+        query_tokens = list(dict.fromkeys(tokens(query)))
+        if not query_tokens:
+            return []
+
+        # Mots les plus sélectifs d'abord ; un mot présent dans plus de la moitié du menu
+        # (« pizza ») ne fait que départager les items déjà trouvés par les autres mots
+        matches = sorted(
+            ((token, self._similar_tokens(token)) for token in query_tokens),
+            key=lambda match: sum(len(self._postings[candidate]) for candidate, _ in match[1])
+        )
+        common = len(self.items) / 2
+        totals: Dict[int, float] = defaultdict(float)
+        for token, similar in matches:
+            position_best: Dict[int, float] = {}
+            if totals and sum(len(self._postings[candidate]) for candidate, _ in similar) > common:
+                for candidate, similarity in similar:
+                    postings = self._postings[candidate]
+                    for item_id in totals:
+                        weight = postings.get(item_id)
+                        if weight is not None and similarity * weight > position_best.get(item_id, 0.0):
+                            position_best[item_id] = similarity * weight
+            else:
+                for candidate, similarity in similar:
+                    for item_id, weight in self._postings[candidate].items():
+                        if similarity * weight > position_best.get(item_id, 0.0):
+                            position_best[item_id] = similarity * weight
+            for item_id, score in position_best.items():
+                totals[item_id] += score
+
+        folded_query = " ".join(query_tokens)
+        folded_category = fold(category) if category else None
+        ranked = []
+        for item_id, total in totals.items():
+            if not include_unavailable and not self.items[item_id]["available"]:
+                continue
+            if folded_category and self._folded_categories[item_id] != folded_category:
+                continue
+            name = self._folded_names[item_id]
+            score = total / len(query_tokens)
+            # Requête contenue telle quelle dans le nom : la meilleure réponse possible
+            if folded_query in name:
+                score += 0.5
+            if score >= MENU_SEARCH_MIN_SCORE:
+                # À score égal, le nom le plus court (« un coca » : Coca-Cola avant Coca-Cola Zéro)
+                ranked.append((-score, len(name), item_id))
+
+        return [
+            {**self.items[item_id], "score": round(-negative_score, 4)}
+            for negative_score, _, item_id in heapq.nsmallest(limit, ranked)
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self.items),
+            "tokens": len(self._postings),
+            "trigrams": len(self._trigrams),
+            "searches": self.searches,
+            "rebuilds": self.rebuilds,
+            "updates": self.updates,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._loaded_at is not None else None,
+        }
+
+
+menu_search = MenuSearchIndex()
@@ -0,0 +1,213 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Registre minimal au format d'exposition Prometheus (text/plain; version=0.0.4).
+# Les métriques sont propres à chaque process uvicorn.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labelvalues, amount: float = 1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues, value: float):
+        self._values[labelvalues] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # clé de labels -> [compteurs par bucket (+Inf en dernier), somme]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """`collector()` renvoie des tuples (nom, type, aide, labels, valeur) lus au moment du scrape"""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        seen = set()
+        for collector in self._collectors:
+            for name, kind, documentation, labels, value in collector():
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {kind}")
+                names = tuple(labels)
+                lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route")))
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "Requests by route template and status", ("method", "route", "status")))
+IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served"))
+RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size by route template", ("method", "route"), SIZE_BUCKETS))
+DB_QUERY_LATENCY = registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("engine",)))
+DB_QUERIES_PER_REQUEST = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed per request", ("method", "route"), COUNT_BUCKETS))
+DB_TIME_PER_REQUEST = registry.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL per request", ("method", "route")))
+
+
+class RequestDbStats:
+    __slots__ = ("queries", "seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = {}
+
+
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def instrument_engine(async_engine, label: str):
+    """Mesure chaque instruction SQL du moteur et l'impute à la requête HTTP en cours"""
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERY_LATENCY.observe(elapsed, label)
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+            stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI pur : latence, statut, taille de réponse et SQL par modèle de route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        response = {"status": 500, "size": 0}
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+        IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT.dec()
+            request_db_stats.reset(token)
+            method, route = scope["method"], route_template(scope)
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method, route)
+            REQUESTS.inc(method, route, response["status"])
+            RESPONSE_SIZE.observe(response["size"], method, route)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, method, route)
+            DB_TIME_PER_REQUEST.observe(stats.seconds, method, route)
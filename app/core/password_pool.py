@@ -0,0 +1,78 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+
+class PasswordHashPool:
+    """Exécute le hachage bcrypt hors de la boucle asyncio, avec une concurrence bornée.
+
+    bcrypt relâche le GIL pendant le calcul : un pool de threads suffit. Au-delà de
+    `max_pending` demandes (en cours + en attente), les nouvelles sont refusées en 503
+    plutôt que de s'empiler.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._semaphore = asyncio.Semaphore(workers)
+        self.pending = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.run_seconds_total = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self.pending - self.in_flight
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests, retry later",
+                headers={"Retry-After": "1"},
+            )
+
+        self.pending += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        queued_at = time.perf_counter()
+        try:
+            async with self._semaphore:
+                started_at = time.perf_counter()
+                self.wait_seconds_total += started_at - queued_at
+                self.in_flight += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(self._executor, partial(func, *args))
+                finally:
+                    self.in_flight -= 1
+                    self.completed += 1
+                    self.run_seconds_total += time.perf_counter() - started_at
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "run_seconds_total": round(self.run_seconds_total, 6),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,29 @@
+import os
+import re
+from typing import Optional
+
+# Indicatif appliqué aux numéros saisis au format national (« 06 12 34 56 78 »)
+PHONE_DEFAULT_COUNTRY_CODE = os.environ.get("PHONE_DEFAULT_COUNTRY_CODE", "33").lstrip("+")
+
+_SEPARATORS = re.compile(r"[\s.\-/()]+")
+_E164 = re.compile(r"^\+[1-9][0-9]{7,14}$")
+
+
+def normalize_phone(phone: Optional[str], country_code: str = PHONE_DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """Numéro au format E.164 (« +33612345678 »), ou None s'il n'est pas exploitable.
+
+    Accepte les séparateurs usuels, le préfixe international 00 et le format national
+    avec 0 initial, complété par l'indicatif par défaut. Pas de validation par pays :
+    le but est qu'un même numéro, saisi de deux façons, donne la même clé.
+    """
+    if not phone:
+        return None
+    digits = _SEPARATORS.sub("", phone)
+    if digits.startswith("00"):
+        digits = "+" + digits[2:]
+    elif digits.startswith("0"):
+        digits = f"+{country_code}{digits[1:]}"
+    elif not digits.startswith("+"):
+        # Numéro national sans son 0 (« 6 12 34 56 78 ») ou international sans le +
+        digits = f"+{country_code}{digits}" if len(digits) <= 9 else "+" + digits
+    return digits if _E164.match(digits) else None
@@ -0,0 +1,122 @@
+import logging
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from app.core.metrics import RequestDbStats, request_db_stats, route_template
+
+logger = logging.getLogger(__name__)
+
+# off : aucun contrôle ; log : avertissement (staging) ; raise : exception (tests)
+QUERY_BUDGET_MODE = os.environ.get("QUERY_BUDGET_MODE", "off").lower()
+# Nombre d'exécutions d'une même instruction SQL à partir duquel on soupçonne un N+1
+QUERY_REPEAT_THRESHOLD = int(os.environ.get("QUERY_REPEAT_THRESHOLD", 3))
+
+# Réponses de taille non bornée (NDJSON, SSE) : le nombre de requêtes dépend du volume
+UNBOUNDED_MEDIA_TYPES = (b"application/x-ndjson", b"text/event-stream")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecord(NamedTuple):
+    route: str
+    queries: int
+    budget: Optional[int]
+    repeated: Dict[str, int]
+
+    @property
+    def violations(self) -> List[str]:
+        problems = []
+        if self.budget is not None and self.queries > self.budget:
+            problems.append(f"{self.route}: {self.queries} SQL statements, budget is {self.budget}")
+        for statement, count in self.repeated.items():
+            problems.append(f"{self.route}: statement executed {count} times (N+1?): {statement[:200]}")
+        return problems
+
+
+def query_budget(max_queries: Optional[int]):
+    """Déclare le nombre maximal d'instructions SQL d'une route (cache froid compris)"""
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+
+_observers: List[Callable[[QueryRecord], None]] = []
+
+
+@contextmanager
+def record_queries():
+    """Collecte un QueryRecord par requête HTTP servie dans le bloc (tests, benchmarks)"""
+    records: List[QueryRecord] = []
+    _observers.append(records.append)
+    try:
+        yield records
+    finally:
+        _observers.remove(records.append)
+
+
+class QueryBudgetMiddleware:
+    """Compare les instructions SQL de chaque requête au budget déclaré sur sa route
+    et repère les instructions identiques répétées au sein d'une même requête."""
+
+    def __init__(self, app, mode: str = QUERY_BUDGET_MODE, repeat_threshold: int = QUERY_REPEAT_THRESHOLD):
+        self.app = app
+        self.mode = mode
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.mode == "off" and not _observers):
+            await self.app(scope, receive, send)
+            return
+
+        stats = request_db_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestDbStats()
+            token = request_db_stats.set(stats)
+
+        unbounded = False
+
+        async def send_wrapper(message):
+            nonlocal unbounded
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                unbounded = any(
+                    name == b"content-type" and value.startswith(UNBOUNDED_MEDIA_TYPES)
+                    for name, value in headers
+                )
+                message["headers"] = list(headers) + [(b"x-query-count", str(stats.queries).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                request_db_stats.reset(token)
+
+        if unbounded:
+            return
+
+        route = scope.get("route")
+        record = QueryRecord(
+            route=f"{scope['method']} {route_template(scope)}",
+            queries=stats.queries,
+            budget=getattr(getattr(route, "endpoint", None), "__query_budget__", None),
+            repeated={
+                statement: count for statement, count in stats.statements.items()
+                if count >= self.repeat_threshold
+            },
+        )
+        for observer in _observers:
+            observer(record)
+
+        violations = record.violations
+        if not violations or self.mode == "off":
+            return
+        if self.mode == "raise":
+            raise QueryBudgetExceeded("; ".join(violations))
+        for violation in violations:
+            logger.warning("Query budget: %s", violation)
@@ -0,0 +1,317 @@
+import asyncio
+import hashlib
+import importlib
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Protocol, Tuple
+
+from jose import JWTError, jwt
+
+from app.core.metrics import Counter, Histogram, registry
+from app.core.security import ALGORITHM, SECRET_KEY
+from app.core.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# off : aucun contrôle ; log : on journalise ce qui aurait été refusé ; enforce : 429 / 503
+RATE_LIMIT_MODE = os.environ.get("RATE_LIMIT_MODE", "enforce").lower()
+# Chemin "module:attribut" d'un backend partagé entre workers (ex. Redis) ; mémoire du worker sinon
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "")
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", 10000))
+# Derrière un reverse proxy (Traefik/Dockploy), l'IP cliente est le premier élément de X-Forwarded-For
+RATE_LIMIT_TRUST_PROXY = os.environ.get("RATE_LIMIT_TRUST_PROXY", "false").lower() in ("1", "true", "yes", "on")
+# Clés d'API des intégrations connues (n8n, agent vocal) : une limite par clé plutôt que par IP
+RATE_LIMIT_API_KEYS = frozenset(key for key in os.environ.get("RATE_LIMIT_API_KEYS", "").split(",") if key)
+
+DECISIONS = registry.register(Counter(
+    "rate_limit_decisions_total", "Admission decisions by route group", ("group", "outcome")))
+QUEUE_WAIT = registry.register(Histogram(
+    "rate_limit_queue_wait_seconds", "Time spent waiting for a concurrency slot", ("group",)))
+
+
+def _setting(group: str, name: str, default: float) -> float:
+    return float(os.environ.get(f"RATE_LIMIT_{group.upper()}_{name}", default))
+
+
+class RouteGroup(NamedTuple):
+    """Limites d'un groupe de routes : seau à jetons par client et plafond global de concurrence"""
+    name: str
+    routes: Tuple[Tuple[str, str], ...]
+    rate: float
+    burst: float
+    concurrency: int
+    queue_timeout: float
+    max_waiting: int
+
+    @classmethod
+    def from_env(cls, name: str, routes, rate: float, burst: float, concurrency: int,
+                 queue_timeout: float, max_waiting: int) -> "RouteGroup":
+        return cls(
+            name=name,
+            routes=tuple(routes),
+            rate=_setting(name, "RATE", rate),
+            burst=_setting(name, "BURST", burst),
+            concurrency=int(_setting(name, "CONCURRENCY", concurrency)),
+            queue_timeout=_setting(name, "QUEUE_TIMEOUT", queue_timeout),
+            max_waiting=int(_setting(name, "MAX_WAITING", max_waiting)),
+        )
+
+
+# En mode direct, une prise de commande occupe une connexion : au-delà de la capacité du
+# pool, les requêtes admises ne feraient qu'attendre une connexion (DB_POOL_TIMEOUT)
+POOL_CAPACITY = int(os.environ.get("DB_POOL_SIZE", 5)) + int(os.environ.get("DB_MAX_OVERFLOW", 10))
+# Avec ORDER_INTAKE_MODE=batch, les commandes attendent le writer de commit groupé sans
+# connexion : plafonner au pool limiterait chaque micro-lot à POOL_CAPACITY commandes et
+# renverrait des 503 pour le reste. La file d'intake (ORDER_INTAKE_MAX_QUEUE, 503 quand
+# elle est pleine) borne déjà l'attente ; le pool reste réservé aux requêtes avec
+# Idempotency-Key et aux imports, qui gardent une connexion
+if os.environ.get("ORDER_INTAKE_MODE", "direct").lower() == "batch":
+    ORDERS_CONCURRENCY = int(os.environ.get("ORDER_INTAKE_MAX_QUEUE", 10000)) + POOL_CAPACITY
+else:
+    ORDERS_CONCURRENCY = POOL_CAPACITY
+
+ROUTE_GROUPS = [
+    # Une commande par seconde en régime établi, rafale de 20 (client qui rejoue une file)
+    RouteGroup.from_env(
+        "orders", [("POST", "/api/orders"), ("POST", "/api/orders/"), ("POST", "/api/orders/bulk")],
+        rate=1, burst=20, concurrency=ORDERS_CONCURRENCY, queue_timeout=0.5, max_waiting=4 * POOL_CAPACITY
+    ),
+    # bcrypt : 10 essais d'affilée puis un toutes les 5 secondes
+    RouteGroup.from_env(
+        "login", [("POST", "/api/auth/login")],
+        rate=0.2, burst=10, concurrency=8, queue_timeout=0.5, max_waiting=32
+    ),
+]
+
+
+class RateLimitBackend(Protocol):
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        """Consomme `cost` jetons ; renvoie 0 si accepté, sinon le délai (s) avant d'avoir assez de jetons"""
+
+    def stats(self) -> dict:
+        ...
+
+
+class MemoryBackend:
+    """Seaux à jetons dans la mémoire du worker, LRU borné à `max_keys` clients.
+
+    Chaque worker uvicorn a ses propres seaux : la limite effective est multipliée par
+    WEB_CONCURRENCY tant qu'aucun backend partagé n'est configuré.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.evictions = 0
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        return (cost - bucket[0]) / rate if rate > 0 else float("inf")
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self._buckets), "max_keys": self.max_keys, "evictions": self.evictions}
+
+
+def load_backend(path: str = RATE_LIMIT_BACKEND) -> RateLimitBackend:
+    if not path:
+        return MemoryBackend()
+    module_name, _, attribute = path.partition(":")
+    backend = getattr(importlib.import_module(module_name), attribute)
+    return backend() if isinstance(backend, type) else backend
+
+
+class ConcurrencyLimiter:
+    """Plafond de requêtes simultanées d'un groupe, avec une attente bornée dans le temps.
+
+    Une requête attend au plus `queue_timeout` secondes qu'une place se libère, et pas du
+    tout si `max_waiting` requêtes attendent déjà : mieux vaut un 503 immédiat qu'une
+    requête qui finira en timeout sur le pool de connexions.
+    """
+
+    def __init__(self, limit: int, queue_timeout: float, max_waiting: int):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.max_waiting = max_waiting
+        self._semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def acquire(self) -> Optional[float]:
+        """Renvoie le temps d'attente si une place a été obtenue, None sinon"""
+        if self.in_flight < self.limit and not self.waiting:
+            await self._semaphore.acquire()
+            self.in_flight += 1
+            return 0.0
+        if self.waiting >= self.max_waiting or self.queue_timeout <= 0:
+            return None
+
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return time.perf_counter() - started
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "in_flight": self.in_flight, "waiting": self.waiting}
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_key(scope, trust_proxy: bool = RATE_LIMIT_TRUST_PROXY, api_keys=RATE_LIMIT_API_KEYS) -> str:
+    """Identité du client : sujet d'un JWT valide, clé d'API connue, sinon adresse IP"""
+    authorization = _header(scope, b"authorization")
+    if authorization and authorization[:7].lower() == "bearer ":
+        try:
+            subject = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        except JWTError:
+            subject = None
+        if subject:
+            return f"user:{subject}"
+
+    api_key = _header(scope, b"x-api-key")
+    if api_key and api_key in api_keys:
+        return "api:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+    if trust_proxy:
+        forwarded = _header(scope, b"x-forwarded-for")
+        if forwarded:
+            return "ip:" + forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """Contrôle d'admission des routes coûteuses (prise de commande, connexion).
+
+    1. Seau à jetons par client (`client_key`) : au-delà, 429 avec le délai avant le
+       prochain jeton dans Retry-After.
+    2. Plafond global de concurrence par groupe : attente bornée puis 503 + Retry-After.
+    Les autres routes ne passent que par une comparaison de chemin.
+    """
+
+    def __init__(self, app, mode: str = RATE_LIMIT_MODE, groups: List[RouteGroup] = None,
+                 backend: Optional[RateLimitBackend] = None):
+        self.app = app
+        self.mode = mode
+        self.groups = ROUTE_GROUPS if groups is None else groups
+        self.backend = backend or load_backend()
+        self._routes: Dict[Tuple[str, str], RouteGroup] = {
+            route: group for group in self.groups for route in group.routes
+        }
+        self.limiters = {
+            group.name: ConcurrencyLimiter(group.concurrency, group.queue_timeout, group.max_waiting)
+            for group in self.groups
+        }
+        rate_limiters.append(self)
+
+    async def __call__(self, scope, receive, send):
+        group = None
+        if scope["type"] == "http" and self.mode != "off":
+            group = self._routes.get((scope["method"], scope["path"]))
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope)
+        retry_after = await self.backend.take(f"{group.name}:{key}", group.rate, group.burst)
+        if retry_after:
+            DECISIONS.inc(group.name, "throttled")
+            if self.mode == "enforce":
+                await _reject(send, 429, "Too many requests, slow down", retry_after)
+                return
+            logger.warning("Rate limit exceeded on %s by %s", group.name, key)
+
+        limiter = self.limiters[group.name]
+        waited = await limiter.acquire()
+        if waited is None:
+            DECISIONS.inc(group.name, "shed")
+            if self.mode == "enforce":
+                await _reject(send, 503, "Server busy, retry shortly", group.queue_timeout or 1)
+                return
+            logger.warning("Concurrency cap reached on %s", group.name)
+            await self.app(scope, receive, send)
+            return
+
+        QUEUE_WAIT.observe(waited, group.name)
+        DECISIONS.inc(group.name, "queued" if waited else "admitted")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "backend": self.backend.stats(),
+            "groups": {
+                group.name: {
+                    "rate_per_second": group.rate,
+                    "burst": group.burst,
+                    "queue_timeout": group.queue_timeout,
+                    "max_waiting": group.max_waiting,
+                    **self.limiters[group.name].stats(),
+                }
+                for group in self.groups
+            },
+        }
+
+
+# Instances construites par Starlette au démarrage de l'app (une par worker)
+rate_limiters: List[RateLimitMiddleware] = []
+
+
+@registry.register_collector
+def _rate_limit_metrics():
+    for limiter in rate_limiters:
+        for name, stats in limiter.stats()["groups"].items():
+            labels = {"group": name}
+            yield "rate_limit_in_flight", "gauge", "Requests holding a concurrency slot", labels, stats["in_flight"]
+            yield "rate_limit_waiting", "gauge", "Requests waiting for a concurrency slot", labels, stats["waiting"]
+        backend = limiter.backend.stats()
+        if "keys" in backend:
+            yield "rate_limit_tracked_clients", "gauge", "Client buckets held in memory", {}, backend["keys"]
@@ -3,6 +3,9 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from app.db.session import async_session
 from app.model.user import User
+from app.core.cache import TTLCache
+from app.core.password_pool import PasswordHashPool
+from app.core.metrics import registry
 from sqlmodel import select
 import os
 from passlib.context import CryptContext
@@ -11,10 +14,30 @@ from datetime import datetime, timedelta
 SECRET_KEY = os.environ["SECRET_KEY"]
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 60))
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", 1024))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 32))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Utilisateurs authentifiés récemment, indexés par username (claim "sub")
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# bcrypt coûte ~250 ms de CPU : jamais directement dans une route async
+password_pool = PasswordHashPool(workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING)
+
+
+@registry.register_collector
+def _auth_metrics():
+    yield "user_cache_hits_total", "counter", "Authenticated user cache hits", {}, user_cache.hits
+    yield "user_cache_misses_total", "counter", "Authenticated user cache misses", {}, user_cache.misses
+    yield "user_cache_size", "gauge", "Cached users", {}, len(user_cache)
+    yield "password_hash_in_flight", "gauge", "bcrypt operations running", {}, password_pool.in_flight
+    yield "password_hash_queue_depth", "gauge", "bcrypt operations waiting", {}, password_pool.queue_depth
+    yield "password_hash_rejected_total", "counter", "Logins rejected by the hash pool", {}, password_pool.rejected
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -23,6 +46,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -30,6 +61,11 @@ def create_access_token(data: dict):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def invalidate_user(username: str):
+    """À appeler après toute modification d'un utilisateur (mot de passe, rôle, suppression)"""
+    user_cache.invalidate(username)
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,13 +81,21 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except JWTError:
         raise credentials_exception
 
+    # Cache chaud et claim is_owner cohérent : pas de requête en base
+    user = user_cache.get(username)
+    if user is not None and user.is_owner == payload.get("is_owner", user.is_owner):
+        return user
+
     async with async_session() as session:
         query = select(User).where(User.username == username)
         result = await session.execute(query)
         user = result.scalar_one_or_none()
 
     if user is None:
+        user_cache.invalidate(username)
         raise credentials_exception
+
+    user_cache.set(username, user)
     return user
 
 
@@ -0,0 +1,88 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Délai maximal du ping base de GET /health/ready
+READINESS_DB_TIMEOUT = float(os.environ.get("READINESS_DB_TIMEOUT", 1))
+
+
+def process_age() -> Optional[float]:
+    """Secondes écoulées depuis le lancement du process (Linux), imports Python compris"""
+    try:
+        with open("/proc/self/stat") as stat, open("/proc/uptime") as uptime:
+            # Le nom de commande (2e champ) peut contenir des espaces : on repart de la dernière ')'
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+            return float(uptime.read().split()[0]) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupState:
+    """Chronologie du démarrage d'un worker et état de disponibilité pour /health/ready.
+
+    Le worker n'est prêt qu'une fois toutes les étapes de `startup_event` terminées
+    (schéma vérifié, pool préchauffé, tâches de fond lancées) ; il cesse de l'être dès
+    le début de l'arrêt, pour que le répartiteur de charge le retire avant la fermeture.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.stopping = False
+        self.phases: Dict[str, float] = {}
+        self.startup_seconds: Optional[float] = None
+        self.cold_start_seconds: Optional[float] = None
+        self._started: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        if self._started is None:
+            self._started = time.perf_counter()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.perf_counter() - start, 6)
+
+    def mark_ready(self):
+        self.ready = True
+        self.startup_seconds = round(time.perf_counter() - (self._started or time.perf_counter()), 6)
+        age = process_age()
+        self.cold_start_seconds = round(age, 3) if age is not None else None
+        logger.info(
+            "Worker %d ready: startup %.3fs, cold start %ss (%s)",
+            os.getpid(), self.startup_seconds, self.cold_start_seconds,
+            ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases.items())
+        )
+
+    def mark_stopping(self):
+        self.ready = False
+        self.stopping = True
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "stopping": self.stopping,
+            "pid": os.getpid(),
+            "startup_seconds": self.startup_seconds,
+            "cold_start_seconds": self.cold_start_seconds,
+            "phases": self.phases,
+        }
+
+
+startup_state = StartupState()
+
+
+@registry.register_collector
+def _startup_metrics():
+    yield "app_ready", "gauge", "1 once the worker finished its startup sequence", {}, int(startup_state.ready)
+    if startup_state.cold_start_seconds is not None:
+        yield ("app_cold_start_seconds", "gauge", "Process launch to ready, imports included",
+               {}, startup_state.cold_start_seconds)
+    for name, seconds in startup_state.phases.items():
+        yield "app_startup_phase_seconds", "gauge", "Duration of each startup step", {"phase": name}, seconds
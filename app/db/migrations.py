@@ -0,0 +1,88 @@
+import logging
+import os
+import re
+from typing import Set
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import SQLModel
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic")
+
+# strict : refuse de démarrer si la base n'est pas à la dernière migration ;
+# warn : démarre quand même en le signalant ; create : ancien comportement (create_all),
+# pour le développement local sans Alembic ; off : aucune vérification
+SCHEMA_CHECK = os.environ.get("SCHEMA_CHECK", "strict").lower()
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+REVISION_RE = re.compile(r"^revision(?:\s*:[^=]+)?\s*=\s*['\"]([0-9a-z_]+)['\"]", re.MULTILINE)
+DOWN_REVISION_RE = re.compile(r"^down_revision(?:\s*:[^=]+)?\s*=\s*(.+)$", re.MULTILINE)
+
+
+def expected_revisions(alembic_dir: str = ALEMBIC_DIR) -> Set[str]:
+    """Têtes de l'historique Alembic livré avec le code.
+
+    Les identifiants sont lus dans le texte des fichiers de migration : charger
+    ScriptDirectory importerait chaque migration (et leurs dépendances), soit plus de
+    temps que le create_all qu'on remplace.
+    """
+    revisions: Set[str] = set()
+    parents: Set[str] = set()
+    versions_dir = os.path.join(alembic_dir, "versions")
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, name), encoding="utf-8") as migration:
+            source = migration.read()
+        revision = REVISION_RE.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = DOWN_REVISION_RE.search(source)
+        if down_revision is not None:
+            parents.update(re.findall(r"['\"]([0-9a-z_]+)['\"]", down_revision.group(1)))
+    return revisions - parents
+
+
+async def current_revisions(engine) -> Set[str]:
+    """Révisions appliquées à la base ; vide si Alembic n'y est jamais passé"""
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            return set(result.scalars())
+    except DBAPIError:
+        return set()
+
+
+async def check_schema(engine, mode: str = SCHEMA_CHECK) -> dict:
+    """Vérifie en une requête que la base est migrée, à la place d'un create_all à chaque démarrage.
+
+    Les migrations sont jouées une seule fois avant le lancement des workers
+    (scripts/entrypoint.sh) ; un worker démarré sur une base en retard échoue ici
+    plutôt qu'à la première requête.
+    """
+    if mode == "off":
+        return {"mode": mode}
+    if mode == "create":
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        return {"mode": mode}
+
+    expected = expected_revisions()
+    current = await current_revisions(engine)
+    status = {"mode": mode, "expected": sorted(expected), "current": sorted(current), "up_to_date": current == expected}
+    if not status["up_to_date"]:
+        message = (
+            f"Database schema is at {sorted(current) or 'no revision'}, code expects {sorted(expected)}: "
+            "run `alembic upgrade head`"
+        )
+        if mode == "strict":
+            raise SchemaVersionError(message)
+        logger.warning(message)
+    return status
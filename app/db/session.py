@@ -1,13 +1,280 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Optional
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import exc, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.metrics import instrument_engine, registry
+import asyncio
+import json
+import logging
 import os
+import time
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# Réplica optionnel pour les lectures publiques et les listes admin
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL")
+DATABASE_READ_MAX_LAG = float(os.environ.get("DATABASE_READ_MAX_LAG", 5))
+DATABASE_READ_LAG_CHECK_INTERVAL = float(os.environ.get("DATABASE_READ_LAG_CHECK_INTERVAL", 1))
+
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def _setting(name: str, default, prefix: str = "DB_"):
+    """Lit PREFIX_NAME, puis DB_NAME, puis la valeur par défaut"""
+    value = os.environ.get(prefix + name, os.environ.get("DB_" + name))
+    if value is None or value == "":
+        return default
+    if isinstance(default, bool):
+        return value.lower() in ("1", "true", "yes", "on")
+    if isinstance(default, (int, float)):
+        return type(default)(value)
+    return value
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """QueuePool qui mesure le temps passé à attendre une connexion"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def create_engine_from_env(url: str, prefix: str = "DB_") -> AsyncEngine:
+    """Construit un moteur async à partir des variables d'environnement DB_*
+
+    DB_ECHO (false/true/debug), DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE (asyncpg, 0 derrière
+    pgbouncer), DB_APPLICATION_NAME et DB_SERVER_SETTINGS (objet JSON de paramètres
+    Postgres, ex. {"statement_timeout": "5000"}).
+    """
+    echo = _setting("ECHO", "false", prefix).lower()
+    kwargs = {
+        "echo": "debug" if echo == "debug" else echo in ("1", "true", "yes", "on"),
+        "future": True,
+    }
+
+    backend = make_url(url).get_backend_name()
+    in_memory = backend == "sqlite" and make_url(url).database in (None, "", ":memory:")
+    if not in_memory:
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=_setting("POOL_SIZE", 5, prefix),
+            max_overflow=_setting("MAX_OVERFLOW", 10, prefix),
+            pool_timeout=_setting("POOL_TIMEOUT", 30.0, prefix),
+            pool_recycle=_setting("POOL_RECYCLE", 1800, prefix),
+            pool_pre_ping=_setting("POOL_PRE_PING", True, prefix),
+        )
+
+    if backend == "postgresql":
+        server_settings = json.loads(_setting("SERVER_SETTINGS", "{}", prefix))
+        server_settings.setdefault("application_name", _setting("APPLICATION_NAME", "pizzapi", prefix))
+        kwargs["connect_args"] = {
+            "statement_cache_size": _setting("STATEMENT_CACHE_SIZE", 100, prefix),
+            "server_settings": server_settings,
+        }
+
+    return create_async_engine(url, **kwargs)
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.sync_engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            max_connections=pool.size() + pool._max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_seconds_total=round(pool.wait_seconds_total, 6),
+            wait_seconds_avg=round(pool.wait_seconds_total / pool.checkouts, 6) if pool.checkouts else 0.0,
+            wait_seconds_max=round(pool.wait_seconds_max, 6),
+        )
+    return stats
+
+
+class ReplicaRouter:
+    """Décide si une lecture peut partir sur le réplica, selon son retard de réplication.
+
+    Le retard est mesuré au plus une fois par DATABASE_READ_LAG_CHECK_INTERVAL ; un
+    réplica injoignable ou trop en retard renvoie les lectures vers le primaire.
+    """
+
+    def __init__(self, read_engine, max_lag: float, check_interval: float):
+        self.read_engine = read_engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag = 0.0
+        self.healthy = read_engine is not None
+        self.checked_at = 0.0
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+        self._lock = asyncio.Lock()
+
+    async def _refresh(self):
+        try:
+            async with self.read_engine.connect() as conn:
+                if self.read_engine.dialect.name == "postgresql":
+                    self.lag = float(await conn.scalar(text(REPLICA_LAG_SQL)))
+                else:
+                    self.lag = 0.0
+            self.healthy = True
+        except Exception:
+            logger.warning("Read replica unavailable, routing reads to primary", exc_info=True)
+            self.healthy = False
+        self.checked_at = time.monotonic()
+
+    async def use_replica(self) -> bool:
+        if self.read_engine is None:
+            return False
+
+        if time.monotonic() - self.checked_at >= self.check_interval:
+            async with self._lock:
+                if time.monotonic() - self.checked_at >= self.check_interval:
+                    await self._refresh()
+
+        if self.healthy and self.lag <= self.max_lag:
+            self.replica_reads += 1
+            return True
+        self.primary_fallbacks += 1
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "configured": self.read_engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "replica_reads": self.replica_reads,
+            "primary_fallbacks": self.primary_fallbacks,
+        }
+
+
+engine = create_engine_from_env(DATABASE_URL)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+read_engine = create_engine_from_env(DATABASE_READ_URL, prefix="DB_READ_") if DATABASE_READ_URL else None
+replica_session = (
+    sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False) if read_engine else None
+)
+replica_router = ReplicaRouter(read_engine, DATABASE_READ_MAX_LAG, DATABASE_READ_LAG_CHECK_INTERVAL)
+
+instrument_engine(engine, "primary")
+if read_engine is not None:
+    instrument_engine(read_engine, "replica")
+
+
+@registry.register_collector
+def _pool_metrics():
+    engines = [("primary", engine)] + ([("replica", read_engine)] if read_engine is not None else [])
+    for label, pool_engine in engines:
+        stats = pool_stats(pool_engine)
+        if "checkouts" not in stats:
+            continue
+        labels = {"engine": label}
+        yield "db_pool_size", "gauge", "Configured pool size", labels, stats["size"]
+        yield "db_pool_checked_out", "gauge", "Connections currently checked out", labels, stats["checked_out"]
+        yield "db_pool_overflow", "gauge", "Connections opened beyond pool_size", labels, stats["overflow"]
+        yield "db_pool_checkouts_total", "counter", "Connection checkouts", labels, stats["checkouts"]
+        yield "db_pool_timeouts_total", "counter", "Checkouts that hit pool_timeout", labels, stats["timeouts"]
+        yield ("db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection",
+               labels, pool_engine.sync_engine.pool.wait_seconds_total)
+    yield "db_replica_lag_seconds", "gauge", "Last measured replica lag", {}, replica_router.lag
+    yield "db_replica_fallbacks_total", "counter", "Reads sent to primary instead of replica", {}, replica_router.primary_fallbacks
+
+
+@asynccontextmanager
+async def read_session():
+    """Session pour les lectures seules : réplica si disponible et à jour, sinon primaire.
+
+    Les écritures et les lectures qui doivent voir une écriture récente utilisent async_session.
+    """
+    factory = replica_session if await replica_router.use_replica() else async_session
+    async with factory() as session:
+        yield session
+
+
+def is_replica(session) -> bool:
+    return read_engine is not None and session.bind is read_engine
+
+
+def dialect_insert(session):
+    """`insert` du dialecte de `session`, pour INSERT ... ON CONFLICT"""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Upserts are not implemented for {dialect}")
+
+
+async def warm_pool(engine: AsyncEngine, connections: Optional[int] = None) -> int:
+    """Ouvre d'avance jusqu'à `connections` connexions (par défaut DB_POOL_WARM, sinon pool_size).
+
+    Les premières requêtes d'un worker ne paient plus la connexion TCP/TLS et
+    l'authentification. Renvoie le nombre de connexions ouvertes.
+    """
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return 0
+    prefix = "DB_READ_" if engine is read_engine else "DB_"
+    wanted = _setting("POOL_WARM", pool.size(), prefix) if connections is None else connections
+    wanted = min(wanted, pool.size())
+    if wanted <= 0:
+        return 0
+
+    async with AsyncExitStack() as stack:
+        conns = await asyncio.gather(*(stack.enter_async_context(engine.connect()) for _ in range(wanted)))
+        for conn in conns:
+            await conn.execute(text("SELECT 1"))
+    return wanted
+
+
+async def ping(engine: AsyncEngine, timeout: float) -> bool:
+    async def _select_one():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(_select_one(), timeout)
+        return True
+    except Exception:
+        logger.warning("Database ping failed", exc_info=True)
+        return False
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
@@ -1,17 +1,77 @@
-from fastapi import FastAPI
-from app.api import auth, menu, order
-from app.db.session import init_db
+from fastapi import FastAPI, Response
+from app.api import admin, analytics, auth, menu, order
+from app.db.migrations import check_schema
+from app.db.session import engine, ping, read_engine, warm_pool
+from app.core.events import order_events
+from app.core.idempotency import idempotency_store
+from app.service.active_orders import active_orders
+from app.service.order_intake import ORDER_INTAKE_MODE, order_intake
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.serialization import FastJSONResponse
+from app.core.startup import READINESS_DB_TIMEOUT, startup_state
 
 app = FastAPI(title="Pizza Restaurant API", version="1.0.0")
+# Le dernier ajouté est le plus externe : MetricsMiddleware ouvre les compteurs SQL de la requête
+# et compte aussi les requêtes refusées par RateLimitMiddleware
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 async def startup_event():
-    await init_db()
+    # Les migrations sont jouées avant le lancement des workers (scripts/entrypoint.sh)
+    with startup_state.phase("schema_check"):
+        await check_schema(engine)
+    with startup_state.phase("pool_warm"):
+        await warm_pool(engine)
+        if read_engine is not None:
+            await warm_pool(read_engine)
+    with startup_state.phase("idempotency_purge"):
+        await idempotency_store.start()
+    with startup_state.phase("events"):
+        await order_events.start()
+    with startup_state.phase("active_orders"):
+        await active_orders.start()
+    if ORDER_INTAKE_MODE == "batch":
+        with startup_state.phase("order_intake"):
+            await order_intake.start()
+    startup_state.mark_ready()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    startup_state.mark_stopping()
+    await order_intake.stop()
+    await active_orders.stop()
+    await order_events.stop()
+    await idempotency_store.stop()
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(menu.router, prefix="/api/menu", tags=["Menu"])
 app.include_router(order.router, prefix="/api/orders", tags=["Orders"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(analytics.router, prefix="/api/admin/analytics", tags=["Analytics"])
 
 @app.get("/api")
 def index():
     return {"hello": "world"}
+
+
+@app.get("/health/live", include_in_schema=False)
+def health_live():
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+async def health_ready():
+    """200 quand le worker a fini de démarrer et joint la base, 503 sinon"""
+    stats = startup_state.stats()
+    stats["database"] = startup_state.ready and await ping(engine, READINESS_DB_TIMEOUT)
+    return FastJSONResponse(stats, status_code=200 if stats["database"] else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,5 +1,9 @@
 from .user import User
 from .menu import MenuItem
 from .order import Order, OrderItem
+from .order_archive import OrderArchive, OrderItemArchive
+from .idempotency import IdempotencyKey
+from .rollup import DailySales, HourlySales, ItemDailySales, OrderStatusCount
 
-__all__ = ["User", "MenuItem", "Order", "OrderItem"]
\ No newline at end of file
+__all__ = ["User", "MenuItem", "Order", "OrderItem", "OrderArchive", "OrderItemArchive", "IdempotencyKey",
+           "DailySales", "HourlySales", "ItemDailySales", "OrderStatusCount"]
\ No newline at end of file
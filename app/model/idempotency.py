@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Text
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class IdempotencyKey(SQLModel, table=True):
+    # Première réponse d'une requête POST rejouée pour chaque Idempotency-Key identique
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(max_length=64)
+    response_status: Optional[int] = None
+    response_body: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
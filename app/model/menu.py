@@ -3,7 +3,8 @@ from typing import Optional
 
 class MenuItem(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str = Field(index=True)
+    # Unique : clé de l'import en masse (ON CONFLICT (name))
+    name: str = Field(index=True, unique=True)
     description: str
     price: float
     category: str = "pizza"
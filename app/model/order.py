@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime
@@ -5,11 +6,28 @@ from datetime import datetime
 if TYPE_CHECKING:
     from .menu import MenuItem
 
+ORDER_STATUSES = ["pending", "confirmed", "preparing", "ready", "delivered", "cancelled"]
+
+# Transitions autorisées depuis chaque statut ; delivered et cancelled sont terminaux
+ORDER_TRANSITIONS = {
+    "pending": ("confirmed", "preparing", "cancelled"),
+    "confirmed": ("preparing", "cancelled"),
+    "preparing": ("ready", "cancelled"),
+    "ready": ("delivered", "cancelled"),
+    "delivered": (),
+    "cancelled": (),
+}
+
+
+def allowed_sources(new_status: str) -> tuple:
+    """Statuts depuis lesquels une commande peut passer à `new_status`"""
+    return tuple(status for status, targets in ORDER_TRANSITIONS.items() if new_status in targets)
+
 
 class OrderItem(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    order_id: int = Field(foreign_key="order.id")
-    menu_item_id: int = Field(foreign_key="menuitem.id")
+    order_id: int = Field(foreign_key="order.id", index=True)
+    menu_item_id: int = Field(foreign_key="menuitem.id", index=True)
     quantity: int
     unit_price: float
     # order: Optional["Order"] = Relationship(back_populates="items")
@@ -17,9 +35,19 @@ class OrderItem(SQLModel, table=True):
 
 
 class Order(SQLModel, table=True):
+    # Listes admin paginées par (created_at, id), avec ou sans filtre sur le statut
+    __table_args__ = (
+        Index("ix_order_created_at_id", "created_at", "id"),
+        Index("ix_order_status_created_at_id", "status", "created_at", "id"),
+        # Dernières commandes d'un appelant : WHERE phone = ? ORDER BY created_at DESC LIMIT n
+        Index("ix_order_customer_phone_e164_created_at", "customer_phone_e164", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     customer_name: str
     customer_phone: Optional[str] = None
+    # customer_phone normalisé par app.core.phone.normalize_phone, clé de recherche par appelant
+    customer_phone_e164: Optional[str] = None
     customer_email: Optional[str] = None
     total_amount: float
     status: str = "pending"
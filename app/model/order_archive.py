@@ -0,0 +1,36 @@
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+# Commandes terminées déplacées hors des tables vives par `python -m app.cli archive-orders`.
+# Sous Postgres, les deux tables sont partitionnées par mois (RANGE sur la date de commande) :
+# la clé primaire doit donc inclure cette date.
+
+
+class OrderArchive(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_orderarchive_customer_phone_e164_created_at", "customer_phone_e164", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: int = Field(primary_key=True, index=True)
+    created_at: datetime = Field(primary_key=True)
+    customer_name: str
+    customer_phone: Optional[str] = None
+    customer_phone_e164: Optional[str] = None
+    customer_email: Optional[str] = None
+    total_amount: float
+    status: str
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class OrderItemArchive(SQLModel, table=True):
+    __table_args__ = {"postgresql_partition_by": "RANGE (order_created_at)"}
+
+    id: int = Field(primary_key=True)
+    order_created_at: datetime = Field(primary_key=True)
+    order_id: int = Field(index=True)
+    menu_item_id: int
+    quantity: int
+    unit_price: float
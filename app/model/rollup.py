@@ -0,0 +1,32 @@
+from sqlmodel import SQLModel, Field
+from datetime import date, datetime
+
+# Agrégats maintenus dans la transaction de chaque écriture de commande (dates UTC).
+# Les commandes annulées en sont retirées ; `python -m app.cli rebuild-rollups` les recalcule.
+
+
+class DailySales(SQLModel, table=True):
+    day: date = Field(primary_key=True)
+    orders: int = 0
+    quantity: int = 0
+    revenue: float = 0
+
+
+class HourlySales(SQLModel, table=True):
+    hour: datetime = Field(primary_key=True)
+    orders: int = 0
+    quantity: int = 0
+    revenue: float = 0
+
+
+class ItemDailySales(SQLModel, table=True):
+    day: date = Field(primary_key=True)
+    menu_item_id: int = Field(primary_key=True)
+    orders: int = 0
+    quantity: int = 0
+    revenue: float = 0
+
+
+class OrderStatusCount(SQLModel, table=True):
+    status: str = Field(primary_key=True)
+    orders: int = 0
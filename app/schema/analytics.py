@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import date, datetime
+
+class SalesTotals(BaseModel):
+    orders: int
+    quantity: int
+    revenue: float
+
+class DailySalesRead(SalesTotals):
+    day: date
+
+class HourlySalesRead(SalesTotals):
+    hour: datetime
+
+class ItemSalesRead(SalesTotals):
+    menu_item_id: int
+    name: Optional[str]
+
+class SalesSummary(BaseModel):
+    day: date
+    today: SalesTotals
+    status_counts: Dict[str, int]
+
+class ItemSalesReport(BaseModel):
+    start: date
+    end: date
+    items: List[ItemSalesRead]
@@ -22,3 +22,6 @@ class MenuItemUpdate(BaseModel):
 
 class MenuItemRead(MenuItemBase):
     id: int
+
+class MenuSearchResult(MenuItemRead):
+    score: float
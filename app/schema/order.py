@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -27,3 +27,7 @@ class OrderRead(BaseModel):
     status: str
     created_at: datetime
     items: List[OrderItemRead]
+
+class OrderStatusBulkUpdate(BaseModel):
+    order_ids: List[int] = Field(min_length=1, max_length=1000)
+    status: str
@@ -0,0 +1,346 @@
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import select
+
+from app.core.events import order_events
+from app.core.metrics import registry
+from app.db.session import async_session
+from app.model.order import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+# Statuts encore visibles en cuisine ; delivered et cancelled sortent de l'index
+ACTIVE_STATUSES = ("pending", "confirmed", "preparing", "ready")
+ACTIVE_ORDERS_RECONCILE_INTERVAL = float(os.environ.get("ACTIVE_ORDERS_RECONCILE_INTERVAL", 60))
+# Modèle d'estimation : commandes préparées en parallèle, temps fixe par commande
+# (mise en place, cuisson) et temps par article au-delà du premier
+KITCHEN_STATIONS = int(os.environ.get("KITCHEN_STATIONS", 3))
+KITCHEN_ORDER_SECONDS = float(os.environ.get("KITCHEN_ORDER_SECONDS", 420))
+KITCHEN_ITEM_SECONDS = float(os.environ.get("KITCHEN_ITEM_SECONDS", 90))
+
+
+def _timestamp(moment) -> float:
+    # created_at est stocké en UTC naïf (datetime.utcnow) ; les événements le portent en ISO
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _datetime(timestamp: float) -> datetime:
+    return _EPOCH + timedelta(seconds=timestamp)
+
+
+class ActiveOrder:
+    """Ce dont la cuisine a besoin d'une commande, sans Pydantic ni ORM"""
+    __slots__ = ("id", "status", "created_at", "created", "status_since", "customer_name", "total_amount", "items",
+                 "quantity")
+
+    def __init__(self, order_id: int, status: str, created_at: float, status_since: float,
+                 customer_name: str, total_amount: float, items: Tuple[Tuple[int, int], ...]):
+        self.id = order_id
+        self.status = status
+        # Timestamp pour les calculs, datetime pour les réponses
+        self.created_at = created_at
+        self.created = _datetime(created_at)
+        self.status_since = status_since
+        self.customer_name = customer_name
+        self.total_amount = total_amount
+        # (menu_item_id, quantity)
+        self.items = items
+        self.quantity = sum(quantity for _, quantity in items)
+
+    @classmethod
+    def from_event(cls, order: dict) -> "ActiveOrder":
+        created_at = _timestamp(order["created_at"])
+        return cls(
+            order["id"], order["status"], created_at, created_at, order["customer_name"], order["total_amount"],
+            tuple((item["menu_item_id"], item["quantity"]) for item in order["items"])
+        )
+
+
+class ActiveOrderIndex:
+    """Index en mémoire des commandes non terminées, pour l'écran cuisine.
+
+    Chargé au démarrage, puis tenu à jour par les événements de commande (création,
+    changement de statut) que le broker diffuse à chaque worker. Une réconciliation avec
+    la base tourne toutes les `reconcile_interval` secondes, et tout de suite quand un
+    événement ne suffit pas (charge NOTIFY tronquée, reconnexion LISTEN, commande inconnue).
+    Les lectures (file, compteurs, heures estimées) ne font aucune requête SQL.
+    """
+
+    def __init__(
+            self,
+            reconcile_interval: float = ACTIVE_ORDERS_RECONCILE_INTERVAL,
+            stations: int = KITCHEN_STATIONS,
+            order_seconds: float = KITCHEN_ORDER_SECONDS,
+            item_seconds: float = KITCHEN_ITEM_SECONDS
+    ):
+        self.reconcile_interval = reconcile_interval
+        self.stations = stations
+        self.order_seconds = order_seconds
+        self.item_seconds = item_seconds
+        self._orders: Dict[int, ActiveOrder] = {}
+        # (created_at, id) ; les commandes sorties de l'index y restent jusqu'au compactage
+        self._heap: List[Tuple[float, int]] = []
+        self._counts: Dict[str, int] = dict.fromkeys(ACTIVE_STATUSES, 0)
+        # Parcours du tas par ordre d'arrivée, recalculé après une entrée ou une sortie
+        self._ordered: Optional[List[ActiveOrder]] = None
+        # Incrémentée à chaque modification ; les estimations sont gardées une seconde par version
+        self._version = 0
+        self._estimates: Tuple[Tuple[int, int], Dict[int, float]] = ((-1, 0), {})
+        # Événements reçus pendant une réconciliation, rejoués sur le nouvel état
+        self._replay: Optional[List[dict]] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.loaded_at: Optional[float] = None
+        self.events = 0
+        self.reconciliations = 0
+        self.corrections = 0
+
+    # --- écritures ---
+
+    def _insert(self, order: ActiveOrder):
+        self._orders[order.id] = order
+        self._counts[order.status] += 1
+        heapq.heappush(self._heap, (order.created_at, order.id))
+        self._ordered = None
+        self._version += 1
+
+    def _discard(self, order_id: int):
+        order = self._orders.pop(order_id, None)
+        if order is not None:
+            self._counts[order.status] -= 1
+            self._ordered = None
+            self._version += 1
+            if len(self._heap) > 2 * len(self._orders) + 64:
+                self._heap = [(active.created_at, active.id) for active in self._orders.values()]
+                heapq.heapify(self._heap)
+
+    def _request_reconcile(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def on_event(self, data: dict):
+        """Listener du broker : appliqué de façon synchrone, dans l'ordre de réception"""
+        if self._replay is not None:
+            self._replay.append(data)
+        self._apply(data)
+
+    def _apply(self, data: dict):
+        self.events += 1
+        kind = data.get("type")
+        if kind == "order.created":
+            order = data.get("order")
+            if order is None:
+                # Charge NOTIFY tronquée : seule la base a le détail de la commande
+                self._request_reconcile()
+            elif order["id"] not in self._orders and order["status"] in ACTIVE_STATUSES:
+                self._insert(ActiveOrder.from_event(order))
+        elif kind == "order.status_changed":
+            status = data["status"]
+            order = self._orders.get(data["order_id"])
+            if status not in ACTIVE_STATUSES:
+                self._discard(data["order_id"])
+            elif order is None:
+                # Commande revenue à un statut actif, ou créée sans événement (import en masse)
+                self._request_reconcile()
+            elif order.status != status:
+                self._counts[order.status] -= 1
+                self._counts[status] += 1
+                order.status = status
+                order.status_since = time.time()
+                self._version += 1
+        elif kind in ("stream.reconnected", "orders.imported"):
+            self._request_reconcile()
+
+    async def reconcile(self):
+        """Recharge l'index depuis la base (primaire) en deux requêtes et compte les écarts"""
+        async with self._lock:
+            self._replay = []
+            try:
+                async with async_session() as session:
+                    orders = (await session.execute(
+                        select(Order.id, Order.status, Order.created_at, Order.customer_name, Order.total_amount)
+                        .where(Order.status.in_(ACTIVE_STATUSES))
+                    )).all()
+                    items: Dict[int, List[Tuple[int, int]]] = {}
+                    if orders:
+                        # Sous-requête plutôt qu'un IN de milliers d'ids ; les lignes d'une commande
+                        # créée entre les deux requêtes sont ignorées, l'événement la fournira
+                        result = await session.execute(
+                            select(OrderItem.order_id, OrderItem.menu_item_id, OrderItem.quantity)
+                            .where(OrderItem.order_id.in_(select(Order.id).where(Order.status.in_(ACTIVE_STATUSES))))
+                            .order_by(OrderItem.id)
+                        )
+                        for item in result:
+                            items.setdefault(item.order_id, []).append((item.menu_item_id, item.quantity))
+
+                now = time.time()
+                initial = self.loaded_at is None
+                previous = self._orders
+                self._orders = {}
+                self._heap = []
+                self._ordered = None
+                self._counts = dict.fromkeys(ACTIVE_STATUSES, 0)
+                for row in orders:
+                    known = previous.pop(row.id, None)
+                    if not initial and (known is None or known.status != row.status):
+                        self.corrections += 1
+                    created_at = _timestamp(row.created_at)
+                    # Heure d'entrée dans le statut inconnue de la base : celle vue par l'index si
+                    # elle est cohérente, sinon maintenant (estimation prudente)
+                    status_since = known.status_since if known is not None and known.status == row.status else (
+                        created_at if row.status == "pending" else now
+                    )
+                    self._insert(ActiveOrder(
+                        row.id, row.status, created_at, status_since, row.customer_name, row.total_amount,
+                        tuple(items.get(row.id, ()))
+                    ))
+                # Commandes encore dans l'ancien index mais plus actives en base
+                self.corrections += len(previous)
+
+                replay, self._replay = self._replay, None
+                for data in replay:
+                    self._apply(data)
+            finally:
+                self._replay = None
+            self.loaded_at = time.monotonic()
+            self.reconciliations += 1
+
+    # --- cycle de vie ---
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.reconcile_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Active order reconciliation failed", exc_info=True)
+
+    async def start(self):
+        if self._task is None:
+            order_events.add_listener(self.on_event)
+            self._wake = asyncio.Event()
+            await self.reconcile()
+            self._task = asyncio.create_task(self._run())
+
+    async def ensure_started(self):
+        """Démarrage paresseux quand l'app tourne sans son événement startup (tests, benchmarks)"""
+        if self._task is None:
+            await self.start()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- lectures, sans SQL ---
+
+    def _in_created_order(self) -> List[ActiveOrder]:
+        if self._ordered is None:
+            orders = self._orders
+            self._ordered = [orders[order_id] for _, order_id in sorted(self._heap) if order_id in orders]
+        return self._ordered
+
+    def preparation_seconds(self, order: ActiveOrder) -> float:
+        return self.order_seconds + self.item_seconds * max(order.quantity - 1, 0)
+
+    def estimates(self, now: Optional[float] = None) -> Dict[int, float]:
+        """Heure de fin estimée (timestamp) de chaque commande.
+
+        File FIFO sur `stations` postes : les commandes en préparation occupent d'abord un
+        poste pour le temps qu'il leur reste, puis les commandes en attente le prennent par
+        ordre d'arrivée, au premier poste libéré (tas des heures de libération).
+        """
+        now = time.time() if now is None else now
+        key = (self._version, int(now))
+        if self._estimates[0] == key:
+            return self._estimates[1]
+        stations = [now] * max(self.stations, 1)
+        ready_at: Dict[int, float] = {}
+        waiting: List[ActiveOrder] = []
+        for order in self._in_created_order():
+            if order.status == "ready":
+                ready_at[order.id] = order.status_since
+            elif order.status == "preparing":
+                remaining = max(self.preparation_seconds(order) - (now - order.status_since), 0.0)
+                ready_at[order.id] = heapq.heappop(stations) + remaining
+                heapq.heappush(stations, ready_at[order.id])
+            else:
+                waiting.append(order)
+        for order in waiting:
+            ready_at[order.id] = heapq.heappop(stations) + self.preparation_seconds(order)
+            heapq.heappush(stations, ready_at[order.id])
+        self._estimates = (key, ready_at)
+        return ready_at
+
+    def queue(self, status: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        """File cuisine par ordre d'arrivée, avec attente et heure de fin estimée"""
+        now = time.time()
+        ready_at = self.estimates(now)
+        orders = []
+        for order in self._in_created_order():
+            if status is not None and order.status != status:
+                continue
+            orders.append({
+                "id": order.id,
+                "status": order.status,
+                "customer_name": order.customer_name,
+                "total_amount": order.total_amount,
+                "created_at": order.created,
+                "waiting_seconds": round(now - order.created_at, 1),
+                "estimated_ready_at": _datetime(ready_at[order.id]),
+                "items": [{"menu_item_id": menu_item_id, "quantity": quantity} for menu_item_id, quantity in order.items],
+            })
+            if limit is not None and len(orders) >= limit:
+                break
+        return orders
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "orders": len(self._orders),
+            "heap_size": len(self._heap),
+            "counts": self.counts(),
+            "events": self.events,
+            "reconciliations": self.reconciliations,
+            "corrections": self.corrections,
+            "reconcile_interval": self.reconcile_interval,
+            "age_seconds": round(time.monotonic() - self.loaded_at, 3) if self.loaded_at is not None else None,
+        }
+
+
+active_orders = ActiveOrderIndex()
+
+
+@registry.register_collector
+def _active_order_metrics():
+    for status, count in active_orders.counts().items():
+        yield "active_orders", "gauge", "Non-terminal orders held by the kitchen index", {"status": status}, count
+    yield ("active_orders_corrections_total", "counter",
+           "Index entries fixed by reconciliation with the database", {}, active_orders.corrections)
@@ -0,0 +1,133 @@
+import os
+from typing import Dict, List
+
+from sqlalchemy import event, union_all
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from app.core.cache import TTLCache
+from app.core.metrics import registry
+from app.db.session import read_session
+from app.model.order import Order, OrderItem
+from app.model.order_archive import OrderArchive, OrderItemArchive
+
+CALLER_CACHE_TTL = float(os.environ.get("CALLER_CACHE_TTL", 30))
+CALLER_CACHE_SIZE = int(os.environ.get("CALLER_CACHE_SIZE", 2048))
+
+# Dernières commandes par numéro E.164 : (nombre demandé à la base, commandes).
+# Un appel entrant déclenche souvent plusieurs lookups (agent, puis écran du serveur)
+caller_cache = TTLCache(maxsize=CALLER_CACHE_SIZE, ttl=CALLER_CACHE_TTL)
+
+
+@registry.register_collector
+def _caller_metrics():
+    yield "caller_cache_hits_total", "counter", "Caller lookup cache hits", {}, caller_cache.hits
+    yield "caller_cache_misses_total", "counter", "Caller lookup cache misses", {}, caller_cache.misses
+    yield "caller_cache_size", "gauge", "Cached callers", {}, len(caller_cache)
+
+
+def _latest(model, phone_e164: str, limit: int):
+    # Chaque branche lit l'index (customer_phone_e164, created_at) à l'envers et s'arrête à `limit`
+    query = (
+        select(
+            model.id, model.customer_name, model.customer_phone, model.customer_email,
+            model.total_amount, model.status, model.created_at
+        )
+        .where(model.customer_phone_e164 == phone_e164)
+        .order_by(model.created_at.desc())
+        .limit(limit)
+    )
+    return select(*query.subquery().c)
+
+
+def recent_orders_query(phone_e164: str, limit: int):
+    """Les `limit` dernières commandes d'un numéro, tables vives et archive confondues,
+    jointes à leurs lignes : une seule requête, une ligne par item"""
+    candidates = union_all(_latest(Order, phone_e164, limit), _latest(OrderArchive, phone_e164, limit)).subquery()
+    recent = (
+        select(*candidates.c)
+        .order_by(candidates.c.created_at.desc(), candidates.c.id.desc())
+        .limit(limit)
+        .subquery("recent")
+    )
+    items = union_all(
+        select(OrderItem.id, OrderItem.order_id, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.unit_price),
+        select(
+            OrderItemArchive.id, OrderItemArchive.order_id, OrderItemArchive.menu_item_id,
+            OrderItemArchive.quantity, OrderItemArchive.unit_price
+        ),
+    ).subquery("items")
+    return (
+        select(
+            *recent.c,
+            items.c.id.label("item_id"), items.c.menu_item_id, items.c.quantity, items.c.unit_price
+        )
+        .select_from(recent.outerjoin(items, items.c.order_id == recent.c.id))
+        .order_by(recent.c.created_at.desc(), recent.c.id.desc(), items.c.id)
+    )
+
+
+async def fetch_recent_orders(session, phone_e164: str, limit: int) -> List[dict]:
+    """Dicts de la forme d'OrderRead, plus récentes d'abord"""
+    result = await session.execute(recent_orders_query(phone_e164, limit))
+    orders: Dict[int, dict] = {}
+    for row in result:
+        order = orders.get(row.id)
+        if order is None:
+            order = orders[row.id] = {
+                "id": row.id,
+                "customer_name": row.customer_name,
+                "customer_phone": row.customer_phone,
+                "customer_email": row.customer_email,
+                "total_amount": row.total_amount,
+                "status": row.status,
+                "created_at": row.created_at,
+                "items": [],
+            }
+        if row.item_id is not None:
+            order["items"].append({
+                "id": row.item_id,
+                "menu_item_id": row.menu_item_id,
+                "quantity": row.quantity,
+                "unit_price": row.unit_price,
+            })
+    return list(orders.values())
+
+
+async def caller_orders(phone_e164: str, limit: int) -> List[dict]:
+    """Dernières commandes d'un appelant, servies par caller_cache tant qu'elles suffisent"""
+    cached = caller_cache.get(phone_e164)
+    if cached is not None:
+        fetched, orders = cached
+        # Le cache couvre la demande s'il contient assez de commandes, ou toutes celles du numéro
+        if fetched >= limit or len(orders) < fetched:
+            return orders[:limit]
+
+    async with read_session() as session:
+        orders = await fetch_recent_orders(session, phone_e164, limit)
+    caller_cache.set(phone_e164, (limit, orders))
+    return orders
+
+
+def forget_caller(phone_e164) -> None:
+    """À appeler quand une commande du numéro est créée ou change de statut (ce worker seulement)"""
+    if phone_e164:
+        caller_cache.invalidate(phone_e164)
+
+
+def forget_caller_on_commit(session, phone_e164) -> None:
+    """Comme `forget_caller`, mais après le commit de `session` : invalider avant laisserait un
+    lookup concurrent remettre en cache l'état d'avant la commande pour CALLER_CACHE_TTL"""
+    if phone_e164:
+        session.sync_session.info.setdefault("forget_callers", set()).add(phone_e164)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_callers(session):
+    for phone_e164 in session.info.pop("forget_callers", ()):
+        caller_cache.invalidate(phone_e164)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_forgotten_callers(session):
+    session.info.pop("forget_callers", None)
@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+import os
+from typing import Dict, List
+
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import text, update
+from sqlmodel import select
+
+from app.core.menu_cache import MENU_ITEM_COLUMNS, menu_cache
+from app.core.menu_search import menu_search
+from app.db.session import async_session
+from app.model.menu import MenuItem
+from app.schema.menu import MenuItemCreate
+
+MENU_BULK_MAX_ITEMS = int(os.environ.get("MENU_BULK_MAX_ITEMS", 10000))
+
+MENU_FIELDS = list(MenuItemCreate.model_fields)
+REQUIRED_CSV_COLUMNS = {"name", "description", "price"}
+
+_menu_adapter = TypeAdapter(List[MenuItemCreate])
+
+_SET_CLAUSE = ", ".join(f"{field} = excluded.{field}" for field in MENU_FIELDS if field != "name")
+_COLUMNS = ", ".join(MENU_FIELDS)
+
+# Une seule instruction quel que soit le nombre d'items : le lot part en tableaux (Postgres)
+# ou en document JSON (SQLite) au lieu d'une ligne VALUES par item
+UPSERT_SQL = {
+    "postgresql": f"""
+        INSERT INTO menuitem ({_COLUMNS})
+        SELECT * FROM unnest(
+            CAST(:name AS varchar[]), CAST(:description AS varchar[]), CAST(:price AS float8[]),
+            CAST(:category AS varchar[]), CAST(:available AS boolean[]), CAST(:image_url AS varchar[])
+        )
+        ON CONFLICT (name) DO UPDATE SET {_SET_CLAUSE}
+        RETURNING id, name
+    """,
+    # WHERE true : sans lui, SQLite lit ON CONFLICT comme une clause de jointure
+    "sqlite": f"""
+        INSERT INTO menuitem ({_COLUMNS})
+        SELECT {", ".join(f"json_extract(value, '$.{field}')" for field in MENU_FIELDS)}
+        FROM json_each(:items) WHERE true
+        ON CONFLICT (name) DO UPDATE SET {_SET_CLAUSE}
+        RETURNING id, name
+    """,
+}
+
+
+def _validation_error(exc: ValidationError):
+    return HTTPException(status_code=422, detail=json.loads(exc.json(include_url=False)))
+
+
+def _parse_csv(body: bytes) -> list:
+    try:
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        missing = REQUIRED_CSV_COLUMNS - set(reader.fieldnames or ())
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Missing CSV columns: {sorted(missing)}")
+        # Cellule vide : valeur par défaut du champ (catégorie, disponibilité, image)
+        return [{key: value for key, value in row.items() if key and value not in (None, "")} for row in reader]
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {exc}")
+
+
+def parse_menu(body: bytes, content_type: str) -> List[MenuItemCreate]:
+    """Lit un menu complet : tableau JSON de MenuItemCreate, ou CSV avec une ligne d'en-tête
+    (name, description, price, et au choix category, available, image_url)"""
+    try:
+        if content_type.split(";")[0].strip().lower() in ("text/csv", "application/csv"):
+            items = _menu_adapter.validate_python(_parse_csv(body))
+        else:
+            items = _menu_adapter.validate_json(body)
+    except ValidationError as exc:
+        raise _validation_error(exc)
+
+    if len(items) > MENU_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Too many items (max {MENU_BULK_MAX_ITEMS})")
+    seen = set()
+    duplicates = sorted({item.name for item in items if item.name in seen or seen.add(item.name)})
+    if duplicates:
+        raise HTTPException(status_code=422, detail=f"Duplicate item names: {duplicates}")
+    return items
+
+
+def diff_menu(current: Dict[str, dict], items: List[MenuItemCreate], disable_missing: bool) -> dict:
+    """Compare le menu reçu au menu en base (par nom) : items à créer, à modifier, inchangés,
+    et items absents du fichier à rendre indisponibles si `disable_missing`"""
+    created, updated, unchanged = [], [], 0
+    for item in items:
+        row = current.get(item.name)
+        if row is None:
+            created.append(item)
+            continue
+        changes = {
+            field: [row[field], value]
+            for field, value in item.model_dump().items()
+            if row[field] != value
+        }
+        if changes:
+            updated.append((row["id"], item, changes))
+        else:
+            unchanged += 1
+
+    names = {item.name for item in items}
+    disabled = [
+        row for name, row in current.items()
+        if disable_missing and name not in names and row["available"]
+    ]
+    return {"created": created, "updated": updated, "unchanged": unchanged, "disabled": disabled}
+
+
+async def _upsert(session, items: List[MenuItemCreate]) -> Dict[str, int]:
+    dialect = session.bind.dialect.name
+    if dialect not in UPSERT_SQL:
+        raise NotImplementedError(f"Menu upserts are not implemented for {dialect}")
+    rows = [item.model_dump() for item in items]
+    if dialect == "postgresql":
+        params = {field: [row[field] for row in rows] for field in MENU_FIELDS}
+    else:
+        params = {"items": json.dumps(rows)}
+    result = await session.execute(text(UPSERT_SQL[dialect]), params)
+    return {name: item_id for item_id, name in result}
+
+
+async def import_menu(items: List[MenuItemCreate], dry_run: bool = False, disable_missing: bool = False) -> dict:
+    """Applique un menu complet dans une transaction : un INSERT ... ON CONFLICT (name) DO UPDATE
+    pour les items nouveaux ou modifiés, un UPDATE pour ceux à désactiver.
+
+    Les caches du menu (snapshot public, index de recherche) sont rafraîchis une fois,
+    après le commit. Avec `dry_run`, renvoie le même rapport sans rien écrire.
+    """
+    async with async_session() as session:
+        result = await session.execute(select(*MENU_ITEM_COLUMNS))
+        current = {row.name: dict(row._mapping) for row in result}
+        diff = diff_menu(current, items, disable_missing)
+
+        ids: Dict[str, int] = {}
+        if not dry_run:
+            changed = diff["created"] + [item for _, item, _ in diff["updated"]]
+            if changed:
+                ids = await _upsert(session, changed)
+            if diff["disabled"]:
+                await session.execute(
+                    update(MenuItem)
+                    .where(MenuItem.id.in_([row["id"] for row in diff["disabled"]]))
+                    .values(available=False)
+                )
+            if changed or diff["disabled"]:
+                await session.commit()
+                menu_cache.invalidate()
+                for item in changed:
+                    current[item.name] = {"id": ids[item.name], **item.model_dump()}
+                for row in diff["disabled"]:
+                    row["available"] = False
+                menu_search.rebuild(current.values())
+
+    return {
+        "dry_run": dry_run,
+        "created": [{"id": ids.get(item.name), "name": item.name} for item in diff["created"]],
+        "updated": [
+            {"id": item_id, "name": item.name, "changes": changes}
+            for item_id, item, changes in diff["updated"]
+        ],
+        "unchanged": diff["unchanged"],
+        "disabled": [{"id": row["id"], "name": row["name"]} for row in diff["disabled"]],
+    }
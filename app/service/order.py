@@ -0,0 +1,296 @@
+import base64
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import insert, tuple_
+from sqlmodel import select
+
+from app.model.menu import MenuItem
+from app.model.order import Order, OrderItem
+from app.schema.order import OrderCreate, OrderItemRead, OrderRead
+from app.db.session import read_session
+from app.core.phone import normalize_phone
+from app.core.serialization import dumps
+from app.service.caller import forget_caller_on_commit
+from app.service.rollup import record_orders_created
+
+
+ORDER_COLUMNS = tuple(Order.__table__.columns)
+ORDER_ITEM_COLUMNS = (OrderItem.id, OrderItem.order_id, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.unit_price)
+
+
+async def load_menu_prices(session, menu_item_ids: Optional[Iterable[int]] = None) -> Dict[int, tuple]:
+    """Charge en une seule requête (id, name, price, available) des items demandés
+
+    Sans `menu_item_ids`, charge le menu complet (utilisé par les imports en masse).
+    """
+    query = select(MenuItem.id, MenuItem.name, MenuItem.price, MenuItem.available)
+    if menu_item_ids is not None:
+        ids = set(menu_item_ids)
+        if not ids:
+            return {}
+        query = query.where(MenuItem.id.in_(ids))
+    result = await session.execute(query)
+    return {row.id: row for row in result}
+
+
+def price_order(order_data: OrderCreate, menu: Dict[int, tuple]) -> Tuple[float, List[dict]]:
+    """Vérifie les lignes de la commande et calcule le total, sans accès à la base"""
+    total_amount = 0
+    order_items_data = []
+
+    for item_data in order_data.items:
+        menu_item = menu.get(item_data.menu_item_id)
+
+        if not menu_item:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Menu item {item_data.menu_item_id} not found"
+            )
+
+        if not menu_item.available:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Menu item '{menu_item.name}' is not available"
+            )
+
+        total_amount += menu_item.price * item_data.quantity
+        order_items_data.append({
+            "menu_item_id": item_data.menu_item_id,
+            "quantity": item_data.quantity,
+            "unit_price": menu_item.price
+        })
+
+    return total_amount, order_items_data
+
+
+async def insert_order(
+        session,
+        order_data: OrderCreate,
+        total_amount: float,
+        order_items_data: List[dict]
+) -> OrderRead:
+    """Insère la commande puis toutes ses lignes en un seul INSERT ... RETURNING"""
+    db_order = Order(
+        customer_name=order_data.customer_name,
+        customer_phone=order_data.customer_phone,
+        customer_phone_e164=normalize_phone(order_data.customer_phone),
+        customer_email=order_data.customer_email,
+        total_amount=total_amount
+    )
+    order_result = await session.execute(
+        insert(Order)
+        .values(**db_order.model_dump(exclude={"id"}))
+        .returning(Order.id)
+    )
+    db_order.id = order_result.scalar_one()
+    forget_caller_on_commit(session, db_order.customer_phone_e164)
+
+    items = []
+    if order_items_data:
+        rows = [{"order_id": db_order.id, **item_data} for item_data in order_items_data]
+        items_result = await session.execute(
+            insert(OrderItem).returning(OrderItem.id, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.unit_price),
+            rows
+        )
+        items = [OrderItemRead(**row._mapping) for row in sorted(items_result, key=lambda row: row.id)]
+
+    return OrderRead(
+        id=db_order.id,
+        customer_name=db_order.customer_name,
+        customer_phone=db_order.customer_phone,
+        customer_email=db_order.customer_email,
+        total_amount=db_order.total_amount,
+        status=db_order.status,
+        created_at=db_order.created_at,
+        items=items
+    )
+
+
+async def insert_orders(
+        session,
+        priced_orders: Sequence[Tuple[OrderCreate, float, List[dict]]]
+) -> List[OrderRead]:
+    """Version groupée d'insert_order : deux INSERT ... RETURNING pour tout le lot"""
+    now = datetime.utcnow()
+    db_orders = [
+        Order(
+            customer_name=order_data.customer_name,
+            customer_phone=order_data.customer_phone,
+            customer_phone_e164=normalize_phone(order_data.customer_phone),
+            customer_email=order_data.customer_email,
+            total_amount=total_amount,
+            created_at=now
+        )
+        for order_data, total_amount, _ in priced_orders
+    ]
+    orders_result = await session.execute(
+        insert(Order).returning(Order.id, sort_by_parameter_order=True),
+        [db_order.model_dump(exclude={"id"}) for db_order in db_orders]
+    )
+    for db_order, order_id in zip(db_orders, orders_result.scalars().all()):
+        db_order.id = order_id
+        forget_caller_on_commit(session, db_order.customer_phone_e164)
+
+    items_by_order: Dict[int, List[OrderItemRead]] = {}
+    rows = [
+        {"order_id": db_order.id, **item_data}
+        for db_order, (_, _, order_items_data) in zip(db_orders, priced_orders)
+        for item_data in order_items_data
+    ]
+    if rows:
+        items_result = await session.execute(
+            insert(OrderItem).returning(
+                OrderItem.id, OrderItem.order_id, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.unit_price
+            ),
+            rows
+        )
+        for row in sorted(items_result, key=lambda row: row.id):
+            items_by_order.setdefault(row.order_id, []).append(OrderItemRead(**row._mapping))
+
+    return [
+        OrderRead(
+            id=db_order.id,
+            customer_name=db_order.customer_name,
+            customer_phone=db_order.customer_phone,
+            customer_email=db_order.customer_email,
+            total_amount=db_order.total_amount,
+            status=db_order.status,
+            created_at=db_order.created_at,
+            items=items_by_order.get(db_order.id, [])
+        )
+        for db_order in db_orders
+    ]
+
+
+async def create_order(session, order_data: OrderCreate) -> OrderRead:
+    """Crée une commande : une requête de lecture, deux INSERT, pas de flush ORM,
+    puis la mise à jour des agrégats de ventes dans la même transaction"""
+    menu = await load_menu_prices(session, (item.menu_item_id for item in order_data.items))
+    total_amount, order_items_data = price_order(order_data, menu)
+    order = await insert_order(session, order_data, total_amount, order_items_data)
+    await record_orders_created(session, [order])
+    return order
+
+
+def encode_cursor(order: Order) -> str:
+    """Curseur opaque : position (created_at, id) de la dernière commande renvoyée"""
+    raw = json.dumps([order.created_at.isoformat(), order.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, order_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def orders_query(status: Optional[str], cursor: Optional[str]):
+    return orders_query_after(status, decode_cursor(cursor) if cursor else None)
+
+
+def orders_query_after(status: Optional[str], position: Optional[Tuple[datetime, int]]):
+    """Commandes plus récentes d'abord, strictement après `position` (created_at, id)"""
+    # Colonnes plutôt qu'entités : les listes n'ont pas besoin de la carte d'identité de l'ORM
+    query = select(*ORDER_COLUMNS).order_by(Order.created_at.desc(), Order.id.desc())
+    if status is not None:
+        query = query.where(Order.status == status)
+    if position is not None:
+        query = query.where(tuple_(Order.created_at, Order.id) < position)
+    return query
+
+
+def order_row_dict(order, items: Sequence) -> dict:
+    """Ligne de commande et ses items -> dict de la forme d'OrderRead, sans validation Pydantic"""
+    return {
+        "id": order.id,
+        "customer_name": order.customer_name,
+        "customer_phone": order.customer_phone,
+        "customer_email": order.customer_email,
+        "total_amount": order.total_amount,
+        "status": order.status,
+        "created_at": order.created_at,
+        "items": [
+            {
+                "id": item.id,
+                "menu_item_id": item.menu_item_id,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price
+            } for item in items
+        ]
+    }
+
+
+async def _with_items(session, orders: Sequence) -> List[dict]:
+    if not orders:
+        return []
+
+    order_ids = [order.id for order in orders]
+    items_query = select(*ORDER_ITEM_COLUMNS).where(OrderItem.order_id.in_(order_ids))
+    items_result = await session.execute(items_query)
+
+    items_by_order: Dict[int, list] = {}
+    for item in items_result:
+        items_by_order.setdefault(item.order_id, []).append(item)
+
+    return [order_row_dict(order, items_by_order.get(order.id, ())) for order in orders]
+
+
+async def fetch_order(session, order_id: int) -> Optional[dict]:
+    """Une commande sous forme de dict de la forme d'OrderRead, ou None"""
+    # Récupérer la commande
+    order_query = select(*ORDER_COLUMNS).where(Order.id == order_id)
+    order_result = await session.execute(order_query)
+    order = order_result.one_or_none()
+
+    if not order:
+        return None
+
+    # Récupérer les items
+    items_query = select(*ORDER_ITEM_COLUMNS).where(OrderItem.order_id == order_id)
+    items_result = await session.execute(items_query)
+    return order_row_dict(order, items_result.all())
+
+
+async def fetch_order_page(
+        session,
+        limit: int,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Une page de commandes (plus récentes d'abord) et le curseur de la page suivante
+
+    Les commandes sont des dicts de la forme d'OrderRead, à renvoyer via FastJSONResponse.
+    """
+    result = await session.execute(orders_query(status, cursor).limit(limit + 1))
+    orders = result.all()
+
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor(orders[-1])
+
+    return await _with_items(session, orders), next_cursor
+
+
+async def stream_orders(
+        position: Optional[Tuple[datetime, int]] = None,
+        status: Optional[str] = None,
+        batch_size: int = 500
+) -> AsyncIterator[bytes]:
+    """Commandes en NDJSON, lues lot par lot via un curseur côté serveur.
+
+    `position` vient de `decode_cursor`, appelé par la route : une fois la réponse
+    commencée, un curseur invalide ne pourrait plus donner de 400.
+    """
+    async with read_session() as session:
+        query = orders_query_after(status, position).execution_options(yield_per=batch_size)
+        result = await session.stream(query)
+        async for partition in result.partitions():
+            for order in await _with_items(session, partition):
+                yield dumps(order) + b"\n"
@@ -0,0 +1,165 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, insert, literal, text
+from sqlmodel import select
+
+from app.db.session import async_session
+from app.model.order import Order, OrderItem
+from app.model.order_archive import OrderArchive, OrderItemArchive
+from app.service.order import order_row_dict
+
+logger = logging.getLogger(__name__)
+
+# Seules les commandes dans un statut terminal quittent les tables vives
+ARCHIVED_STATUSES = ("delivered", "cancelled")
+ARCHIVE_TABLES = (("orderarchive", "created_at"), ("orderitemarchive", "order_created_at"))
+
+ORDER_ARCHIVE_COLUMNS = (
+    OrderArchive.id, OrderArchive.customer_name, OrderArchive.customer_phone, OrderArchive.customer_email,
+    OrderArchive.total_amount, OrderArchive.status, OrderArchive.created_at
+)
+ORDER_ITEM_ARCHIVE_COLUMNS = (
+    OrderItemArchive.id, OrderItemArchive.order_id, OrderItemArchive.menu_item_id,
+    OrderItemArchive.quantity, OrderItemArchive.unit_price
+)
+
+
+def _month_start(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+async def ensure_partitions(session, first: datetime, last: datetime):
+    """Crée (Postgres) les partitions mensuelles couvrant [first, last] si elles manquent"""
+    month = _month_start(first)
+    while month <= _month_start(last):
+        upper = _next_month(month)
+        for table, _ in ARCHIVE_TABLES:
+            await session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+        month = upper
+
+
+async def archive_batch(session, cutoff: datetime, batch_size: int) -> int:
+    """Déplace au plus `batch_size` commandes terminées d'avant `cutoff` dans les tables
+    d'archive, dans la transaction en cours de `session`. Renvoie le nombre déplacé."""
+    result = await session.execute(
+        select(Order.id, Order.created_at)
+        .where(Order.status.in_(ARCHIVED_STATUSES), Order.created_at < cutoff)
+        .order_by(Order.id)
+        .limit(batch_size)
+        # Postgres : on ne bloque pas une mise à jour de statut en cours, on la reprendra
+        .with_for_update(skip_locked=True)
+    )
+    rows = result.all()
+    if not rows:
+        return 0
+
+    order_ids = [row.id for row in rows]
+    if session.bind.dialect.name == "postgresql":
+        await ensure_partitions(session, min(row.created_at for row in rows), max(row.created_at for row in rows))
+
+    await session.execute(
+        insert(OrderArchive).from_select(
+            ["id", "customer_name", "customer_phone", "customer_phone_e164", "customer_email", "total_amount",
+             "status", "created_at", "archived_at"],
+            select(
+                Order.id, Order.customer_name, Order.customer_phone, Order.customer_phone_e164, Order.customer_email,
+                Order.total_amount, Order.status, Order.created_at, literal(datetime.utcnow())
+            ).where(Order.id.in_(order_ids))
+        )
+    )
+    await session.execute(
+        insert(OrderItemArchive).from_select(
+            ["id", "order_created_at", "order_id", "menu_item_id", "quantity", "unit_price"],
+            select(
+                OrderItem.id, Order.created_at, OrderItem.order_id, OrderItem.menu_item_id,
+                OrderItem.quantity, OrderItem.unit_price
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(OrderItem.order_id.in_(order_ids))
+        )
+    )
+    await session.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+    await session.execute(delete(Order).where(Order.id.in_(order_ids)))
+    return len(order_ids)
+
+
+async def archive_orders(older_than: timedelta, batch_size: int = 5000, max_batches: Optional[int] = None) -> dict:
+    """Archive par lots, une transaction par lot, jusqu'à épuisement des commandes éligibles"""
+    cutoff = datetime.utcnow() - older_than
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        async with async_session() as session:
+            moved = await archive_batch(session, cutoff, batch_size)
+            await session.commit()
+        if not moved:
+            break
+        archived += moved
+        batches += 1
+        logger.info("Archived %d orders (%d so far)", moved, archived)
+    return {"cutoff": cutoff.isoformat(), "archived": archived, "batches": batches}
+
+
+async def fetch_archived_order(session, order_id: int) -> Optional[dict]:
+    """Une commande archivée, de la même forme que `fetch_order`"""
+    result = await session.execute(select(*ORDER_ARCHIVE_COLUMNS).where(OrderArchive.id == order_id))
+    order = result.first()
+    if not order:
+        return None
+
+    # La date de commande restreint la lecture des lignes à une seule partition
+    items_result = await session.execute(
+        select(*ORDER_ITEM_ARCHIVE_COLUMNS).where(
+            OrderItemArchive.order_id == order_id,
+            OrderItemArchive.order_created_at == order.created_at
+        )
+    )
+    return order_row_dict(order, items_result.all())
+
+
+async def detach_partitions(session, before: date) -> List[str]:
+    """Détache (Postgres) les partitions d'archive des mois antérieurs à `before`.
+
+    Les tables détachées restent en base, prêtes à être exportées puis supprimées ; leurs
+    commandes ne sont plus visibles par l'API.
+    """
+    if session.bind.dialect.name != "postgresql":
+        raise RuntimeError("Archive partitions only exist on PostgreSQL")
+
+    detached: List[str] = []
+    cutoff = _month_start(datetime(before.year, before.month, 1))
+    for table, _ in ARCHIVE_TABLES:
+        result = await session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table}
+        )
+        partitions: Dict[str, date] = {}
+        for (name,) in result:
+            suffix = name[len(table) + 1:]
+            try:
+                partitions[name] = datetime.strptime(suffix, "y%Ym%m").date()
+            except ValueError:
+                continue
+        for name, month in sorted(partitions.items()):
+            if month < cutoff:
+                await session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                detached.append(name)
+    return detached
@@ -0,0 +1,232 @@
+import json
+import logging
+import tempfile
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Tuple
+
+import anyio
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+
+from app.core.events import order_events
+from app.core.phone import normalize_phone
+from app.db.session import async_session
+from app.model.order import Order, OrderItem
+from app.schema.order import OrderCreate
+from app.service.caller import forget_caller
+from app.service.order import load_menu_prices, price_order
+from app.service.rollup import RollupItem, RollupOrder, record_orders_created
+
+logger = logging.getLogger(__name__)
+
+# Au-delà de cette taille, le corps de la requête est déversé sur disque
+SPOOL_MAX_MEMORY = 1024 * 1024
+# Les accès au fichier temporaire passent par un thread, par blocs de cette taille environ
+SPOOL_IO_SIZE = 256 * 1024
+
+ORDER_COLUMNS = [
+    "id", "customer_name", "customer_phone", "customer_phone_e164", "customer_email", "total_amount", "status", "created_at"
+]
+ORDER_ITEM_COLUMNS = ["order_id", "menu_item_id", "quantity", "unit_price"]
+
+
+class PricedOrder(NamedTuple):
+    line: int
+    order_data: OrderCreate
+    total_amount: float
+    items: List[dict]
+
+
+async def spool_request_body(request: Request) -> tempfile.SpooledTemporaryFile:
+    """Copie le corps NDJSON dans un fichier temporaire sans le garder en mémoire.
+
+    La réponse étant elle-même streamée, le corps doit être lu entièrement avant :
+    uvicorn ne permet pas de lire la requête pendant l'envoi de la réponse. Une fois
+    déversé sur disque, chaque écriture est une I/O bloquante : les morceaux reçus sont
+    regroupés et écrits dans un thread, hors de la boucle d'événements.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    try:
+        pending = bytearray()
+        async for chunk in request.stream():
+            pending += chunk
+            if len(pending) >= SPOOL_IO_SIZE:
+                await anyio.to_thread.run_sync(spool.write, bytes(pending))
+                pending.clear()
+        if pending:
+            await anyio.to_thread.run_sync(spool.write, bytes(pending))
+        await anyio.to_thread.run_sync(spool.seek, 0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def _spooled_lines(spool) -> AsyncIterator[Tuple[int, bytes]]:
+    """(numéro, ligne) du fichier temporaire, lues par blocs de lignes complètes dans un thread"""
+    line_number = 0
+    while True:
+        lines = await anyio.to_thread.run_sync(spool.readlines, SPOOL_IO_SIZE)
+        if not lines:
+            return
+        for raw_line in lines:
+            line_number += 1
+            yield line_number, raw_line
+
+
+def _result_line(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+async def _copy_orders(session, batch: List[PricedOrder], now: datetime) -> List[int]:
+    """Écrit le lot via COPY (asyncpg) après avoir réservé les ids dans la séquence"""
+    ids_result = await session.execute(
+        text("""SELECT nextval(pg_get_serial_sequence('"order"', 'id')) FROM generate_series(1, :n)"""),
+        {"n": len(batch)}
+    )
+    order_ids = ids_result.scalars().all()
+
+    order_records = []
+    item_records = []
+    for order_id, priced in zip(order_ids, batch):
+        data = priced.order_data
+        order_records.append((
+            order_id, data.customer_name, data.customer_phone, normalize_phone(data.customer_phone), data.customer_email,
+            priced.total_amount, "pending", now
+        ))
+        item_records.extend(
+            (order_id, item["menu_item_id"], item["quantity"], item["unit_price"])
+            for item in priced.items
+        )
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    await driver_connection.copy_records_to_table("order", records=order_records, columns=ORDER_COLUMNS)
+    if item_records:
+        await driver_connection.copy_records_to_table(
+            "orderitem", records=item_records, columns=ORDER_ITEM_COLUMNS
+        )
+    return order_ids
+
+
+async def _insert_orders(session, batch: List[PricedOrder], now: datetime) -> List[int]:
+    """Repli multi-base : INSERT ... RETURNING puis insertion groupée des lignes"""
+    orders_result = await session.execute(
+        insert(Order).returning(Order.id, sort_by_parameter_order=True),
+        [
+            {
+                "customer_name": priced.order_data.customer_name,
+                "customer_phone": priced.order_data.customer_phone,
+                "customer_phone_e164": normalize_phone(priced.order_data.customer_phone),
+                "customer_email": priced.order_data.customer_email,
+                "total_amount": priced.total_amount,
+                "status": "pending",
+                "created_at": now,
+            }
+            for priced in batch
+        ]
+    )
+    order_ids = orders_result.scalars().all()
+
+    item_rows = [
+        {"order_id": order_id, **item}
+        for order_id, priced in zip(order_ids, batch)
+        for item in priced.items
+    ]
+    if item_rows:
+        await session.execute(insert(OrderItem), item_rows)
+    return order_ids
+
+
+async def write_orders(batch: List[PricedOrder]) -> List[int]:
+    """Écrit un lot de commandes déjà validées dans une seule transaction, agrégats compris"""
+    now = datetime.utcnow()
+    async with async_session() as session:
+        dialect = session.bind.dialect
+        if dialect.name == "postgresql" and dialect.driver == "asyncpg":
+            order_ids = await _copy_orders(session, batch, now)
+        else:
+            order_ids = await _insert_orders(session, batch, now)
+        await record_orders_created(session, (
+            RollupOrder(now, priced.total_amount, "pending", [RollupItem(**item) for item in priced.items])
+            for priced in batch
+        ))
+        # Pas un order.created par commande importée : les index en mémoire se resynchronisent
+        await order_events.publish(session, {"type": "orders.imported", "count": len(order_ids)})
+        await session.commit()
+    for priced in batch:
+        forget_caller(normalize_phone(priced.order_data.customer_phone))
+    return order_ids
+
+
+async def _flush(batch: List[PricedOrder]) -> List[dict]:
+    try:
+        order_ids = await write_orders(batch)
+    except Exception:
+        # Le texte du driver (SQL, noms de contraintes) reste dans les logs
+        logger.exception("Bulk order batch of %d orders failed (lines %d-%d)", len(batch), batch[0].line, batch[-1].line)
+        return [
+            {"line": priced.line, "status": "error", "detail": "Database error"}
+            for priced in batch
+        ]
+
+    return [
+        {
+            "line": priced.line,
+            "status": "created",
+            "order_id": order_id,
+            "total_amount": priced.total_amount,
+        }
+        for order_id, priced in zip(order_ids, batch)
+    ]
+
+
+async def ingest_ndjson(spool, batch_size: int) -> AsyncIterator[str]:
+    """Valide chaque ligne NDJSON contre le menu et écrit les commandes par lots.
+
+    Produit une ligne de résultat NDJSON par ligne reçue, puis un résumé final.
+    """
+    counts = {"created": 0, "error": 0}
+    try:
+        async with async_session() as session:
+            menu = await load_menu_prices(session)
+
+        batch: List[PricedOrder] = []
+        async for line_number, raw_line in _spooled_lines(spool):
+            raw_line = raw_line.strip()
+            if not raw_line:
+                continue
+
+            try:
+                order_data = OrderCreate.model_validate_json(raw_line)
+                total_amount, items = price_order(order_data, menu)
+            except ValidationError as exc:
+                counts["error"] += 1
+                yield _result_line({
+                    "line": line_number,
+                    "status": "error",
+                    "detail": json.loads(exc.json(include_url=False)),
+                })
+                continue
+            except HTTPException as exc:
+                counts["error"] += 1
+                yield _result_line({"line": line_number, "status": "error", "detail": exc.detail})
+                continue
+
+            batch.append(PricedOrder(line_number, order_data, total_amount, items))
+            if len(batch) >= batch_size:
+                for result in await _flush(batch):
+                    counts[result["status"]] += 1
+                    yield _result_line(result)
+                batch = []
+
+        if batch:
+            for result in await _flush(batch):
+                counts[result["status"]] += 1
+                yield _result_line(result)
+    finally:
+        await anyio.to_thread.run_sync(spool.close)
+
+    yield _result_line({"summary": {"created": counts["created"], "failed": counts["error"]}})
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import time
+from typing import List, NamedTuple, Optional, Union
+
+from fastapi import HTTPException
+
+from app.core.events import order_created_event, order_events
+from app.core.metrics import COUNT_BUCKETS, Histogram, registry
+from app.db.session import async_session
+from app.schema.order import OrderCreate, OrderRead
+from app.service.order import insert_orders, load_menu_prices, price_order
+from app.service.rollup import record_orders_created
+
+logger = logging.getLogger(__name__)
+
+# direct : une transaction par commande ; batch : commit groupé par le writer
+ORDER_INTAKE_MODE = os.environ.get("ORDER_INTAKE_MODE", "direct").lower()
+ORDER_INTAKE_BATCH_SIZE = int(os.environ.get("ORDER_INTAKE_BATCH_SIZE", 100))
+ORDER_INTAKE_LINGER_MS = float(os.environ.get("ORDER_INTAKE_LINGER_MS", 5))
+# Au-delà, les nouvelles commandes sont refusées (503) plutôt que d'attendre indéfiniment
+ORDER_INTAKE_MAX_QUEUE = int(os.environ.get("ORDER_INTAKE_MAX_QUEUE", 10000))
+
+BATCH_SIZE = registry.register(Histogram(
+    "order_intake_batch_size", "Orders committed per group-commit transaction", (),
+    COUNT_BUCKETS[1:] + (89, 144, 233, 500)))
+QUEUE_LATENCY = registry.register(Histogram(
+    "order_intake_queue_latency_seconds", "Time from enqueue to commit for batched orders"))
+
+
+class IntakeRequest(NamedTuple):
+    order_data: OrderCreate
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class OrderIntake:
+    """File d'entrée des commandes en heure de pointe.
+
+    Les routes déposent la commande validée par Pydantic dans une file asyncio ; un writer
+    unique la vide par lots (au plus `batch_size` commandes, `linger` secondes d'attente),
+    vérifie tout le lot contre le menu en une requête, l'écrit dans une seule transaction
+    puis résout le future de chaque appelant. Une seule connexion est occupée au lieu d'une
+    par requête. Si le lot échoue en base, ses commandes sont rejouées une par une.
+    """
+
+    def __init__(
+            self,
+            batch_size: int = ORDER_INTAKE_BATCH_SIZE,
+            linger_ms: float = ORDER_INTAKE_LINGER_MS,
+            max_queue: int = ORDER_INTAKE_MAX_QUEUE
+    ):
+        self.batch_size = batch_size
+        self.linger = linger_ms / 1000
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.committed = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None
+
+    async def start(self):
+        if self._writer is None:
+            self._queue = asyncio.Queue(self.max_queue)
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête le writer après avoir écrit les commandes déjà en file"""
+        if self._writer is not None:
+            await self._queue.put(None)
+            await self._writer
+            self._writer = None
+
+    async def submit(self, order_data: OrderCreate) -> OrderRead:
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(IntakeRequest(order_data, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Order intake queue is full, retry shortly",
+                headers={"Retry-After": "1"}
+            )
+        return await future
+
+    async def _next_batch(self) -> Optional[List[IntakeRequest]]:
+        """Attend une commande puis complète le lot jusqu'à sa taille ou la fin du délai.
+
+        Renvoie None une fois la file vidée après `stop()`.
+        """
+        first = await self._queue.get()
+        if first is None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        batch = [first]
+        deadline = loop.time() + self.linger
+        while len(batch) < self.batch_size:
+            try:
+                request = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if request is None:
+                # Arrêt demandé : on écrit ce lot, le writer s'arrêtera au tour suivant
+                self._queue.put_nowait(None)
+                break
+            batch.append(request)
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            if batch is None:
+                return
+            try:
+                await self._process(batch)
+            except Exception:
+                logger.exception("Order intake writer failed on a batch of %d orders", len(batch))
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(HTTPException(status_code=500, detail="Order could not be saved"))
+
+    async def _process(self, batch: List[IntakeRequest]):
+        try:
+            results = await self._commit(batch)
+        except Exception:
+            if len(batch) == 1:
+                raise
+            logger.warning("Group commit of %d orders failed, retrying one by one", len(batch), exc_info=True)
+            results = []
+            for request in batch:
+                try:
+                    results.extend(await self._commit([request]))
+                except Exception:
+                    logger.exception("Order could not be saved")
+                    results.append(HTTPException(status_code=500, detail="Order could not be saved"))
+
+        now = time.perf_counter()
+        for request, result in zip(batch, results):
+            QUEUE_LATENCY.observe(now - request.enqueued_at)
+            if request.future.done():
+                # Appelant parti (client déconnecté) : la commande est tout de même enregistrée
+                continue
+            if isinstance(result, Exception):
+                request.future.set_exception(result)
+            else:
+                request.future.set_result(result)
+
+    async def _commit(self, batch: List[IntakeRequest]) -> List[Union[OrderRead, HTTPException]]:
+        """Écrit le lot dans une transaction ; les commandes invalides reçoivent leur erreur HTTP"""
+        async with async_session() as session:
+            menu = await load_menu_prices(
+                session, (item.menu_item_id for request in batch for item in request.order_data.items)
+            )
+
+            outcomes: List[Optional[HTTPException]] = []
+            priced_orders = []
+            for request in batch:
+                try:
+                    total_amount, order_items_data = price_order(request.order_data, menu)
+                except HTTPException as exc:
+                    outcomes.append(exc)
+                    continue
+                outcomes.append(None)
+                priced_orders.append((request.order_data, total_amount, order_items_data))
+
+            orders = await insert_orders(session, priced_orders) if priced_orders else []
+            await record_orders_created(session, orders)
+            await order_events.publish_many(session, [order_created_event(order) for order in orders])
+            await session.commit()
+
+        self.batches += 1
+        self.committed += len(orders)
+        BATCH_SIZE.observe(len(orders))
+        created = iter(orders)
+        return [next(created) if outcome is None else outcome for outcome in outcomes]
+
+    def stats(self) -> dict:
+        return {
+            "mode": "batch" if self.running else "direct",
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_size,
+            "linger_ms": self.linger * 1000,
+            "batches": self.batches,
+            "committed": self.committed,
+            "rejected": self.rejected,
+            "average_batch": round(self.committed / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+order_intake = OrderIntake()
+
+
+@registry.register_collector
+def _intake_metrics():
+    stats = order_intake.stats()
+    yield "order_intake_queue_depth", "gauge", "Orders waiting for the group-commit writer", {}, stats["queue_depth"]
+    yield "order_intake_rejected_total", "counter", "Orders refused because the intake queue was full", {}, stats["rejected"]
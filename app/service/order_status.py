@@ -0,0 +1,81 @@
+from typing import List, NamedTuple, Sequence
+
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.core.events import order_events, order_status_changed_event
+from app.model.order import Order, allowed_sources
+from app.service.rollup import record_status_changes
+
+
+class StatusChange(NamedTuple):
+    id: int
+    previous_status: str
+    created_at: object
+    total_amount: float
+    customer_phone_e164: object
+
+
+async def _compare_and_set(session, order_ids: Sequence[int], new_status: str, sources: tuple) -> List[StatusChange]:
+    if session.bind.dialect.name == "postgresql":
+        # Une instruction : le CTE verrouille les lignes encore dans un statut source (revérifié
+        # après une écriture concurrente) et garde leur statut précédent pour le RETURNING
+        current = (
+            select(Order.id, Order.status)
+            .where(Order.id.in_(order_ids), Order.status.in_(sources))
+            # Verrous pris par id croissant : deux lots qui se recoupent ne s'interbloquent pas
+            .order_by(Order.id)
+            .with_for_update()
+            .cte("current")
+            .prefix_with("MATERIALIZED")
+        )
+        result = await session.execute(
+            update(Order)
+            .where(Order.id == current.c.id)
+            .values(status=new_status)
+            .returning(Order.id, current.c.status, Order.created_at, Order.total_amount, Order.customer_phone_e164)
+        )
+        return [StatusChange(*row) for row in result]
+
+    # SQLite : le RETURNING d'un UPDATE ... FROM y voit déjà la nouvelle valeur. Un premier
+    # UPDATE sans effet prend le verrou d'écriture et renvoie les statuts actuels (un SELECT
+    # ne le prendrait pas et laisserait passer une écriture concurrente), le second les change
+    previous = dict((await session.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status.in_(sources))
+        .values(status=Order.status)
+        .returning(Order.id, Order.status)
+    )).all())
+    if not previous:
+        return []
+    result = await session.execute(
+        update(Order)
+        .where(Order.id.in_(previous), Order.status.in_(sources))
+        .values(status=new_status)
+        .returning(Order.id, Order.created_at, Order.total_amount, Order.customer_phone_e164)
+    )
+    return [
+        StatusChange(row.id, previous[row.id], row.created_at, row.total_amount, row.customer_phone_e164)
+        for row in result
+    ]
+
+
+async def transition_orders(session, order_ids: Sequence[int], new_status: str) -> List[StatusChange]:
+    """Passe à `new_status` celles des commandes dont le statut actuel le permet
+    (ORDER_TRANSITIONS), dans la transaction de `session`.
+
+    Comparer-et-écrire en base : deux mises à jour concurrentes de la même commande ne
+    peuvent pas réussir toutes les deux depuis le même statut. Met à jour les agrégats et
+    publie un événement par commande modifiée ; les autres sont simplement absentes du
+    résultat (commande inconnue, transition interdite ou statut déjà atteint).
+    """
+    sources = allowed_sources(new_status)
+    if not order_ids or not sources:
+        return []
+    changes = await _compare_and_set(session, order_ids, new_status, sources)
+    if changes:
+        await record_status_changes(session, [(change, change.previous_status) for change in changes], new_status)
+        await order_events.publish_many(session, [
+            order_status_changed_event(change.id, new_status, change.previous_status) for change in changes
+        ])
+    return changes
@@ -0,0 +1,187 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, text
+from sqlmodel import select
+
+from app.db.session import dialect_insert
+from app.model.order import Order, OrderItem
+from app.model.order_archive import OrderArchive, OrderItemArchive
+from app.model.rollup import DailySales, HourlySales, ItemDailySales, OrderStatusCount
+
+# Les commandes annulées ne comptent pas dans le chiffre d'affaires
+EXCLUDED_FROM_SALES = frozenset({"cancelled"})
+
+
+class RollupItem(NamedTuple):
+    menu_item_id: int
+    quantity: int
+    unit_price: float
+
+
+class RollupOrder(NamedTuple):
+    created_at: datetime
+    total_amount: float
+    status: str
+    items: Sequence[RollupItem]
+
+
+class RollupDelta:
+    """Incréments à appliquer aux tables d'agrégats, cumulés en mémoire par clé"""
+
+    def __init__(self):
+        self.daily: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+        self.hourly: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+        self.items: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+        self.statuses: Dict[tuple, List[int]] = defaultdict(lambda: [0])
+
+    def add_sales(self, order, sign: int = 1):
+        """`order` : OrderRead, RollupOrder ou tout objet exposant les mêmes attributs"""
+        day = order.created_at.date()
+        hour = order.created_at.replace(minute=0, second=0, microsecond=0)
+        quantity = sum(item.quantity for item in order.items)
+        for totals in (self.daily[(day,)], self.hourly[(hour,)]):
+            totals[0] += sign
+            totals[1] += sign * quantity
+            totals[2] += sign * order.total_amount
+
+        seen = set()
+        for item in order.items:
+            totals = self.items[(day, item.menu_item_id)]
+            if item.menu_item_id not in seen:
+                seen.add(item.menu_item_id)
+                totals[0] += sign
+            totals[1] += sign * item.quantity
+            totals[2] += sign * item.quantity * item.unit_price
+
+    def add_status(self, status: str, sign: int = 1):
+        self.statuses[(status,)][0] += sign
+
+    def add_order(self, order):
+        self.add_status(order.status)
+        if order.status not in EXCLUDED_FROM_SALES:
+            self.add_sales(order)
+
+
+async def _upsert_increments(session, model, keys: Sequence[str], columns: Sequence[str], increments: dict):
+    """INSERT ... ON CONFLICT DO UPDATE SET col = col + excluded.col, une instruction par table"""
+    # Clés triées : tous les écrivains verrouillent les lignes d'agrégat dans le même ordre,
+    # sans quoi deux transactions concurrentes peuvent s'interbloquer sous Postgres
+    rows = [
+        {**dict(zip(keys, key)), **dict(zip(columns, values))}
+        for key, values in sorted(increments.items())
+        if any(values)
+    ]
+    if not rows:
+        return
+    statement = dialect_insert(session)(model)
+    table = model.__table__
+    statement = statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: table.c[column] + statement.excluded[column] for column in columns}
+    )
+    await session.execute(statement, rows)
+
+
+async def apply_delta(session, delta: RollupDelta):
+    """Applique les incréments dans la transaction en cours de `session`"""
+    sales = ("orders", "quantity", "revenue")
+    await _upsert_increments(session, DailySales, ("day",), sales, delta.daily)
+    await _upsert_increments(session, HourlySales, ("hour",), sales, delta.hourly)
+    await _upsert_increments(session, ItemDailySales, ("day", "menu_item_id"), sales, delta.items)
+    await _upsert_increments(session, OrderStatusCount, ("status",), ("orders",), delta.statuses)
+
+
+async def record_orders_created(session, orders: Iterable):
+    delta = RollupDelta()
+    for order in orders:
+        delta.add_order(order)
+    await apply_delta(session, delta)
+
+
+async def record_status_changes(session, changes: Iterable[Tuple[object, str]], new_status: str):
+    """Déplace les commandes d'un compteur de statut à l'autre, en un seul jeu d'upserts.
+
+    `changes` : couples (commande, statut précédent), la commande exposant id, created_at et
+    total_amount. L'annulation (ou son retrait) retire (ou rajoute) les commandes des ventes,
+    ce qui demande de relire leurs lignes : une requête pour tout le lot.
+    """
+    delta = RollupDelta()
+    is_sale = new_status not in EXCLUDED_FROM_SALES
+    crossing = []
+    for order, previous_status in changes:
+        if previous_status == new_status:
+            continue
+        delta.add_status(previous_status, -1)
+        delta.add_status(new_status)
+        if (previous_status not in EXCLUDED_FROM_SALES) != is_sale:
+            crossing.append(order)
+
+    if crossing:
+        items_result = await session.execute(
+            select(OrderItem.order_id, OrderItem.menu_item_id, OrderItem.quantity, OrderItem.unit_price)
+            .where(OrderItem.order_id.in_([order.id for order in crossing]))
+        )
+        items: Dict[int, List[RollupItem]] = defaultdict(list)
+        for row in items_result:
+            items[row.order_id].append(RollupItem(row.menu_item_id, row.quantity, row.unit_price))
+        for order in crossing:
+            rollup_order = RollupOrder(order.created_at, order.total_amount, new_status, items[order.id])
+            delta.add_sales(rollup_order, 1 if is_sale else -1)
+    await apply_delta(session, delta)
+
+
+async def rebuild_rollups(session, batch_size: int = 1000) -> dict:
+    """Recalcule tous les agrégats depuis les commandes vives et archivées, dans la transaction de `session`"""
+    if session.bind.dialect.name == "postgresql":
+        # Les écritures concurrentes attendent la fin du recalcul puis s'y ajoutent :
+        # une commande non validée au moment de la lecture n'est comptée qu'une fois
+        await session.execute(text(
+            "LOCK TABLE dailysales, hourlysales, itemdailysales, orderstatuscount IN EXCLUSIVE MODE"
+        ))
+
+    delta = RollupDelta()
+    orders = 0
+    # Les commandes archivées comptent toujours dans l'historique des ventes
+    for query in (
+        select(
+            Order.id, Order.created_at, Order.total_amount, Order.status,
+            OrderItem.menu_item_id, OrderItem.quantity, OrderItem.unit_price
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .order_by(Order.id),
+        select(
+            OrderArchive.id, OrderArchive.created_at, OrderArchive.total_amount, OrderArchive.status,
+            OrderItemArchive.menu_item_id, OrderItemArchive.quantity, OrderItemArchive.unit_price
+        )
+        .outerjoin(OrderItemArchive, and_(
+            OrderItemArchive.order_id == OrderArchive.id,
+            OrderItemArchive.order_created_at == OrderArchive.created_at
+        ))
+        .order_by(OrderArchive.id),
+    ):
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        current: Optional[tuple] = None
+        items: List[RollupItem] = []
+        async for row in result:
+            if current is None or row.id != current.id:
+                if current is not None:
+                    delta.add_order(RollupOrder(current.created_at, current.total_amount, current.status, items))
+                current, items = row, []
+                orders += 1
+            if row.menu_item_id is not None:
+                items.append(RollupItem(row.menu_item_id, row.quantity, row.unit_price))
+        if current is not None:
+            delta.add_order(RollupOrder(current.created_at, current.total_amount, current.status, items))
+
+    for model in (DailySales, HourlySales, ItemDailySales, OrderStatusCount):
+        await session.execute(delete(model))
+    await apply_delta(session, delta)
+    return {
+        "orders": orders,
+        "days": len(delta.daily),
+        "hours": len(delta.hourly),
+        "item_days": len(delta.items),
+        "statuses": len(delta.statuses),
+    }
@@ -0,0 +1,157 @@
+"""Latence des listes de commandes avant / après archivage des commandes terminées.
+
+Génère `--orders` commandes réparties sur `--days` jours (les plus anciennes livrées ou
+annulées, les récentes dans tous les statuts), mesure les lectures de l'API, archive les
+commandes terminées de plus de `--older-than-days` jours puis refait les mêmes mesures.
+
+    python -m benchmarks.bench_archive --orders 1000000 --days 730
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import seed_menu
+
+from sqlalchemy import func, insert
+from sqlmodel import select
+
+from app.db.session import async_session, engine
+from app.model.order import Order, OrderItem
+from app.service import order as order_service
+from app.service.order_archive import archive_orders, fetch_archived_order
+
+SEED_CHUNK = 10000
+ACTIVE_STATUSES = ("pending", "confirmed", "preparing", "ready")
+
+
+async def seed_orders(menu_ids, orders, days, older_than_days, rng):
+    now = datetime.utcnow()
+    first_id = None
+    for start in range(0, orders, SEED_CHUNK):
+        count = min(SEED_CHUNK, orders - start)
+        rows = []
+        for index in range(start, start + count):
+            # Ordre chronologique : l'id croît avec la date, comme en production
+            created_at = now - timedelta(days=days) + timedelta(days=days) * index / orders
+            recent = now - created_at < timedelta(days=older_than_days)
+            if recent:
+                status = rng.choice(ACTIVE_STATUSES + ("delivered",))
+            else:
+                status = "cancelled" if rng.random() < 0.05 else "delivered"
+            rows.append({
+                "customer_name": "Bench", "total_amount": 20.0, "status": status, "created_at": created_at
+            })
+        async with async_session() as session:
+            result = await session.execute(insert(Order).returning(Order.id, sort_by_parameter_order=True), rows)
+            order_ids = result.scalars().all()
+            first_id = first_id or order_ids[0]
+            await session.execute(insert(OrderItem), [
+                {"order_id": order_id, "menu_item_id": rng.choice(menu_ids), "quantity": 2, "unit_price": 10.0}
+                for order_id in order_ids
+            ])
+            await session.commit()
+    return first_id
+
+
+async def timed(repeat, coro_fn):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+async def measure(repeat, limit, oldest_id):
+    async with async_session() as session:
+        live = (await session.execute(select(func.count()).select_from(Order))).scalar()
+
+        # Curseur profond : dernière page de l'historique encore en base vive
+        cursor = None
+        async def deep_page():
+            await order_service.fetch_order_page(session, limit, cursor)
+
+        last = (await session.execute(
+            select(Order.created_at, Order.id).order_by(Order.created_at, Order.id).offset(limit).limit(1)
+        )).first()
+        if last is not None:
+            cursor = order_service.encode_cursor(last)
+
+        async def get_oldest():
+            if not await order_service.fetch_order(session, oldest_id):
+                await fetch_archived_order(session, oldest_id)
+
+        return {
+            "live_orders": live,
+            "first_page_ms": await timed(repeat, lambda: order_service.fetch_order_page(session, limit)),
+            "pending_page_ms": await timed(
+                repeat, lambda: order_service.fetch_order_page(session, limit, status="pending")
+            ),
+            "deep_cursor_ms": await timed(repeat, deep_page),
+            "count_pending_ms": await timed(repeat, lambda: session.execute(
+                select(func.count()).select_from(Order).where(Order.status == "pending")
+            )),
+            "get_oldest_order_ms": await timed(repeat, get_oldest),
+        }
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    menu_ids = await seed_menu(async_session)
+
+    started = time.perf_counter()
+    oldest_id = await seed_orders(menu_ids, args.orders, args.days, args.older_than_days, rng)
+    seeded = time.perf_counter() - started
+
+    before = await measure(args.repeat, args.limit, oldest_id)
+    started = time.perf_counter()
+    archived = await archive_orders(timedelta(days=args.older_than_days), batch_size=args.batch_size)
+    archive_seconds = time.perf_counter() - started
+    after = await measure(args.repeat, args.limit, oldest_id)
+
+    return {
+        "orders": args.orders,
+        "seed_seconds": round(seeded, 1),
+        "archived": archived["archived"],
+        "archive_seconds": round(archive_seconds, 1),
+        "before": before,
+        "after": after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--older-than-days", type=int, default=90)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="sortie JSON brute")
+    args = parser.parse_args()
+
+    async def _main():
+        try:
+            return await run(args)
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(_main())
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['orders']} commandes générées en {report['seed_seconds']} s, "
+          f"{report['archived']} archivées en {report['archive_seconds']} s")
+    print(f"{'mesure':<22} {'avant':>10} {'après':>10}")
+    for key in report["before"]:
+        print(f"{key:<22} {report['before'][key]:>10} {report['after'][key]:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Démarrage à froid : du lancement d'uvicorn au premier GET /health/ready en 200.
+
+Lance le serveur dans un process séparé, sur une base migrée une fois pour toutes
+(`alembic upgrade head`), et compare la vérification de version du schéma
+(SCHEMA_CHECK=strict) à l'ancien create_all au démarrage (SCHEMA_CHECK=create).
+
+    python -m benchmarks.bench_cold_start --runs 5 --workers 1
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.common import ROOT, percentile
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _sync_url(url: str) -> str:
+    return url.replace("+aiosqlite", "").replace("+asyncpg", "+psycopg2")
+
+
+def migrate(env):
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def cold_start(env, workers: int, timeout: float) -> dict:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited: {server.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=1) as response:
+                    report = json.loads(response.read())
+                    report["time_to_ready"] = time.perf_counter() - started
+                    return report
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError(f"Not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--modes", default="strict,create")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", action="store_true", help="sortie JSON brute")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL_SYNC", _sync_url(env["DATABASE_URL"]))
+    migrate(env)
+
+    report = []
+    for mode in args.modes.split(","):
+        runs = [cold_start(dict(env, SCHEMA_CHECK=mode), args.workers, args.timeout) for _ in range(args.runs)]
+        times = [run["time_to_ready"] for run in runs]
+        phases = {
+            name: round(statistics.median(run["phases"][name] for run in runs) * 1000, 3)
+            for name in runs[0]["phases"]
+        }
+        report.append({
+            "schema_check": mode,
+            "workers": args.workers,
+            "time_to_ready_p50_ms": round(percentile(times, 50) * 1000, 1),
+            "time_to_ready_max_ms": round(max(times) * 1000, 1),
+            "cold_start_p50_s": statistics.median(run["cold_start_seconds"] or 0 for run in runs),
+            "startup_p50_ms": round(statistics.median(run["startup_seconds"] for run in runs) * 1000, 3),
+            "phases_p50_ms": phases,
+        })
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for row in report:
+        print(f"{row['schema_check']:<8} prêt en {row['time_to_ready_p50_ms']} ms (max {row['time_to_ready_max_ms']}), "
+              f"démarrage applicatif {row['startup_p50_ms']} ms : {row['phases_p50_ms']}")
+
+
+if __name__ == "__main__":
+    main()
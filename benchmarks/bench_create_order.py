@@ -0,0 +1,106 @@
+"""Compare l'ancienne création de commande (une requête par ligne) au chemin ensembliste.
+
+    python -m benchmarks.bench_create_order --sizes 1,5,10,20,50 --repeat 30
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import StatementCounter, percentile, seed_menu
+
+from sqlmodel import select
+
+from app.db.session import async_session, engine
+from app.model.menu import MenuItem
+from app.model.order import Order, OrderItem
+from app.schema.order import OrderCreate, OrderItemCreate
+from app.service import order as order_service
+from app.service.rollup import RollupItem, RollupOrder, record_orders_created
+
+
+async def legacy_create_order(session, order_data: OrderCreate):
+    """Reproduction de l'implémentation historique de create_order, plus les agrégats de ventes
+    que la version actuelle écrit aussi : les deux côtés font le même travail"""
+    total_amount = 0
+    order_items_data = []
+    for item_data in order_data.items:
+        result = await session.execute(select(MenuItem).where(MenuItem.id == item_data.menu_item_id))
+        menu_item = result.scalar_one()
+        total_amount += menu_item.price * item_data.quantity
+        order_items_data.append({
+            "menu_item_id": item_data.menu_item_id,
+            "quantity": item_data.quantity,
+            "unit_price": menu_item.price
+        })
+
+    db_order = Order(customer_name=order_data.customer_name, total_amount=total_amount)
+    session.add(db_order)
+    await session.flush()
+    for item_data in order_items_data:
+        session.add(OrderItem(order_id=db_order.id, **item_data))
+
+    await record_orders_created(session, [RollupOrder(
+        db_order.created_at, db_order.total_amount, db_order.status,
+        [RollupItem(**item_data) for item_data in order_items_data]
+    )])
+
+
+async def set_based_create_order(session, order_data: OrderCreate):
+    await order_service.create_order(session, order_data)
+
+
+async def run(sizes, repeat):
+    menu_ids = await seed_menu(async_session)
+    counter = StatementCounter(engine)
+    report = []
+
+    for size in sizes:
+        order_data = OrderCreate(
+            customer_name="Bench",
+            items=[OrderItemCreate(menu_item_id=menu_ids[i % len(menu_ids)], quantity=1) for i in range(size)],
+        )
+        for name, implementation in (("legacy", legacy_create_order), ("set_based", set_based_create_order)):
+            samples = []
+            for _ in range(repeat):
+                with counter.measure() as sample:
+                    async with async_session() as session:
+                        await implementation(session, order_data)
+                        await session.commit()
+                samples.append(sample)
+            latencies = [s["seconds"] * 1000 for s in samples]
+            report.append({
+                "implementation": name,
+                "cart_size": size,
+                "statements": samples[-1]["statements"],
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+            })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1,5,10,20,50")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--json", action="store_true", help="sortie JSON brute")
+    args = parser.parse_args()
+
+    async def _main():
+        try:
+            return await run([int(s) for s in args.sizes.split(",")], args.repeat)
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(_main())
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'implementation':<12} {'cart':>5} {'stmts':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in report:
+        print(f"{row['implementation']:<12} {row['cart_size']:>5} {row['statements']:>6} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Polling de l'écran cuisine : liste SQL par statut contre index en mémoire des commandes actives.
+
+Génère `--orders` commandes dont `--active` non terminées, puis compare, pour chaque statut
+actif, une page de `get_orders_by_status` (2 requêtes + OrderRead) et la lecture de l'index
+(file complète avec heures estimées, sans SQL). Mesure aussi le coût d'application d'un
+événement de changement de statut et d'une réconciliation complète.
+
+    python -m benchmarks.bench_kitchen_queue --orders 100000 --active 300 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import StatementCounter, percentile, seed_menu
+
+from sqlalchemy import insert
+
+from app.db.session import async_session, engine, read_session
+from app.model.order import Order, OrderItem
+from app.service import order as order_service
+from app.service.active_orders import ACTIVE_STATUSES, ActiveOrderIndex
+
+SEED_CHUNK = 10000
+
+
+async def seed_orders(menu_ids, orders, active, rng):
+    now = datetime.utcnow()
+    for start in range(0, orders, SEED_CHUNK):
+        count = min(SEED_CHUNK, orders - start)
+        rows = []
+        for index in range(start, start + count):
+            # Les `active` dernières commandes sont encore en cuisine
+            is_active = index >= orders - active
+            rows.append({
+                "customer_name": "Bench",
+                "total_amount": 20.0,
+                "status": rng.choice(ACTIVE_STATUSES) if is_active else "delivered",
+                "created_at": now - timedelta(minutes=orders - index),
+            })
+        async with async_session() as session:
+            result = await session.execute(insert(Order).returning(Order.id, sort_by_parameter_order=True), rows)
+            await session.execute(insert(OrderItem), [
+                {"order_id": order_id, "menu_item_id": rng.choice(menu_ids), "quantity": 1 + order_id % 3,
+                 "unit_price": 10.0}
+                for order_id in result.scalars().all()
+            ])
+            await session.commit()
+
+
+def _summary(samples):
+    return {
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    menu_ids = await seed_menu(async_session)
+    await seed_orders(menu_ids, args.orders, args.active, rng)
+    counter = StatementCounter(engine)
+
+    sql_samples, sql_statements = [], 0
+    for index in range(args.repeat):
+        status = ACTIVE_STATUSES[index % len(ACTIVE_STATUSES)]
+        with counter.measure() as sample:
+            async with read_session() as session:
+                await order_service.fetch_order_page(session, args.limit, None, status)
+        sql_samples.append(sample["seconds"] * 1000)
+        sql_statements += sample["statements"]
+
+    index = ActiveOrderIndex()
+    start = time.perf_counter()
+    await index.reconcile()
+    reconcile_ms = (time.perf_counter() - start) * 1000
+
+    memory_samples, memory_statements = [], 0
+    for _ in range(args.repeat):
+        with counter.measure() as sample:
+            index.queue(limit=args.limit)
+            index.counts()
+        memory_samples.append(sample["seconds"] * 1000)
+        memory_statements += sample["statements"]
+
+    order_ids = list(index._orders)
+    start = time.perf_counter()
+    for order_id in order_ids:
+        index.on_event({"type": "order.status_changed", "order_id": order_id, "status": "preparing"})
+    event_us = (time.perf_counter() - start) * 1_000_000 / max(len(order_ids), 1)
+
+    return {
+        "orders": args.orders,
+        "active": len(order_ids),
+        "sql_by_status": {**_summary(sql_samples), "statements_per_poll": sql_statements / args.repeat},
+        "memory_index": {**_summary(memory_samples), "statements_per_poll": memory_statements / args.repeat},
+        "reconcile_ms": round(reconcile_ms, 2),
+        "status_event_us": round(event_us, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--active", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="sortie JSON brute")
+    args = parser.parse_args()
+
+    async def _main():
+        try:
+            return await run(args)
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(_main())
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['orders']} commandes, {report['active']} actives")
+    for name in ("sql_by_status", "memory_index"):
+        row = report[name]
+        print(f"{name:<14} p50 {row['p50_ms']:>8} ms  p99 {row['p99_ms']:>8} ms  SQL/poll {row['statements_per_poll']}")
+    print(f"réconciliation complète {report['reconcile_ms']} ms, événement de statut {report['status_event_us']} µs")
+
+
+if __name__ == "__main__":
+    main()
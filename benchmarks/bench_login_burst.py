@@ -0,0 +1,98 @@
+"""Latence des routes menu et commande pendant une rafale de connexions.
+
+Compare la vérification bcrypt exécutée dans la boucle asyncio (ancien comportement)
+au pool de hachage borné. Tout tourne en process via l'ASGI transport de httpx.
+
+    python -m benchmarks.bench_login_burst --logins 40 --duration 3
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import asgi_client, percentile, seed_admin, seed_menu
+
+import app.api.auth as auth_api
+from app.core.security import verify_password, verify_password_async
+from app.db.session import async_session, engine
+from app.main import app
+
+
+async def blocking_verify(plain_password, hashed_password):
+    return verify_password(plain_password, hashed_password)
+
+
+async def probe(client, menu_ids, stop_at, latencies):
+    """Alterne lecture du menu et création de commande jusqu'à la fin de la rafale"""
+    order = {"customer_name": "Bench", "items": [{"menu_item_id": menu_ids[0], "quantity": 1}]}
+    while time.perf_counter() < stop_at:
+        for route, call in (
+            ("GET /api/menu/", lambda: client.get("/api/menu/")),
+            ("POST /api/orders/", lambda: client.post("/api/orders/", json=order)),
+        ):
+            start = time.perf_counter()
+            await call()
+            latencies.setdefault(route, []).append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def burst(client, credentials, logins, statuses):
+    async def one():
+        response = await client.post("/api/auth/login", json=credentials)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(one() for _ in range(logins)))
+
+
+async def scenario(client, menu_ids, credentials, logins, duration):
+    latencies, statuses = {}, {}
+    stop_at = time.perf_counter() + duration
+    probes = asyncio.create_task(probe(client, menu_ids, stop_at, latencies))
+    await asyncio.sleep(0.2)
+    await burst(client, credentials, logins, statuses)
+    await probes
+    return {
+        "login_statuses": statuses,
+        "routes": {
+            route: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "max_ms": round(max(values), 2),
+            }
+            for route, values in latencies.items()
+        },
+    }
+
+
+async def run(logins, duration):
+    menu_ids = await seed_menu(async_session)
+    username, password = await seed_admin(async_session)
+    credentials = {"username": username, "password": password}
+
+    report = {}
+    async with asgi_client(app) as client:
+        auth_api.verify_password_async = blocking_verify
+        report["event_loop_bcrypt"] = await scenario(client, menu_ids, credentials, logins, duration)
+        auth_api.verify_password_async = verify_password_async
+        report["password_pool"] = await scenario(client, menu_ids, credentials, logins, duration)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=3.0, help="durée de la sonde en secondes")
+    args = parser.parse_args()
+
+    async def _main():
+        try:
+            return await run(args.logins, args.duration)
+        finally:
+            await engine.dispose()
+
+    print(json.dumps(asyncio.run(_main()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
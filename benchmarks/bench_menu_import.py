@@ -0,0 +1,83 @@
+"""Changement de menu de saison : un appel admin par item contre PUT /api/menu/admin/bulk.
+
+Crée `--items` items puis modifie le prix de chacun, d'abord avec POST /api/menu/admin/
+et PUT /api/menu/admin/{id} (une transaction et un refresh par item), puis avec deux
+imports en masse (un INSERT ... ON CONFLICT pour tout le lot). Compte aussi les
+instructions SQL et mesure un dry-run sur le menu déjà à jour.
+
+    python -m benchmarks.bench_menu_import --items 2000
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import StatementCounter, asgi_client, seed_admin
+
+from app.db.session import async_session, engine, init_db
+from app.main import app
+
+
+def season(prefix, count, price_shift=0.0):
+    return [
+        {"name": f"{prefix} item {i}", "description": "benchmark", "price": 5 + i % 10 + price_shift,
+         "category": "pizza" if i % 4 else "boisson"}
+        for i in range(count)
+    ]
+
+
+async def per_item(client, items):
+    ids = []
+    for item in items:
+        response = await client.post("/api/menu/admin/", json=item)
+        ids.append(response.json()["id"])
+    for item_id, item in zip(ids, items):
+        await client.put(f"/api/menu/admin/{item_id}", json={"price": item["price"] + 1})
+
+
+async def bulk(client, items):
+    await client.put("/api/menu/admin/bulk", json=items)
+    await client.put("/api/menu/admin/bulk", json=[{**item, "price": item["price"] + 1} for item in items])
+
+
+async def run(args):
+    await init_db()
+    username, password = await seed_admin(async_session)
+    counter = StatementCounter(engine)
+    report = {"items": args.items}
+
+    async with asgi_client(app) as client:
+        response = await client.post("/api/auth/login", json={"username": username, "password": password})
+        client.headers["Authorization"] = "Bearer " + response.json()["access_token"]
+
+        for name, scenario, prefix in (("per_item", per_item, "Single"), ("bulk", bulk, "Bulk")):
+            with counter.measure() as sample:
+                await scenario(client, season(prefix, args.items))
+            report[name] = {"seconds": round(sample["seconds"], 3), "statements": sample["statements"]}
+
+        items = season("Bulk", args.items, 1.0)
+        with counter.measure() as sample:
+            response = await client.put("/api/menu/admin/bulk", params={"dry_run": True}, json=items)
+        report["dry_run"] = {
+            "ms": round(sample["seconds"] * 1000, 1),
+            "statements": sample["statements"],
+            "unchanged": response.json()["unchanged"],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+
+    async def _main():
+        try:
+            return await run(args)
+        finally:
+            await engine.dispose()
+
+    print(json.dumps(asyncio.run(_main()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
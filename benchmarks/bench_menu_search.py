@@ -0,0 +1,110 @@
+"""Latence de la recherche floue du menu : index trigrammes contre l'ancien parcours côté client.
+
+Construit l'index sur `--items` items (les vrais noms du menu complétés par des items
+synthétiques), puis chronomètre des phrases typiques de l'agent vocal. L'ancien chemin
+est simulé par un filtre par sous-chaîne sur la liste complète (ce que faisait le client
+après GET /api/menu/, téléchargement non compris). Sans base de données.
+
+    python -m benchmarks.bench_menu_search --items 500 --repeat 2000
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.common import percentile
+
+from app.core.menu_search import MenuSearchIndex, fold
+
+BASE_ITEMS = [
+    ("Pizza Margherita", "Tomate, mozzarella, basilic frais", "pizza"),
+    ("Pizza Marinara", "Tomate, huile d'olive, origan", "pizza"),
+    ("Pizza Quatre Fromages", "Mozzarella, gorgonzola, chèvre, parmesan", "pizza"),
+    ("Pizza Reine", "Tomate, jambon, champignons", "pizza"),
+    ("Pizza Calzone", "Chausson, jambon, œuf", "pizza"),
+    ("Coca-Cola", "Boisson gazeuse 33cl", "boisson"),
+    ("Coca-Cola Zéro", "Sans sucre 33cl", "boisson"),
+    ("Eau pétillante", "50cl", "boisson"),
+    ("Tiramisù", "Mascarpone, café", "dessert"),
+    ("Crème brûlée", "Vanille", "dessert"),
+]
+WORDS = ["napolitaine", "chorizo", "savoyarde", "burrata", "truffe", "pesto", "thon", "saumon",
+         "poulet", "kebab", "orientale", "royale", "picante", "forestière", "diavola", "végétarienne"]
+QUERIES = ["margarita", "quatre fromage", "un coca", "je voudrais une pizza reine", "tiramisu",
+           "creme brulee", "coca zero", "calzon", "une savoyarde", "pizza au chorizo s'il vous plaît"]
+
+
+def build_items(count, rng):
+    items = []
+    for index in range(count):
+        if index < len(BASE_ITEMS):
+            name, description, category = BASE_ITEMS[index]
+        else:
+            name = "Pizza " + " ".join(rng.sample(WORDS, 2)).title() + f" {index}"
+            description = ", ".join(rng.sample(WORDS, 3))
+            category = rng.choice(["pizza", "pizza", "dessert", "boisson"])
+        items.append({"id": index + 1, "name": name, "description": description, "category": category,
+                      "price": 10.0, "available": True, "image_url": None})
+    return items
+
+
+def substring_search(items, query):
+    folded = fold(query)
+    return [item for item in items if folded in fold(item["name"])]
+
+
+def measure(func, repeat):
+    samples = []
+    for index in range(repeat):
+        query = QUERIES[index % len(QUERIES)]
+        start = time.perf_counter()
+        func(query)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return {
+        "p50_us": round(percentile(samples, 50), 1),
+        "p99_us": round(percentile(samples, 99), 1),
+        "max_us": round(max(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="sortie JSON brute")
+    args = parser.parse_args()
+
+    items = build_items(args.items, random.Random(args.seed))
+    index = MenuSearchIndex()
+    start = time.perf_counter()
+    index.rebuild(items)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    index.upsert({**items[0], "name": "Pizza Margherita Bufala"})
+    upsert_us = (time.perf_counter() - start) * 1_000_000
+
+    report = {
+        "items": args.items,
+        "index": index.stats(),
+        "build_ms": round(build_ms, 3),
+        "upsert_us": round(upsert_us, 1),
+        "trigram_index": measure(index.search, args.repeat),
+        "substring_scan": measure(lambda query: substring_search(items, query), args.repeat),
+        "top_results": {query: [result["name"] for result in index.search(query, limit=3)] for query in QUERIES},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    print(f"{args.items} items, index construit en {report['build_ms']} ms, upsert {report['upsert_us']} µs")
+    for name in ("trigram_index", "substring_scan"):
+        row = report[name]
+        print(f"{name:<15} p50 {row['p50_us']:>8} µs  p99 {row['p99_us']:>8} µs  max {row['max_us']:>8} µs")
+    for query, names in report["top_results"].items():
+        print(f"  {query!r:40} -> {names}")
+
+
+if __name__ == "__main__":
+    main()
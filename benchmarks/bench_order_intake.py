@@ -0,0 +1,125 @@
+"""Rafale de commandes : une transaction par requête (direct) contre commit groupé (batch).
+
+Envoie `--orders` commandes avec `--concurrency` clients simultanés sur POST /api/orders/
+(application en process) et compare débit, latences, transactions et prises de connexion.
+
+    python -m benchmarks.bench_order_intake --orders 2000 --concurrency 64 --batch-sizes 25,100
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.common import StatementCounter, asgi_client, percentile, seed_menu
+
+from sqlalchemy import event
+
+from app.main import app
+from app.db.session import async_session, engine, pool_stats
+from app.service.order_intake import OrderIntake
+import app.api.order as order_api
+
+
+class CommitCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_commit(self, *args):
+        self.count += 1
+
+
+async def burst(client, menu_ids, orders, concurrency, rng):
+    latencies = []
+    statuses = {}
+    remaining = iter(range(orders))
+
+    async def client_loop():
+        for _ in remaining:
+            items = [{"menu_item_id": rng.choice(menu_ids), "quantity": 1} for _ in range(rng.randint(1, 4))]
+            start = time.perf_counter()
+            try:
+                response = await client.post("/api/orders/", json={"customer_name": "Bench", "items": items})
+                status = response.status_code
+            except Exception:
+                # Exceptions de l'application (pool épuisé, base verrouillée) remontées par le transport ASGI
+                status = "error"
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def run(args):
+    menu_ids = await seed_menu(async_session)
+    statements = StatementCounter(engine)
+    commits = CommitCounter(engine)
+    client = asgi_client(app)
+    report = []
+
+    modes = [("direct", None)] + [("batch", size) for size in args.batch_sizes]
+    try:
+        for mode, batch_size in modes:
+            intake = OrderIntake(batch_size=batch_size or 1, linger_ms=args.linger_ms)
+            order_api.order_intake = intake
+            if mode == "batch":
+                await intake.start()
+
+            checkouts_before = pool_stats(engine).get("checkouts", 0)
+            statements_before, commits_before = statements.count, commits.count
+            latencies, statuses, wall = await burst(
+                client, menu_ids, args.orders, args.concurrency, random.Random(args.seed)
+            )
+            await intake.stop()
+
+            report.append({
+                "mode": mode if batch_size is None else f"batch/{batch_size}",
+                "orders": args.orders,
+                "concurrency": args.concurrency,
+                "statuses": statuses,
+                "throughput_rps": round(args.orders / wall, 1),
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+                "commits": commits.count - commits_before,
+                "statements": statements.count - statements_before,
+                "pool_checkouts": pool_stats(engine).get("checkouts", 0) - checkouts_before,
+            })
+    finally:
+        await client.aclose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch-sizes", default="25,100",
+                        type=lambda value: [int(size) for size in value.split(",") if size])
+    parser.add_argument("--linger-ms", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="sortie JSON brute")
+    args = parser.parse_args()
+
+    async def _main():
+        try:
+            return await run(args)
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(_main())
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'mode':<10} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'commits':>8} {'stmts':>7} {'checkouts':>10}")
+    for row in report:
+        print(f"{row['mode']:<10} {row['throughput_rps']:>8} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+              f"{row['p99_ms']:>9} {row['commits']:>8} {row['statements']:>7} {row['pool_checkouts']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Surcharge de POST /api/orders/ : latence d'un client normal avec et sans contrôle d'admission.
+
+Un client « normal » passe une commande toutes les `--interval` secondes pendant qu'une
+intégration défaillante (`--flood-clients` IP distinctes, `--flood-concurrency` requêtes
+simultanées) inonde la même route. Compare RATE_LIMIT_MODE=off et enforce, avec un pool
+de connexions volontairement petit (DB_POOL_SIZE=4 par défaut).
+
+    python -m benchmarks.bench_rate_limit --duration 5 --flood-concurrency 200
+"""
+import os
+
+os.environ.setdefault("RATE_LIMIT_MODE", "enforce")
+os.environ.setdefault("RATE_LIMIT_TRUST_PROXY", "true")
+os.environ.setdefault("DB_POOL_SIZE", "4")
+os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+os.environ.setdefault("DB_POOL_TIMEOUT", "10")
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import asgi_client, percentile, seed_menu
+
+from app.core.rate_limit import rate_limiters
+from app.db.session import async_session, engine
+from app.main import app
+
+
+def _summary(latencies, statuses):
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies, default=0), 2),
+    }
+
+
+async def _post(client, order, ip, latencies, statuses):
+    start = time.perf_counter()
+    try:
+        response = await client.post("/api/orders/", json=order, headers={"X-Forwarded-For": ip})
+        status = response.status_code
+    except Exception:
+        # Timeout du pool ou base verrouillée remontés par le transport ASGI
+        status = "error"
+    latencies.append((time.perf_counter() - start) * 1000)
+    statuses[status] = statuses.get(status, 0) + 1
+
+
+async def scenario(client, order, args):
+    stop_at = time.perf_counter() + args.duration
+    normal = ([], {})
+    flood = ([], {})
+
+    async def normal_client():
+        while time.perf_counter() < stop_at:
+            await _post(client, order, "203.0.113.10", *normal)
+            await asyncio.sleep(args.interval)
+
+    async def flood_loop(index):
+        while time.perf_counter() < stop_at:
+            await _post(client, order, f"198.51.100.{index % args.flood_clients}", *flood)
+            # Client et serveur partagent le process : sans pause, les refus instantanés
+            # monopoliseraient la boucle asyncio et fausseraient la mesure côté serveur
+            await asyncio.sleep(args.flood_pause)
+
+    await asyncio.gather(normal_client(), *(flood_loop(i) for i in range(args.flood_concurrency)))
+    return {"normal": _summary(*normal), "flood": _summary(*flood)}
+
+
+async def run(args):
+    menu_ids = await seed_menu(async_session)
+    order = {"customer_name": "Bench", "items": [{"menu_item_id": menu_ids[0], "quantity": 1}]}
+    client = asgi_client(app)
+    report = {}
+    try:
+        # Construit la pile de middlewares (et donc le limiteur) avant la mesure
+        await client.get("/api")
+        limiter = rate_limiters[-1]
+        for mode in args.modes:
+            limiter.mode = mode
+            report[mode] = await scenario(client, order, args)
+            await asyncio.sleep(1)
+        report["limiter"] = limiter.stats()
+    finally:
+        await client.aclose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--interval", type=float, default=0.5, help="délai entre deux commandes du client normal")
+    parser.add_argument("--flood-clients", type=int, default=50)
+    parser.add_argument("--flood-concurrency", type=int, default=200)
+    parser.add_argument("--flood-pause", type=float, default=0.2, help="pause entre deux requêtes d'une boucle du flood")
+    parser.add_argument("--modes", default="off,enforce", type=lambda value: value.split(","))
+    parser.add_argument("--json", action="store_true", help="sortie JSON brute")
+    args = parser.parse_args()
+
+    async def _main():
+        try:
+            return await run(args)
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(_main())
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+        return
+
+    print(f"{'mode':<8} {'client':<7} {'req':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuts")
+    for mode in args.modes:
+        for name in ("normal", "flood"):
+            row = report[mode][name]
+            print(f"{mode:<8} {name:<7} {row['requests']:>6} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+                  f"{row['p99_ms']:>9} {row['max_ms']:>9}  {row['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
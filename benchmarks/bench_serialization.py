@@ -0,0 +1,116 @@
+"""Coût CPU de la sérialisation d'une liste de commandes : modèles Pydantic revalidés par
+`response_model` (ancien chemin) contre dicts encodés directement en JSON (FastJSONResponse).
+
+Mesure uniquement la conversion lignes -> octets, sans base de données.
+
+    python -m benchmarks.bench_serialization --orders 10000 --items 3 --repeat 10
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List
+
+from benchmarks.common import percentile
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core import serialization
+from app.core.serialization import FastJSONResponse
+from app.schema.order import OrderItemRead, OrderRead
+from app.service.order import order_row_dict
+
+OrderRow = namedtuple("OrderRow", "id customer_name customer_phone customer_email total_amount status created_at")
+ItemRow = namedtuple("ItemRow", "id order_id menu_item_id quantity unit_price")
+
+
+def build_rows(orders, items_per_order):
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    rows, items = [], {}
+    item_id = 0
+    for order_id in range(1, orders + 1):
+        rows.append(OrderRow(order_id, f"Client {order_id}", "0600000000", None,
+                             12.5 * items_per_order, "pending", start + timedelta(seconds=order_id)))
+        items[order_id] = []
+        for line in range(items_per_order):
+            item_id += 1
+            items[order_id].append(ItemRow(item_id, order_id, line + 1, 1, 12.5))
+    return rows, items
+
+
+def legacy_body(rows, items, field):
+    """OrderRead construit à la main, puis revalidé et sérialisé comme le fait FastAPI"""
+    orders = [
+        OrderRead(
+            id=order.id,
+            customer_name=order.customer_name,
+            customer_phone=order.customer_phone,
+            customer_email=order.customer_email,
+            total_amount=order.total_amount,
+            status=order.status,
+            created_at=order.created_at,
+            items=[
+                OrderItemRead(id=item.id, menu_item_id=item.menu_item_id,
+                              quantity=item.quantity, unit_price=item.unit_price)
+                for item in items[order.id]
+            ]
+        ) for order in rows
+    ]
+    content = asyncio.run(serialize_response(field=field, response_content=orders))
+    return JSONResponse(content).body
+
+
+def fast_body(rows, items):
+    return FastJSONResponse([order_row_dict(order, items[order.id]) for order in rows]).body
+
+
+def measure(fn, repeat):
+    samples = []
+    body = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=3, help="lignes par commande")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="sortie JSON brute")
+    args = parser.parse_args()
+
+    rows, items = build_rows(args.orders, args.items)
+    field = create_model_field(name="Response_get_all_orders", type_=List[OrderRead], mode="serialization")
+
+    legacy, legacy_bytes = measure(lambda: legacy_body(rows, items, field), args.repeat)
+    fast, fast_bytes = measure(lambda: fast_body(rows, items), args.repeat)
+    if json.loads(legacy_bytes) != json.loads(fast_bytes):
+        raise SystemExit("Les deux chemins ne produisent pas le même JSON")
+
+    report = [
+        {"path": name, "encoder": encoder, "orders": args.orders, "bytes": len(body),
+         "p50_ms": round(percentile(samples, 50), 3), "p95_ms": round(percentile(samples, 95), 3)}
+        for name, encoder, samples, body in (
+            ("response_model", "json", legacy, legacy_bytes),
+            ("fast_path", "orjson" if serialization.orjson else "json", fast, fast_bytes),
+        )
+    ]
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'path':<16} {'encoder':<8} {'orders':>7} {'bytes':>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in report:
+        print(f"{row['path']:<16} {row['encoder']:<8} {row['orders']:>7} {row['bytes']:>10} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Outils partagés par les scripts de benchmark.
+
+Par défaut les benchmarks tournent sur une base SQLite jetable ; pointer DATABASE_URL
+vers un Postgres (postgresql+asyncpg://...) pour des chiffres représentatifs de la prod.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+# Tous les clients simulés partagent une IP : sans ça, les rafales finiraient en 429
+os.environ.setdefault("RATE_LIMIT_MODE", "off")
+os.environ.setdefault(
+    "DATABASE_URL",
+    "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="pizzapi-bench-"), "bench.db"),
+)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+class StatementCounter:
+    """Compte les instructions SQL envoyées par un moteur (≈ allers-retours réseau)"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    @contextmanager
+    def measure(self):
+        start_count = self.count
+        start = time.perf_counter()
+        sample = {}
+        yield sample
+        sample["statements"] = self.count - start_count
+        sample["seconds"] = time.perf_counter() - start
+
+
+async def seed_menu(session_factory, count=50):
+    """Crée les tables et un menu synthétique, renvoie les ids des items"""
+    from app.db.session import init_db
+    from app.model.menu import MenuItem
+
+    from sqlmodel import select
+
+    await init_db()
+    async with session_factory() as session:
+        names = [f"Bench item {i}" for i in range(count)]
+        # Noms uniques : sur une base réutilisée (DATABASE_URL), reprendre les items existants
+        result = await session.execute(select(MenuItem.name, MenuItem.id).where(MenuItem.name.in_(names)))
+        existing = dict(result.all())
+        items = [
+            MenuItem(name=name, description="benchmark", price=5 + i % 10, category="pizza")
+            for i, name in enumerate(names)
+            if name not in existing
+        ]
+        session.add_all(items)
+        await session.commit()
+        existing.update((item.name, item.id) for item in items)
+        return [existing[name] for name in names]
+
+
+async def seed_admin(session_factory, username="bench", password="bench-password"):
+    from app.core.security import hash_password
+    from app.model.user import User
+
+    async with session_factory() as session:
+        session.add(User(username=username, hashed_password=hash_password(password), is_owner=True))
+        await session.commit()
+    return username, password
+
+
+def asgi_client(app, base_url="http://bench"):
+    import httpx
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=base_url)
@@ -0,0 +1,258 @@
+"""Harnais de charge : rejoue un fichier NDJSON et/ou un mélange synthétique de requêtes.
+
+Cible l'application en process (ASGI transport de httpx, base SQLite jetable par défaut
+ou DATABASE_URL) ou un serveur uvicorn déjà lancé (--base-url). Le rapport JSON donne
+le débit et les latences p50/p95/p99 par modèle de route, à comparer entre commits.
+
+Format des lignes rejouées : soit une requête {"method", "path", "body"?, "headers"?},
+soit directement un payload OrderCreate (envoyé sur POST /api/orders/).
+
+    python -m benchmarks.load --mix menu=60,order_create=20,order_get=10,admin_list=8,login=2 \\
+        --concurrency 32 --requests 5000 --output load.json
+    python -m benchmarks.load --base-url http://localhost:8000 --replay orders.ndjson \\
+        --username massimo --password ... --concurrency 16
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import ROOT, asgi_client, percentile, seed_admin, seed_menu
+
+import httpx
+
+from app.main import app
+from app.db.session import async_session, engine
+from app.core.events import order_events
+
+DEFAULT_MIX = "menu=60,order_create=20,order_get=10,admin_list=8,login=2"
+
+
+class Workload:
+    """Génère les requêtes synthétiques ; garde les ids créés pour les relire"""
+
+    def __init__(self, menu_ids, credentials, rng):
+        self.menu_ids = menu_ids or [1]
+        self.credentials = credentials
+        self.rng = rng
+        self.order_ids = []
+
+    def menu(self):
+        path = self.rng.choice(["/api/menu/", "/api/menu/", "/api/menu/categories", "/api/menu/category/pizza"])
+        return {"method": "GET", "path": path}
+
+    def order_create(self):
+        items = [
+            {"menu_item_id": self.rng.choice(self.menu_ids), "quantity": self.rng.randint(1, 3)}
+            for _ in range(self.rng.randint(1, 5))
+        ]
+        body = {"customer_name": "Load test", "customer_phone": "0600000000", "items": items}
+        return {"method": "POST", "path": "/api/orders/", "body": body}
+
+    def order_get(self):
+        order_id = self.rng.choice(self.order_ids) if self.order_ids else 1
+        return {"method": "GET", "path": f"/api/orders/{order_id}"}
+
+    def admin_list(self):
+        path = self.rng.choice(["/api/orders/admin/all?limit=50", "/api/orders/admin/status/pending?limit=50"])
+        return {"method": "GET", "path": path, "auth": True}
+
+    def login(self):
+        return {"method": "POST", "path": "/api/auth/login", "body": self.credentials}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        if part:
+            name, weight = part.split("=")
+            weights[name.strip()] = float(weight)
+    return weights
+
+
+def replay_requests(path):
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            if "path" in data:
+                yield data
+            elif "items" in data:
+                yield {"method": "POST", "path": "/api/orders/", "body": data}
+
+
+def synthetic_requests(workload, weights):
+    names = list(weights)
+    cumulative = list(itertools.accumulate(weights[name] for name in names))
+    while True:
+        name = workload.rng.choices(names, cum_weights=cumulative)[0]
+        yield getattr(workload, name)()
+
+
+def route_template(method, path):
+    """Rattache un chemin concret au modèle de route FastAPI (/api/orders/{order_id})"""
+    bare = path.split("?", 1)[0]
+    for route in app.routes:
+        methods = getattr(route, "methods", None) or set()
+        if method in methods and route.path_regex.match(bare):
+            return f"{method} {route.path}"
+    return f"{method} {bare}"
+
+
+async def worker(client, requests, workload, token, samples, deadline):
+    for request in requests:
+        if deadline and time.perf_counter() >= deadline:
+            return
+        headers = dict(request.get("headers", {}))
+        if request.get("auth") and token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        start = time.perf_counter()
+        try:
+            response = await client.request(request["method"], request["path"], json=request.get("body"), headers=headers)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        elapsed = time.perf_counter() - start
+
+        template = route_template(request["method"], request["path"])
+        samples.setdefault(template, []).append((elapsed, status))
+        if response is not None and status == 201 and request["path"] == "/api/orders/":
+            workload.order_ids.append(response.json()["id"])
+
+
+def summarize(samples, wall_seconds):
+    def describe(entries):
+        latencies = [elapsed * 1000 for elapsed, _ in entries]
+        statuses = {}
+        for _, status in entries:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return {
+            "count": len(entries),
+            "errors": sum(1 for _, status in entries if status == 0 or status >= 500),
+            "statuses": statuses,
+            "throughput_rps": round(len(entries) / wall_seconds, 2) if wall_seconds else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "max_ms": round(max(latencies), 3),
+        }
+
+    everything = [entry for entries in samples.values() for entry in entries]
+    return {
+        "total": describe(everything) if everything else {},
+        "routes": {template: describe(entries) for template, entries in sorted(samples.items())},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        credentials = {"username": args.username, "password": args.password}
+        menu_ids = [item["id"] for item in (await client.get("/api/menu/")).json()]
+    else:
+        menu_ids = await seed_menu(async_session)
+        username, password = await seed_admin(async_session)
+        credentials = {"username": username, "password": password}
+        await order_events.start()
+        client = asgi_client(app)
+
+    workload = Workload(menu_ids, credentials, rng)
+    token = None
+    if credentials.get("username"):
+        response = await client.post("/api/auth/login", json=credentials)
+        if response.status_code == 200:
+            token = response.json()["access_token"]
+
+    sources = []
+    if args.replay:
+        sources.append(replay_requests(args.replay))
+    if args.mix:
+        sources.append(synthetic_requests(workload, parse_mix(args.mix)))
+    requests = itertools.chain(*sources)
+    if args.requests:
+        requests = itertools.islice(requests, args.requests)
+
+    samples = {}
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            worker(client, requests, workload, token, samples, deadline) for _ in range(args.concurrency)
+        ))
+    finally:
+        await client.aclose()
+        if not args.base_url:
+            await order_events.stop()
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or f"in-process ({engine.dialect.name})",
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "replay": args.replay,
+            "wall_seconds": round(wall_seconds, 3),
+        },
+        **summarize(samples, wall_seconds),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="serveur cible ; par défaut l'application en process")
+    parser.add_argument("--replay", help="fichier NDJSON à rejouer avant le mélange synthétique")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="poids du mélange synthétique, vide pour le désactiver")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="nombre total de requêtes (0 = illimité)")
+    parser.add_argument("--duration", type=float, default=0, help="durée maximale en secondes")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="fichier JSON du rapport")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    if not args.requests and not args.duration and args.mix:
+        raise SystemExit("--requests 0 avec un mélange synthétique nécessite --duration")
+
+    async def _main():
+        try:
+            return await run(args)
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(_main())
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{'route':<48} {'count':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for template, stats in report["routes"].items():
+        print(f"{template:<48} {stats['count']:>7} {stats['throughput_rps']:>9} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 #!/bin/bash
 set -e
 
+# Une seule passe de migrations, avant le lancement des workers. Avec plusieurs
+# conteneurs web, la laisser à un seul (RUN_MIGRATIONS=false sur les autres).
+RUN_MIGRATIONS="${RUN_MIGRATIONS:-true}"
+WEB_CONCURRENCY="${WEB_CONCURRENCY:-1}"
+PORT="${PORT:-8000}"
+
 log() {
     echo "[$(date +'%Y-%m-%d %H:%M:%S')] $1"
 }
@@ -16,10 +22,16 @@ run_migrations() {
 }
 
 start_app() {
-    log "🚀 Démarrage de l'application FastAPI..."
-    exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+    log "🚀 Démarrage de l'application FastAPI (${WEB_CONCURRENCY} worker(s))..."
+    # exec : uvicorn remplace le shell et reçoit directement SIGTERM pour un arrêt propre
+    exec uvicorn app.main:app --host 0.0.0.0 --port "${PORT}" \
+        --workers "${WEB_CONCURRENCY}" \
+        --timeout-graceful-shutdown "${GRACEFUL_SHUTDOWN_TIMEOUT:-20}" \
+        --no-server-header
 }
 
 # Exécution principale
+if [ "${RUN_MIGRATIONS}" = "true" ]; then
+    run_migrations
+fi
 start_app
-run_migrations
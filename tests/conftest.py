@@ -0,0 +1,132 @@
+"""Fixtures partagées : base SQLite jetable, application démarrée, client admin et
+`query_counts` pour vérifier les budgets SQL des routes.
+
+    async def test_get_order(client, query_counts):
+        await client.get("/api/orders/1")
+        assert query_counts.count("GET /api/orders/{order_id}") <= 2
+
+Un test qui utilise `query_counts` échoue aussi si une route servie dépasse son budget
+`@query_budget` ou exécute plusieurs fois la même instruction (N+1), quel que soit
+QUERY_BUDGET_MODE.
+"""
+import os
+import tempfile
+from typing import List, Optional
+
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault(
+    "DATABASE_URL",
+    "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="pizzapi-tests-"), "tests.db"),
+)
+# Le schéma est créé par la fixture `app_db` ; tous les clients du test partagent une IP
+os.environ.setdefault("SCHEMA_CHECK", "off")
+os.environ.setdefault("RATE_LIMIT_MODE", "off")
+
+import httpx
+import pytest
+from sqlmodel import SQLModel
+
+from app.core.idempotency import idempotency_store
+from app.core.menu_cache import menu_cache
+from app.core.menu_search import menu_search
+from app.core.query_budget import QueryRecord, record_queries
+from app.core.security import create_access_token, hash_password, user_cache
+from app.db.session import async_session, engine
+from app.main import app
+from app.model.menu import MenuItem
+from app.model.user import User
+from app.schema.order import OrderCreate
+from app.service import order as order_service
+from app.service.caller import caller_cache
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin-password"
+# Calculé une fois : bcrypt coûte plus cher que tout le reste d'un test
+ADMIN_PASSWORD_HASH = hash_password(ADMIN_PASSWORD)
+
+MENU = [
+    ("Pizza Margherita", 10.5, "pizza"),
+    ("Pizza Quatre Fromages", 12.0, "pizza"),
+    ("Coca-Cola", 2.5, "boisson"),
+]
+ORDER_PHONE = "06 12 34 56 78"
+
+
+class QueryCounts:
+    def __init__(self, records: List[QueryRecord]):
+        self.records = records
+
+    def for_route(self, route: str) -> List[QueryRecord]:
+        return [record for record in self.records if record.route == route]
+
+    def count(self, route: Optional[str] = None) -> int:
+        """Instructions SQL de la dernière requête servie (sur `route` si précisée)"""
+        records = self.for_route(route) if route else self.records
+        if not records:
+            raise AssertionError(f"No request recorded for {route or 'any route'}")
+        return records[-1].queries
+
+    @property
+    def violations(self) -> List[str]:
+        return [violation for record in self.records for violation in record.violations]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _clear_caches():
+    # Les budgets se mesurent cache froid : rien ne doit survivre d'un test à l'autre
+    menu_cache.invalidate()
+    menu_search._loaded_at = None
+    user_cache.clear()
+    caller_cache.clear()
+    idempotency_store.cache.clear()
+
+
+@pytest.fixture
+async def app_db():
+    """Schéma recréé, un admin, le menu de MENU et une commande en attente (id 1)"""
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+    async with async_session() as session:
+        session.add(User(username=ADMIN_USERNAME, hashed_password=ADMIN_PASSWORD_HASH, is_owner=True))
+        session.add_all(
+            MenuItem(name=name, description=f"{name} maison", price=price, category=category)
+            for name, price, category in MENU
+        )
+        await session.commit()
+        await order_service.create_order(session, OrderCreate(
+            customer_name="Client", customer_phone=ORDER_PHONE, items=[{"menu_item_id": 1, "quantity": 2}]
+        ))
+        await session.commit()
+
+    _clear_caches()
+    try:
+        yield
+    finally:
+        # Connexions liées à la boucle du test
+        await engine.dispose()
+
+
+@pytest.fixture
+async def client(app_db):
+    """Client ASGI sur l'application démarrée (lifespan compris), authentifié en admin"""
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://tests") as client:
+            token = create_access_token({"sub": ADMIN_USERNAME, "is_owner": True})
+            client.headers["Authorization"] = f"Bearer {token}"
+            yield client
+
+
+@pytest.fixture
+def query_counts():
+    with record_queries() as records:
+        counts = QueryCounts(records)
+        yield counts
+    violations = counts.violations
+    if violations:
+        pytest.fail("Query budget exceeded:\n" + "\n".join(violations), pytrace=False)
@@ -0,0 +1,82 @@
+"""Idempotency-Key sur POST /api/orders/ : rejeu, conflit de contenu et clés expirées."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, update
+from sqlmodel import select
+
+from app.core.idempotency import idempotency_store
+from app.db.session import async_session
+from app.model.idempotency import IdempotencyKey
+from app.model.order import Order
+
+ORDER = {"customer_name": "Retry", "items": [{"menu_item_id": 1, "quantity": 1}]}
+
+
+async def _post(client, key, payload=ORDER):
+    return await client.post("/api/orders/", json=payload, headers={"Idempotency-Key": key})
+
+
+async def _order_count() -> int:
+    async with async_session() as session:
+        return await session.scalar(select(func.count()).select_from(Order))
+
+
+async def _expire(key):
+    async with async_session() as session:
+        await session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(created_at=datetime.utcnow() - timedelta(seconds=idempotency_store.ttl + 60))
+        )
+        await session.commit()
+    idempotency_store.cache.clear()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("from_table", [False, True], ids=["cache", "table"])
+async def test_same_key_and_body_replays_first_response(client, from_table):
+    first = await _post(client, "retry-1")
+    if from_table:
+        idempotency_store.cache.clear()
+    replay = await _post(client, "retry-1")
+
+    assert first.status_code == replay.status_code == 201
+    assert replay.json() == first.json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert await _order_count() == 2
+
+
+@pytest.mark.anyio
+async def test_same_key_with_other_body_is_rejected(client):
+    await _post(client, "retry-2")
+    response = await _post(client, "retry-2", {**ORDER, "customer_name": "Someone else"})
+
+    assert response.status_code == 422
+    assert response.json() == {"detail": "Idempotency-Key was already used with a different request payload"}
+    assert await _order_count() == 2
+
+
+@pytest.mark.anyio
+async def test_expired_key_is_executed_again(client):
+    first = await _post(client, "retry-3")
+    await _expire("retry-3")
+    second = await _post(client, "retry-3")
+
+    assert second.status_code == 201
+    assert "Idempotent-Replayed" not in second.headers
+    assert second.json()["id"] != first.json()["id"]
+    assert await _order_count() == 3
+
+
+@pytest.mark.anyio
+async def test_purge_deletes_only_expired_keys(client):
+    await _post(client, "old")
+    await _post(client, "recent")
+    await _expire("old")
+
+    assert await idempotency_store.purge_expired() == 1
+    async with async_session() as session:
+        keys = (await session.execute(select(IdempotencyKey.key))).scalars().all()
+    assert keys == ["recent"]
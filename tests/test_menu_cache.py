@@ -0,0 +1,42 @@
+"""Réponses publiques du menu : négociation gzip et validateurs par représentation."""
+import pytest
+
+
+@pytest.mark.anyio
+async def test_gzip_and_identity_have_distinct_etags(client):
+    gzipped = await client.get("/api/menu/", headers={"Accept-Encoding": "gzip"})
+    identity = await client.get("/api/menu/", headers={"Accept-Encoding": "identity"})
+
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in identity.headers
+    assert gzipped.headers["ETag"] != identity.headers["ETag"]
+    assert gzipped.json() == identity.json()
+
+
+@pytest.mark.anyio
+async def test_if_none_match_only_matches_served_representation(client):
+    gzipped = await client.get("/api/menu/", headers={"Accept-Encoding": "gzip"})
+    etag = gzipped.headers["ETag"]
+
+    not_modified = await client.get("/api/menu/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    identity = await client.get("/api/menu/", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+
+    assert not_modified.status_code == 304
+    assert identity.status_code == 200
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("accept_encoding", ["gzip;q=0", "br, gzip; q=0.0", "*;q=0", ""])
+async def test_gzip_refused_when_not_acceptable(client, accept_encoding):
+    response = await client.get("/api/menu/", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("accept_encoding", ["gzip", "deflate, gzip;q=0.5", "*"])
+async def test_gzip_served_when_acceptable(client, accept_encoding):
+    response = await client.get("/api/menu/", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.headers["Content-Encoding"] == "gzip"
@@ -0,0 +1,40 @@
+"""Import NDJSON en masse : une ligne de résultat par ligne reçue, corps déversé sur disque."""
+import json
+
+import pytest
+
+from app.service import order_bulk
+
+VALID = {"customer_name": "Import", "items": [{"menu_item_id": 1, "quantity": 1}]}
+
+
+def _ndjson(payloads) -> bytes:
+    return b"".join(json.dumps(payload).encode() + b"\n" for payload in payloads)
+
+
+@pytest.mark.anyio
+async def test_bulk_reports_each_line_and_summary(client):
+    body = _ndjson([VALID, {**VALID, "items": [{"menu_item_id": 999, "quantity": 1}]}]) + b"not json\n"
+
+    response = await client.post("/api/orders/bulk", content=body)
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert [(result["line"], result["status"]) for result in results[:-1]] == [
+        (2, "error"), (3, "error"), (1, "created")
+    ]
+    assert results[0]["detail"] == "Menu item 999 not found"
+    assert results[-1] == {"summary": {"created": 1, "failed": 2}}
+
+
+@pytest.mark.anyio
+async def test_bulk_reads_body_spooled_to_disk_in_blocks(client, monkeypatch):
+    monkeypatch.setattr(order_bulk, "SPOOL_MAX_MEMORY", 1024)
+    monkeypatch.setattr(order_bulk, "SPOOL_IO_SIZE", 512)
+    body = _ndjson([VALID] * 100)
+
+    response = await client.post("/api/orders/bulk", params={"batch_size": 30}, content=body)
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["line"] for result in results[:-1]] == list(range(1, 101))
+    assert results[-1] == {"summary": {"created": 100, "failed": 0}}
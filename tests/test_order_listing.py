@@ -0,0 +1,27 @@
+"""Listes admin de commandes : pagination par curseur et export NDJSON."""
+import json
+
+import pytest
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("url", ["/api/orders/admin/all", "/api/orders/admin/status/pending"])
+async def test_stream_rejects_invalid_cursor_before_streaming(client, url):
+    response = await client.get(url, params={"stream": True, "cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@pytest.mark.anyio
+async def test_stream_resumes_after_cursor(client):
+    await client.post("/api/orders/", json={"customer_name": "Second", "items": [{"menu_item_id": 2, "quantity": 1}]})
+    first_page = await client.get("/api/orders/admin/all", params={"limit": 1})
+    assert [order["id"] for order in first_page.json()] == [2]
+
+    response = await client.get(
+        "/api/orders/admin/all", params={"stream": True, "cursor": first_page.headers["X-Next-Cursor"]}
+    )
+
+    assert response.status_code == 200
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [1]
@@ -0,0 +1,51 @@
+"""Changements de statut admin : transitions de ORDER_TRANSITIONS, unitaires et groupés."""
+import pytest
+
+
+async def _status(client, order_id):
+    response = await client.get(f"/api/orders/{order_id}")
+    return response.json()["status"]
+
+
+@pytest.mark.anyio
+async def test_allowed_transition(client):
+    response = await client.patch("/api/orders/admin/1/status", params={"new_status": "confirmed"})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "confirmed"
+    assert await _status(client, 1) == "confirmed"
+
+
+@pytest.mark.anyio
+async def test_refused_transition_reports_current_status(client):
+    response = await client.patch("/api/orders/admin/1/status", params={"new_status": "delivered"})
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == (
+        "Cannot change order status from pending to delivered. Allowed: ['confirmed', 'preparing', 'cancelled']"
+    )
+    assert await _status(client, 1) == "pending"
+
+
+@pytest.mark.anyio
+async def test_transition_on_missing_order(client):
+    response = await client.patch("/api/orders/admin/999/status", params={"new_status": "confirmed"})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_bulk_transition_skips_refused_and_missing_orders(client):
+    await client.post("/api/orders/", json={"customer_name": "Second", "items": [{"menu_item_id": 2, "quantity": 1}]})
+    await client.patch("/api/orders/admin/2/status", params={"new_status": "cancelled"})
+
+    response = await client.patch("/api/orders/admin/status", json={"order_ids": [1, 2, 999], "status": "confirmed"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "status": "confirmed",
+        "updated": [1],
+        "skipped": [{"id": 2, "status": "cancelled"}, {"id": 999, "status": None}],
+    }
+    assert await _status(client, 1) == "confirmed"
+    assert await _status(client, 2) == "cancelled"
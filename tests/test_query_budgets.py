@@ -0,0 +1,87 @@
+"""Chaque route servie reste dans son budget `@query_budget`, cache froid, sans N+1.
+
+Une entrée par route ; pour les écritures, le cas le plus coûteux (annulation, clé
+d'idempotence). Les réponses NDJSON et SSE, non bornées, ne sont pas contrôlées.
+"""
+import pytest
+
+from app.main import app
+from tests.conftest import ADMIN_PASSWORD, ADMIN_USERNAME
+
+ORDER = {"customer_name": "Test", "customer_phone": "0700000000", "items": [{"menu_item_id": 1, "quantity": 1}]}
+MENU_ITEM = {"name": "Pizza Reine", "description": "Jambon, champignons", "price": 13.0}
+
+# (méthode, route, URL, arguments de la requête)
+ENDPOINTS = [
+    ("POST", "/api/auth/login", "/api/auth/login", {"json": {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}}),
+    ("GET", "/api/auth/me", "/api/auth/me", {}),
+
+    ("GET", "/api/menu/", "/api/menu/", {}),
+    ("GET", "/api/menu/categories", "/api/menu/categories", {}),
+    ("GET", "/api/menu/category/{category}", "/api/menu/category/pizza", {}),
+    ("GET", "/api/menu/search", "/api/menu/search", {"params": {"q": "margarita"}}),
+    ("GET", "/api/menu/admin/all", "/api/menu/admin/all", {}),
+    ("POST", "/api/menu/admin/", "/api/menu/admin/", {"json": MENU_ITEM}),
+    ("PUT", "/api/menu/admin/bulk", "/api/menu/admin/bulk",
+     {"params": {"disable_missing": True}, "json": [MENU_ITEM, {**MENU_ITEM, "name": "Coca-Cola", "price": 3.0}]}),
+    ("GET", "/api/menu/admin/{item_id}", "/api/menu/admin/1", {}),
+    ("PUT", "/api/menu/admin/{item_id}", "/api/menu/admin/1", {"json": {"price": 11.0}}),
+    ("DELETE", "/api/menu/admin/{item_id}", "/api/menu/admin/3", {}),
+    ("PATCH", "/api/menu/admin/{item_id}/toggle-availability", "/api/menu/admin/1/toggle-availability", {}),
+
+    ("POST", "/api/orders/", "/api/orders/", {"json": ORDER, "headers": {"Idempotency-Key": "budget-test"}}),
+    ("GET", "/api/orders/{order_id}", "/api/orders/1", {}),
+    ("GET", "/api/orders/admin/all", "/api/orders/admin/all", {}),
+    ("GET", "/api/orders/admin/status/{status}", "/api/orders/admin/status/pending", {}),
+    ("GET", "/api/orders/admin/kitchen", "/api/orders/admin/kitchen", {}),
+    ("GET", "/api/orders/admin/kitchen/counts", "/api/orders/admin/kitchen/counts", {}),
+    ("GET", "/api/orders/by-phone/{phone}", "/api/orders/by-phone/+33612345678", {}),
+    ("PATCH", "/api/orders/admin/status", "/api/orders/admin/status", {"json": {"order_ids": [1, 2], "status": "cancelled"}}),
+    ("PATCH", "/api/orders/admin/{order_id}/status", "/api/orders/admin/1/status", {"params": {"new_status": "cancelled"}}),
+
+    ("GET", "/api/admin/stats/cache", "/api/admin/stats/cache", {}),
+    ("GET", "/api/admin/stats/password-hashing", "/api/admin/stats/password-hashing", {}),
+    ("GET", "/api/admin/stats/events", "/api/admin/stats/events", {}),
+    ("GET", "/api/admin/stats/order-intake", "/api/admin/stats/order-intake", {}),
+    ("GET", "/api/admin/stats/active-orders", "/api/admin/stats/active-orders", {}),
+    ("GET", "/api/admin/stats/rate-limit", "/api/admin/stats/rate-limit", {}),
+    ("GET", "/api/admin/db/pool", "/api/admin/db/pool", {}),
+    ("GET", "/api/admin/db/replica", "/api/admin/db/replica", {}),
+
+    ("GET", "/api/admin/analytics/summary", "/api/admin/analytics/summary", {}),
+    ("GET", "/api/admin/analytics/status-counts", "/api/admin/analytics/status-counts", {}),
+    ("GET", "/api/admin/analytics/daily", "/api/admin/analytics/daily", {}),
+    ("GET", "/api/admin/analytics/hourly", "/api/admin/analytics/hourly", {}),
+    ("GET", "/api/admin/analytics/items", "/api/admin/analytics/items", {}),
+]
+
+# Réponses en flux : le nombre d'instructions dépend du volume, le middleware ne les contrôle pas
+STREAMING_ROUTES = {
+    "POST /api/orders/bulk",
+    "GET /api/orders/admin/events",
+    "GET /api/orders/{order_id}/events",
+}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "method, route, url, kwargs", ENDPOINTS, ids=[f"{method} {route}" for method, route, _, _ in ENDPOINTS]
+)
+async def test_route_within_query_budget(client, query_counts, method, route, url, kwargs):
+    response = await client.request(method, url, **kwargs)
+    assert response.status_code < 400, response.text
+
+    record = query_counts.for_route(f"{method} {route}")[-1]
+    assert record.budget is not None, f"{method} {route} declares no @query_budget"
+    assert record.queries <= record.budget
+
+
+def test_every_budgeted_route_is_covered():
+    budgeted = {
+        f"{method} {route.path}"
+        for route in app.routes
+        if hasattr(getattr(route, "endpoint", None), "__query_budget__")
+        for method in route.methods
+    }
+    covered = {f"{method} {route}" for method, route, _, _ in ENDPOINTS}
+    assert budgeted - STREAMING_ROUTES == covered